@@ -0,0 +1,3 @@
+#!/usr/bin/python3
+"""Benchmarks of the storage engines, run with python3 -m benchmarks.<name>.
+"""
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""Benchmarks of every storage engine registered in
+models.engine.backends, run on the same workload so they can be compared.
+
+Each engine runs in a scratch directory with an empty storage, and is
+made models.storage meanwhile so that the places report their changes to
+it. Run from the root of the repository:
+
+    python3 -m benchmarks.bench_backends [number of objects]
+"""
+import sys
+import models
+from benchmarks.bench_storage import scratch, timed
+from models.engine.backends import BACKENDS, create_storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+OPERATIONS = ("new", "save", "reload", "get", "count", "query", "update")
+
+
+def workload(storage, count):
+    """
+    Runs the workload on a storage engine and times each operation: adding
+    places, saving them, reloading them, looking each one up, counting
+    them by city, querying them by price and saving a change to 1% of
+    them.
+
+    Args:
+        storage (BaseStorage): The engine, with an empty storage.
+        count (int): The number of places.
+
+    Returns:
+        dict: The duration of each operation, in seconds, by name.
+    """
+    def add():
+        for i in range(count):
+            place = Place()
+            place.city_id = "c{}".format(i % 100)
+            place.price_by_night = i % 500
+            storage.new(place)
+
+    def reload():
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+
+    def get():
+        for key in list(storage.all(Place)):
+            storage.get(Place, key.partition(".")[2])
+
+    def count_by_city():
+        for i in range(100):
+            storage.count(Place, city_id="c{}".format(i))
+
+    def update():
+        for place in list(storage.all(Place).values())[::100]:
+            place.price_by_night += 1
+        storage.save()
+
+    times = {"new": timed(add), "save": timed(storage.save)}
+    times["reload"] = timed(reload)
+    times["get"] = timed(get)
+    times["count"] = timed(count_by_city)
+    times["query"] = timed(storage.query, Place,
+                           ("price_by_night", "<", 100))
+    times["update"] = timed(update)
+    return times
+
+
+def bench_backends(count):
+    """
+    Runs the workload on every registered storage engine and prints the
+    timings, one engine per row.
+
+    Args:
+        count (int): The number of places.
+    """
+    print("{:8}".format("engine") + "".join(
+        "{:>9}".format(operation) for operation in OPERATIONS))
+    for name in BACKENDS:
+        with scratch():
+            storage = create_storage(name)
+            saved, models.storage = models.storage, storage
+            try:
+                times = workload(storage, count)
+            finally:
+                storage.close()
+                models.storage = saved
+        print("{:8}".format(name) + "".join(
+            "{:8.3f}s".format(times[operation])
+            for operation in OPERATIONS))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{} objects".format(count))
+    bench_backends(count)
@@ -0,0 +1,366 @@
+#!/usr/bin/python3
+"""Benchmarks of FileStorage.
+
+Each benchmark runs in a scratch directory with an empty storage and prints
+its timings. Run from the root of the repository:
+
+    python3 -m benchmarks.bench_storage [number of objects]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from console import HBNBCommand
+from models import storage
+from models.base_model import registry
+from models.compact_model import compact
+from models.engine.codec import decode_timestamp, encode_timestamp
+from models.engine.durability import SYNC_POLICIES, SyncPolicy
+from models.engine.file_storage import FileStorage
+from models.engine.stream import write_records
+from models.place import Place
+
+
+@contextmanager
+def scratch():
+    """
+    Runs the enclosed code in a temporary directory with an empty storage,
+    restoring the working directory and reloading the storage afterwards.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        os.chdir(path)
+        storage.clear()
+        try:
+            yield
+        finally:
+            storage.close()
+            storage.clear()
+            os.chdir(cwd)
+            storage.reload()
+
+
+def timed(func, *args):
+    """
+    Calls a function and returns how long it took.
+
+    Args:
+        func (callable): The function.
+        *args: The arguments of the function.
+
+    Returns:
+        float: The duration of the call, in seconds.
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def populate(count):
+    """
+    Saves a number of places to the JSON file of the storage.
+
+    Args:
+        count (int): The number of places.
+    """
+    for i in range(count):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.price_by_night = i % 500
+        place.latitude = (i * 7919 % 18000) / 100 - 90
+        place.longitude = (i * 104729 % 36000) / 100 - 180
+    storage.save()
+
+
+def bench_dispatch(count):
+    """
+    Compares building objects from their records through eval(), as
+    reload() used to, with looking their class up in the model registry.
+
+    Args:
+        count (int): The number of objects.
+    """
+    with scratch():
+        populate(count)
+        records = [obj.to_dict() for obj in storage.all().values()]
+
+        def with_eval():
+            for record in records:
+                obj = dict(record)
+                class_name = obj.pop("__class__")
+                eval('{}({})'.format(class_name, '**obj'))
+
+        def with_registry():
+            for record in records:
+                obj = dict(record)
+                registry[obj.pop("__class__")](**obj)
+
+        eval_time = timed(with_eval)
+        registry_time = timed(with_registry)
+    print("dispatch  eval {:.3f}s  registry {:.3f}s  speedup {:.2f}x".format(
+        eval_time, registry_time, eval_time / registry_time))
+
+
+def bench_reload(count):
+    """
+    Times a reload of the JSON file.
+
+    Args:
+        count (int): The number of objects in the JSON file.
+    """
+    with scratch():
+        populate(count)
+        storage.clear()
+        print("reload    {:.3f}s".format(timed(storage.reload)))
+
+
+def bench_reload_memory(count):
+    """
+    Compares the peak memory of a reload of the JSON file with the peak
+    memory of building the same objects from the JSON file read whole, as
+    reload() used to.
+
+    Args:
+        count (int): The number of objects in the JSON file.
+    """
+    def load_whole_file():
+        with open("file.json", "r", encoding="utf-8") as file:
+            for obj in json.load(file).values():
+                storage.new(registry[obj["__class__"]].from_dict(obj))
+
+    peaks = []
+    with scratch():
+        populate(count)
+        for func in (load_whole_file, storage.reload):
+            storage.clear()
+            tracemalloc.start()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    print("peak      json.load {:.1f} MB  streaming {:.1f} MB  ({:.0f}%)"
+          .format(peaks[0] / 2 ** 20, peaks[1] / 2 ** 20,
+                  100 * peaks[1] / peaks[0]))
+
+
+def bench_save(count):
+    """
+    Compares writing the records of the JSON file one at a time, as save()
+    does, with dumping a dictionary of every record, as save() used to.
+
+    Args:
+        count (int): The number of objects.
+    """
+    def dump_whole_store():
+        obj_dict = {key: obj.to_dict()
+                    for key, obj in storage.all().items()}
+        with open("file.json", "w", encoding="utf-8") as file:
+            json.dump(obj_dict, file)
+
+    def stream_records():
+        write_records("file.json", (
+            (key, json.dumps(obj.to_dict()))
+            for key, obj in storage.all().items()))
+
+    results = []
+    with scratch():
+        populate(count)
+        for func in (dump_whole_store, stream_records):
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append((timed(func), peak))
+    print("save      json.dump {:.3f}s {:.1f} MB  streaming {:.3f}s {:.1f} MB"
+          .format(results[0][0], results[0][1] / 2 ** 20,
+                  results[1][0], results[1][1] / 2 ** 20))
+
+
+def bench_sync(count):
+    """
+    Compares the time taken by saves of a single change under each sync
+    policy, appending to the journal and rewriting the JSON file.
+
+    Args:
+        count (int): The number of objects; the journal gets one save per
+                     100 objects, the JSON file one per 1000.
+    """
+    with scratch():
+        populate(count)
+        places = list(storage.all(Place).values())
+        policy = FileStorage._FileStorage__sync
+        try:
+            for journal, saves in ((True, count // 100),
+                                   (False, count // 1000)):
+                FileStorage._FileStorage__journal = journal
+                times = []
+                for mode in SYNC_POLICIES:
+                    FileStorage._FileStorage__sync = SyncPolicy(mode)
+
+                    def save_each():
+                        for place in places[:max(saves, 1)]:
+                            place.price_by_night += 1
+                            storage.save()
+                        storage.close()
+
+                    times.append("{} {:.3f}s".format(mode, timed(save_each)))
+                print("sync      {:8}  {}".format(
+                    "journal" if journal else "snapshot", "  ".join(times)))
+        finally:
+            FileStorage._FileStorage__journal = False
+            FileStorage._FileStorage__sync = policy
+
+
+def bench_write_behind(count):
+    """
+    Compares a scripted import of places through the console, which saves
+    after every command, with the same import in write-behind mode and
+    wrapped in begin and commit.
+
+    Args:
+        count (int): The number of objects; one place is created per 10.
+    """
+    creates = max(count // 10, 1)
+    times = []
+    with scratch(), redirect_stdout(io.StringIO()):
+        try:
+            for write_behind, batch in ((False, False), (True, False),
+                                        (False, True)):
+                storage.clear()
+                FileStorage._FileStorage__write_behind = write_behind
+
+                def run():
+                    console = HBNBCommand()
+                    if batch:
+                        console.onecmd("begin")
+                    for i in range(creates):
+                        console.onecmd("create Place")
+                    if batch:
+                        console.onecmd("commit")
+                    console.onecmd("quit")
+
+                times.append(timed(run))
+        finally:
+            FileStorage._FileStorage__write_behind = False
+    print("import    {} creates  save each {:.3f}s  write-behind {:.3f}s  "
+          "batch {:.3f}s".format(creates, *times))
+
+
+def bench_snapshot(count):
+    """
+    Compares reloading the JSON file with reloading the binary snapshot,
+    then reading one object back.
+
+    Args:
+        count (int): The number of objects.
+    """
+    times = []
+    with scratch():
+        populate(count)
+        key = next(iter(storage.all()))
+        try:
+            FileStorage._FileStorage__format = "binary"
+            storage.save()
+            for snapshot_format in ("json", "binary"):
+                FileStorage._FileStorage__format = snapshot_format
+                storage.clear()
+                times.append(timed(storage.reload) + timed(
+                    storage.get, Place, key.partition(".")[2]))
+        finally:
+            FileStorage._FileStorage__format = "json"
+    print("snapshot  json {:.3f}s  binary {:.3f}s  speedup {:.2f}x".format(
+        times[0], times[1], times[0] / times[1]))
+
+
+def bench_timestamps(count):
+    """
+    Compares the former strptime()/isoformat() timestamp path with the
+    codec, for both of its encodings.
+
+    Args:
+        count (int): The number of timestamps.
+    """
+    stamps = [datetime.now() for i in range(count)]
+    isos = [stamp.isoformat() for stamp in stamps]
+    epochs = [encode_timestamp(stamp, "epoch") for stamp in stamps]
+
+    def strptime():
+        for value in isos:
+            datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+
+    def decode(values):
+        for value in values:
+            decode_timestamp(value)
+
+    def encode(codec):
+        for stamp in stamps:
+            encode_timestamp(stamp, codec)
+
+    print("decode    strptime {:.3f}s  iso {:.3f}s  epoch {:.3f}s".format(
+        timed(strptime), timed(decode, isos), timed(decode, epochs)))
+    print("encode    isoformat {:.3f}s  epoch {:.3f}s".format(
+        timed(encode, "iso"), timed(encode, "epoch")))
+
+
+def bench_construction(count):
+    """
+    Compares building objects from their records through the constructor
+    with BaseModel.from_dict().
+
+    Args:
+        count (int): The number of objects.
+    """
+    with scratch():
+        populate(count)
+        records = [obj.to_dict() for obj in storage.all().values()]
+
+        def with_init():
+            for record in records:
+                obj = dict(record)
+                del obj["__class__"]
+                Place(**obj)
+
+        def with_from_dict():
+            for record in records:
+                Place.from_dict(record)
+
+        print("construct __init__ {:.3f}s  from_dict {:.3f}s".format(
+            timed(with_init), timed(with_from_dict)))
+
+
+def bench_memory(count):
+    """
+    Compares the memory taken by places built as BaseModel instances with
+    the memory taken by their compact versions.
+
+    Args:
+        count (int): The number of places.
+    """
+    with scratch():
+        populate(count)
+        records = [obj.to_dict() for obj in storage.all().values()]
+    sizes = []
+    for cls in (Place, compact(Place)):
+        tracemalloc.start()
+        objs = [cls.from_dict(record) for record in records]
+        sizes.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del objs
+    print("memory    BaseModel {:.1f} MB  compact {:.1f} MB  ({:.0f}%)".format(
+        sizes[0] / 2 ** 20, sizes[1] / 2 ** 20, 100 * sizes[1] / sizes[0]))
+
+
+BENCHMARKS = [bench_dispatch, bench_reload, bench_reload_memory, bench_save,
+              bench_sync, bench_write_behind, bench_snapshot,
+              bench_timestamps, bench_construction, bench_memory]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{} objects".format(count))
+    for benchmark in BENCHMARKS:
+        benchmark(count)
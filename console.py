@@ -2,11 +2,12 @@
 """ This module defines a command interpreter class for the Airbnb clone
     project.
 """
+import ast
 import cmd
 import shlex
 import re
 import models
-from models.base_model import BaseModel
+from models.base_model import BaseModel, registry
 from models.user import User
 from models.state import State
 from models.city import City
@@ -36,6 +37,39 @@ def parse(line):
         return cleaned_tokens
 
 
+def parse_predicates(text):
+    """Parses a comma-separated list of attribute predicates, such as
+       'price_by_night < 100, city_id in ["c1", "c2"]'.
+
+    Values are read as Python literals, falling back to plain strings.
+
+    Args:
+        text (str): The predicates to be parsed.
+
+    Returns:
+        list: A list of (field, op, value) tuples, or None if the text is
+              not a valid list of predicates.
+    """
+    predicate = re.compile(r"\s*(\w+)\s*(==|!=|<=|>=|<|>|in\b)\s*"
+                           r"(\[[^\]]*\]|\"[^\"]*\"|'[^']*'|[^,\s]+)"
+                           r"\s*(?:,|$)")
+    predicates = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = predicate.match(text, pos)
+        if match is None:
+            return None
+        field, op, value = match.groups()
+        try:
+            value = ast.literal_eval(value)
+        except (SyntaxError, ValueError):
+            pass
+        predicates.append((field, op, value))
+        pos = match.end()
+    return predicates
+
+
 class HBNBCommand(cmd.Cmd):
     """
     HBNBCommand is a command-line interpreter class for the
@@ -43,6 +77,8 @@ class HBNBCommand(cmd.Cmd):
 
     Attributes:
         prompt (str): The prompt displayed for user input.
+        classes (dict): The model classes, by name, from the registry
+                        BaseModel fills in as they are defined.
 
     Methods:
         do_quit(self, arg): Exit the command interpreter.
@@ -58,17 +94,28 @@ class HBNBCommand(cmd.Cmd):
         do_update(self, line): Update an instance based on the class name and
                                id by adding or updating an attribute.
         do_count(self, line): Count the number of words in a given line.
+        do_aggregate(self, line): Print an aggregate of an attribute of the
+                                  instances of a class.
+        do_compact(self, line): Fold the storage journal into a new snapshot
+                                of the JSON file.
+        do_where(self, line): Print the instances of a class satisfying
+                              attribute predicates.
+        do_explain(self, line): Print how storage finds the instances
+                                satisfying attribute predicates.
+        do_index(self, line): Index an attribute of a class.
+        do_order(self, line): Print the instances of a class ordered by a
+                              numeric attribute.
+        do_within(self, line): Print the instances of a class located in a
+                               bounding box.
+        do_nearby(self, line): Print the instances of a class located within
+                               a distance of a point.
+        do_nearest(self, line): Print the instances of a class located
+                                nearest to a point.
+        do_search(self, line): Print the instances of a class matching a
+                               full-text query, best first.
     """
     prompt = "(hbnb) "
-    classes = [
-        'BaseModel',
-        'User',
-        'Place',
-        'State',
-        'City',
-        'Amenity',
-        'Review'
-        ]
+    classes = registry
 
     def default(self, line):
         """
@@ -87,7 +134,15 @@ class HBNBCommand(cmd.Cmd):
             "show": self.do_show,
             "destroy": self.do_destroy,
             "count": self.do_count,
-            "update": self.do_update
+            "update": self.do_update,
+            "where": self.do_where,
+            "explain": self.do_explain,
+            "order": self.do_order,
+            "within": self.do_within,
+            "nearby": self.do_nearby,
+            "nearest": self.do_nearest,
+            "search": self.do_search,
+            "aggregate": self.do_aggregate
         }
         match = re.search(r"\.", line)
         if match is not None:
@@ -103,11 +158,13 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit(self, line):
         """Quit command to exit the program."""
+        models.storage.close()
         return True
 
     def do_EOF(self, line):
         """EOF signal to exit the program."""
         print()
+        models.storage.close()
         return True
 
     def emptyline(self):
@@ -135,7 +192,7 @@ class HBNBCommand(cmd.Cmd):
         elif args[0] not in self.classes:
             print("** class doesn't exist **")
         else:
-            obj = eval("{}()".format(args[0]))
+            obj = self.classes[args[0]]()
             print(obj.id)
             models.storage.save()
 
@@ -157,13 +214,11 @@ class HBNBCommand(cmd.Cmd):
         elif len(args) == 1:
             print("** instance id missing **")
         else:
-            objs_dict = models.storage.all()
-            key = '{}.{}'.format(args[0], args[1])
-            try:
-                obj = objs_dict[key]
-                print(obj)
-            except KeyError:
+            obj = models.storage.get(args[0], args[1])
+            if obj is None:
                 print("** no instance found **")
+            else:
+                print(obj)
 
     def do_destroy(self, line):
         """
@@ -182,15 +237,12 @@ class HBNBCommand(cmd.Cmd):
         elif len(args) == 1:
             print("** instance id missing **")
         else:
-            objs_dict = models.storage.all()
-            key = '{}.{}'.format(args[0], args[1])
-            try:
-                obj = objs_dict[key]
-                objs_dict.pop(key)
-                del obj
-                models.storage.save()
-            except KeyError:
+            obj = models.storage.get(args[0], args[1])
+            if obj is None:
                 print("** no instance found **")
+            else:
+                models.storage.delete(obj)
+                models.storage.save()
 
     def do_all(self, line):
         """
@@ -203,21 +255,13 @@ class HBNBCommand(cmd.Cmd):
 
         Usage: all or all <class name> or <class name>.all()
         """
-        objs_dict = models.storage.all()
         args = parse(line)
-        obj_list = []
-        if len(args) > 0:
-            if args[0] not in self.classes:
-                print("** class doesn't exist **")
-            else:
-                for key, obj in objs_dict.items():
-                    if key.startswith(args[0]):
-                        obj_list.append(obj.__str__())
-                print(obj_list)
+        if len(args) > 0 and args[0] not in self.classes:
+            print("** class doesn't exist **")
         else:
-            for obj in objs_dict.values():
-                obj_list.append(obj.__str__())
-            print(obj_list)
+            cls = args[0] if len(args) > 0 else None
+            objs_dict = models.storage.all(cls)
+            print([obj.__str__() for obj in objs_dict.values()])
 
     def do_update(self, line):
         """
@@ -233,7 +277,6 @@ class HBNBCommand(cmd.Cmd):
                or
                <class name>.update(<id>, <dictionary>)
         """
-        objs_dict = models.storage.all()
         args = parse(line)
         if len(args) == 0:
             print("** class name missing **")
@@ -242,51 +285,389 @@ class HBNBCommand(cmd.Cmd):
         elif len(args) == 1:
             print("** instance id missing **")
         else:
-            key = '{}.{}'.format(args[0], args[1])
-            try:
-                obj = objs_dict[key]
-                if len(args) == 2:
-                    print("** attribute name missing **")
-                elif len(args) == 3:
-                    try:
-                        result = eval(args[2])
-                        if isinstance(result, dict):
-                            for k, v in result.items():
-                                if k in obj.__dict__.keys():
-                                    setattr(obj, k, v)
-                                else:
-                                    obj.__dict__[k] = v
-                            obj.save()
-                        else:
-                            print("** value missing **")
-                    except (SyntaxError, NameError):
-                        print("** value missing **")
-                else:
-                    try:
-                        eval(args[3])
-                    except (SyntaxError, NameError):
-                        args[3] = "'{}'".format(args[3])
-                    setattr(obj, args[2], eval(args[3]))
-                    obj.save()
-            except KeyError:
+            obj = models.storage.get(args[0], args[1])
+            if obj is None:
                 print("** no instance found **")
+            elif len(args) == 2:
+                print("** attribute name missing **")
+            elif len(args) == 3:
+                try:
+                    result = eval(args[2])
+                    if isinstance(result, dict):
+                        for k, v in result.items():
+                            setattr(obj, k, v)
+                        obj.save()
+                    else:
+                        print("** value missing **")
+                except (SyntaxError, NameError):
+                    print("** value missing **")
+            else:
+                try:
+                    eval(args[3])
+                except (SyntaxError, NameError):
+                    args[3] = "'{}'".format(args[3])
+                setattr(obj, args[2], eval(args[3]))
+                obj.save()
 
     def do_count(self, line):
         """
-        Retrieves the number of instances of a given class.
+        Retrieves the number of instances of a given class, or of those
+        whose attribute has a given value.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: <class name>.count() or
+               <class name>.count(<attribute name>, <value>)
+               e.g. Place.count(city_id, "c1")
+        """
+        args = parse(line)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) == 1:
+            print(models.storage.count(args[0]))
+        elif len(args) == 2:
+            print("** value missing **")
+        else:
+            try:
+                value = ast.literal_eval(args[2])
+            except (SyntaxError, ValueError):
+                value = args[2]
+            print(models.storage.count(args[0], **{args[1]: value}))
+
+    def do_aggregate(self, line):
+        """
+        Prints an aggregate of a numeric attribute over the instances of a
+        class: count, sum, avg, min, max, median or a percentile such as
+        p90, for all of them or for each value of another attribute.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: aggregate <class name> <aggregate> [<attribute name>]
+               [group_by=<attribute name>] or
+               <class name>.aggregate(<aggregate>, [<attribute name>],
+               [group_by=<attribute name>])
+               e.g. Place.aggregate(avg, price_by_night, group_by=city_id)
+        """
+        args = parse(line)
+        group_by = None
+        for arg in args[2:]:
+            if arg.startswith("group_by="):
+                group_by = arg[len("group_by="):]
+        args = [arg for arg in args if not arg.startswith("group_by=")]
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) == 1:
+            print("** aggregate missing **")
+        elif len(args) == 2 and args[1] != "count":
+            print("** attribute name missing **")
+        else:
+            field = args[2] if len(args) > 2 else None
+            try:
+                print(models.storage.aggregate(args[0], args[1], field,
+                                               group_by))
+            except ValueError:
+                print("** unknown aggregate **")
+
+    def do_where(self, line):
+        """
+        Prints the string representation of the instances of a class
+        whose attributes satisfy every given predicate. Predicates compare
+        an attribute with ==, !=, <, <=, >, >= or in.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: where <class name> <predicate>, ... or
+               <class name>.where(<predicate>, ...)
+               e.g. Place.where(price_by_night < 100, max_guest >= 4)
+        """
+        args = line.split(maxsplit=1)
+        predicates = parse_predicates(args[1] if len(args) > 1 else "")
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif predicates is None:
+            print("** invalid predicate **")
+        else:
+            try:
+                objs_dict = models.storage.query(args[0], *predicates)
+                print([obj.__str__() for obj in objs_dict.values()])
+            except ValueError:
+                print("** invalid predicate **")
+
+    def do_explain(self, line):
+        """
+        Prints the plan storage chooses to find the instances of a class
+        satisfying the given predicates: an index lookup or a scan.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: explain <class name> <predicate>, ... or
+               <class name>.explain(<predicate>, ...)
+        """
+        args = line.split(maxsplit=1)
+        predicates = parse_predicates(args[1] if len(args) > 1 else "")
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif predicates is None:
+            print("** invalid predicate **")
+        else:
+            try:
+                print(models.storage.explain(args[0], *predicates))
+            except ValueError:
+                print("** invalid predicate **")
+
+    def do_index(self, line):
+        """
+        Indexes an attribute of a class, so that where, explain and order
+        can use the index instead of scanning every instance. A hash index
+        serves == and in; a sorted index serves numeric ranges and order.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: index <class name> <attribute name> [hash|sorted]
+        """
+        args = parse(line)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) == 1:
+            print("** attribute name missing **")
+        else:
+            try:
+                models.storage.create_index(*args[:3])
+            except ValueError:
+                print("** index kind doesn't exist **")
+
+    def do_order(self, line):
+        """
+        Prints the string representation of the instances of a class
+        ordered by a numeric attribute, smallest first, or largest first
+        when the attribute name is prefixed with '-'. Instances whose
+        attribute is not a number are left out.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: order <class name> [-]<attribute name> [<limit>] or
+               <class name>.order([-]<attribute name>, [<limit>])
+               e.g. Place.order(price_by_night, 20)
+        """
+        args = parse(line)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) == 1:
+            print("** attribute name missing **")
+        elif len(args) > 2 and not args[2].isdigit():
+            print("** limit must be a number **")
+        else:
+            field = args[1].lstrip("-")
+            reverse = args[1].startswith("-")
+            limit = int(args[2]) if len(args) > 2 else None
+            objs = models.storage.order_by(args[0], field, limit, reverse)
+            print([obj.__str__() for obj in objs])
+
+    def do_within(self, line):
+        """
+        Prints the string representation of the instances of a class
+        located inside a bounding box, given as its southern latitude,
+        western longitude, northern latitude and eastern longitude.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: within <class name> <south> <west> <north> <east> or
+               <class name>.within(<south>, <west>, <north>, <east>)
+               e.g. Place.within(37.7, -122.5, 37.8, -122.3)
+        """
+        args = parse(line)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) < 5:
+            print("** coordinates missing **")
+        else:
+            try:
+                south, west, north, east = [float(arg) for arg in args[1:5]]
+            except ValueError:
+                print("** coordinates must be numbers **")
+                return
+            try:
+                objs = models.storage.within_box(args[0], south, west,
+                                                 north, east)
+            except ValueError:
+                print("** class has no spatial index **")
+                return
+            print([obj.__str__() for obj in objs.values()])
+
+    def do_nearby(self, line):
+        """
+        Prints the string representation of the instances of a class
+        located within a distance, in kilometers, of a point, nearest
+        first.
 
         Args:
             line (str): The input line provided by the user.
 
-        Usage: <class name>.count()
+        Usage: nearby <class name> <latitude> <longitude> <km> or
+               <class name>.nearby(<latitude>, <longitude>, <km>)
+               e.g. Place.nearby(37.77, -122.42, 5)
         """
-        objs_dict = models.storage.all()
         args = parse(line)
-        count = 0
-        for obj in objs_dict.values():
-            if args[0] == obj.__class__.__name__:
-                count += 1
-        print(count)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) < 3:
+            print("** coordinates missing **")
+        elif len(args) < 4:
+            print("** distance missing **")
+        else:
+            try:
+                lat, lon, km = [float(arg) for arg in args[1:4]]
+            except ValueError:
+                print("** coordinates must be numbers **")
+                return
+            try:
+                objs = models.storage.within_radius(args[0], lat, lon, km)
+            except ValueError:
+                print("** class has no spatial index **")
+                return
+            print([obj.__str__() for obj in objs.values()])
+
+    def do_nearest(self, line):
+        """
+        Prints the string representation of the instances of a class
+        located nearest to a point, nearest first. One instance is printed
+        unless a limit is given.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: nearest <class name> <latitude> <longitude> [<limit>] or
+               <class name>.nearest(<latitude>, <longitude>, [<limit>])
+               e.g. Place.nearest(37.77, -122.42, 3)
+        """
+        args = parse(line)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) < 3:
+            print("** coordinates missing **")
+        elif len(args) > 3 and not args[3].isdigit():
+            print("** limit must be a number **")
+        else:
+            try:
+                lat, lon = [float(arg) for arg in args[1:3]]
+            except ValueError:
+                print("** coordinates must be numbers **")
+                return
+            limit = int(args[3]) if len(args) > 3 else 1
+            try:
+                objs = models.storage.nearest(args[0], lat, lon, limit)
+            except ValueError:
+                print("** class has no spatial index **")
+                return
+            print([obj.__str__() for obj in objs.values()])
+
+    def do_search(self, line):
+        """
+        Prints the string representation of the instances of a class whose
+        text matches any word of a query, best match first. A word ending
+        with '*' matches every word it is a prefix of.
+
+        Args:
+            line (str): The input line provided by the user.
+
+        Usage: search <class name> <words> or
+               <class name>.search("<words>")
+               e.g. Place.search("cozy beach*")
+        """
+        args = parse(line)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] not in self.classes:
+            print("** class doesn't exist **")
+        elif len(args) == 1:
+            print("** query missing **")
+        else:
+            try:
+                objs = models.storage.search(args[0], " ".join(args[1:]))
+            except ValueError:
+                print("** class has no text index **")
+                return
+            print([obj.__str__() for obj in objs.values()])
+
+    def do_compact(self, line):
+        """
+        Folds the changes journaled since the last snapshot into a new
+        snapshot of the JSON file, and waits for it to be written.
+
+        Args:
+            line (str): The input line provided by the user (not used).
+
+        Usage: compact
+        """
+        models.storage.compact(wait=True)
+
+    def do_begin(self, line):
+        """
+        Opens a batch: the changes made by the next commands are only saved
+        by commit, or undone by rollback.
+
+        Args:
+            line (str): The input line provided by the user (not used).
+
+        Usage: begin
+        """
+        if models.storage.in_batch():
+            print("** batch already open **")
+            return
+        models.storage.begin()
+
+    def do_commit(self, line):
+        """
+        Saves the changes made since begin, all at once.
+
+        Args:
+            line (str): The input line provided by the user (not used).
+
+        Usage: commit
+        """
+        if not models.storage.in_batch():
+            print("** no batch open **")
+            return
+        models.storage.commit()
+
+    def do_rollback(self, line):
+        """
+        Undoes the changes made since begin.
+
+        Args:
+            line (str): The input line provided by the user (not used).
+
+        Usage: rollback
+        """
+        if not models.storage.in_batch():
+            print("** no batch open **")
+            return
+        models.storage.rollback()
 
 
 if __name__ == "__main__":
@@ -2,11 +2,47 @@
 """
 __init__ magic method for the models directory.
 
-This module initializes the FileStorage instance for the models directory and
+This module initializes the storage engine for the models directory and
 performs an initial reload of stored data.
+
+Extra indexes are declared through HBNB_STORAGE_INDEXES, a comma-separated
+list of <class name>.<attribute>[:<kind>] entries, for example
+"Place.price_by_night:sorted,Place.max_guest:sorted". The kind defaults to
+hash.
+
+Setting HBNB_COMPACT_MODELS=1 makes storage and the console use the compact,
+slots-based versions of the model classes.
+
+The engine is FileStorage unless HBNB_TYPE_STORAGE names another engine
+registered in models.engine.backends: "column" selects ColumnStorage, which
+keeps the numeric and reference attributes of every class in column tables
+for fast filters and aggregates; "db" selects DBStorage, which saves objects
+to the SQLite database at HBNB_DB_PATH (file.db by default) instead of the
+JSON file.
+
+Setting HBNB_STORAGE_FORMAT=binary makes FileStorage save a binary snapshot,
+file.bin, which reload() maps into memory and decodes one object at a time
+as it is used; storage.export() still writes the JSON file.
+
+Setting HBNB_STORAGE_WRITE_BEHIND=1 makes storage.save() defer saving until
+enough changes accumulate or a flush interval elapses, so that bulk imports
+write the file once per batch rather than once per object. The deferred
+changes are saved by storage.close(), which the console calls on quit and
+EOF and which also runs at interpreter exit.
 """
-from models.engine.file_storage import FileStorage
+import atexit
+import os
+from models.engine.backends import create_storage
+from models.compact_model import use_compact_models
 
 
-storage = FileStorage()
+if os.getenv("HBNB_COMPACT_MODELS") == "1":
+    use_compact_models()
+storage = create_storage(os.getenv("HBNB_TYPE_STORAGE") or "file")
+atexit.register(storage.close)
 storage.reload()
+for entry in os.getenv("HBNB_STORAGE_INDEXES", "").split(","):
+    if entry.strip():
+        target, _, kind = entry.strip().partition(":")
+        class_name, _, field = target.partition(".")
+        storage.create_index(class_name, field, kind or "hash")
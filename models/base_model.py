@@ -1,13 +1,92 @@
 #!/usr/bin/python3
 """This module provides a class that defines all common attributes/methods
-   for other classes.
+   for other classes, its metaclass, and the registry of model classes by
+   name.
 """
 from uuid import uuid4
 from datetime import datetime
 import models
+from models.engine.codec import decode_timestamp, encode_timestamp
+from models.tracked import TRACKED_TYPES, track
 
+registry = {}  # Model classes by name, filled in as they are defined
 
-class BaseModel:
+
+class ModelMeta(type):
+    """
+    The metaclass of the model classes, through which another version of a
+    model class registered under its name, such as its compact version,
+    stands in for it: calling the model class builds an instance of that
+    version, and its instances are instances of the model class.
+
+    Methods:
+        stand_in(cls): Returns the version registered in place of the
+                       class, if any.
+        __call__(): Builds an instance of the class, or of its stand-in.
+        __instancecheck__(): Tells whether an object is an instance of the
+                             class or of one of its stand-ins.
+        __subclasscheck__(): Tells whether a class is a subclass of the
+                             class or a stand-in for one.
+    """
+    def stand_in(cls):
+        """
+        Returns the version of the class registered in its place, a class
+        whose _model attribute is the class.
+
+        Returns:
+            type: The stand-in, or None if the class is registered itself.
+        """
+        model = registry.get(cls.__name__)
+        if model is not cls and getattr(model, "_model", None) is cls:
+            return model
+        return None
+
+    def __call__(cls, *args, **kwargs):
+        """
+        Builds an instance of the class, or of its stand-in if it has one.
+
+        Args:
+            *args(tuple): The positional arguments of the constructor.
+            **kwargs(dict): The keyword arguments of the constructor.
+
+        Returns:
+            The instance.
+        """
+        model = cls.stand_in()
+        if model is not None:
+            return model(*args, **kwargs)
+        return super().__call__(*args, **kwargs)
+
+    def __instancecheck__(cls, obj):
+        """
+        Tells whether an object is an instance of the class or of a
+        stand-in for it or for one of its subclasses.
+
+        Args:
+            obj: The object.
+
+        Returns:
+            bool: True if it is such an instance.
+        """
+        return cls.__subclasscheck__(type(obj))
+
+    def __subclasscheck__(cls, sub):
+        """
+        Tells whether a class is a subclass of the class or a stand-in for
+        one.
+
+        Args:
+            sub (type): The class.
+
+        Returns:
+            bool: True if it is such a class.
+        """
+        model = getattr(sub, "_model", None)
+        return (type.__subclasscheck__(cls, sub) or
+                isinstance(model, type) and type.__subclasscheck__(cls, model))
+
+
+class BaseModel(metaclass=ModelMeta):
     """
     A parent class for common attributes and methods used by other classes.
 
@@ -20,6 +99,10 @@ class BaseModel:
     Methods:
         __init__(): Initializes a new instance with a unique ID and current
                     timestamps.
+        __init_subclass__(): Registers a new model class in the registry.
+        from_dict(): Builds an instance from its dictionary representation.
+        __setattr__(): Sets an attribute and flags the instance as changed
+                       in storage.
         save(): Updates the `updated_at` timestamp to the current date and
                 time.
         to_dict(): Converts the object's attributes to a dictionary for
@@ -47,13 +130,68 @@ class BaseModel:
             for key, value in kwargs.items():
                 if key != "__class__":
                     if key == "created_at" or key == "updated_at":
-                        value = datetime.strptime(
-                            value, "%Y-%m-%dT%H:%M:%S.%f")
+                        value = decode_timestamp(value)
                         setattr(self, key, value)
                     else:
                         setattr(self, key, value)
         models.storage.new(self)
 
+    @classmethod
+    def from_dict(cls, obj_dict):
+        """
+        Builds an instance from its dictionary representation, as returned
+        by to_dict(), without generating an id or reading the clock and
+        without adding the instance to storage. The instance is built by
+        the stand-in of the class, if it has one.
+
+        Args:
+            obj_dict (dict): The dictionary representation of the instance.
+
+        Returns:
+            BaseModel: The instance.
+        """
+        model = cls.stand_in()
+        if model is not None:
+            return model.from_dict(obj_dict)
+        instance = cls.__new__(cls)
+        attrs = dict(obj_dict)
+        attrs.pop("__class__", None)
+        for key in ("created_at", "updated_at"):
+            if key in attrs:
+                attrs[key] = decode_timestamp(attrs[key])
+        for key, value in attrs.items():
+            if type(value) in TRACKED_TYPES:
+                attrs[key] = track(instance, key, value)
+        instance.__dict__.update(attrs)
+        return instance
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Registers a new model class in the registry under its name, so that
+        storage and the console can look it up instead of evaluating its
+        name.
+
+        Args:
+            **kwargs(dict): Keyword arguments for the parent class.
+        """
+        super().__init_subclass__(**kwargs)
+        registry[cls.__name__] = cls
+
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and flags the instance as changed in storage, so
+        that only changed instances are serialized again on the next save.
+        A list, dict or set value is kept as a tracked copy, which flags the
+        instance as changed whenever it is changed in place.
+
+        Args:
+            name (str): The name of the attribute.
+            value: The new value of the attribute.
+        """
+        key = "{}.{}".format(self.__class__.__name__, self.__dict__.get("id"))
+        super().__setattr__(name, track(self, name, value))
+        models.storage.touch(key, self, name)
+
     def __str__(self):
         """
         Returns a string representation of the object.
@@ -74,16 +212,26 @@ class BaseModel:
         self.updated_at = datetime.now()
         models.storage.save()
 
-    def to_dict(self):
+    def to_dict(self, *, timestamps="iso"):
         """
         Converts the object's attributes to a dictionary for serialization.
 
+        Args:
+            timestamps (str): The encoding of the timestamps: "iso" for ISO
+                              8601 strings, "epoch" for integer
+                              microseconds since 1970-01-01.
+
         Returns:
             dict: A dictionary containing the object's attributes and values,
                   suitable for serialization.
         """
         obj_dict = dict(self.__dict__)
         obj_dict['__class__'] = self.__class__.__name__
-        obj_dict['created_at'] = obj_dict['created_at'].isoformat()
-        obj_dict['updated_at'] = obj_dict['updated_at'].isoformat()
+        obj_dict['created_at'] = encode_timestamp(obj_dict['created_at'],
+                                                  timestamps)
+        obj_dict['updated_at'] = encode_timestamp(obj_dict['updated_at'],
+                                                  timestamps)
         return obj_dict
+
+
+registry["BaseModel"] = BaseModel
@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+"""This module provides compact versions of the model classes, whose
+   instances keep their attributes in slots instead of a per-instance
+   dictionary, and the switch that puts them in place of the model classes.
+"""
+import models
+from models.base_model import BaseModel, registry
+from models.engine.codec import decode_timestamp, encode_timestamp
+from models.tracked import TRACKED_TYPES, track
+
+
+class CompactModel:
+    """
+    A parent class for the compact versions of the model classes.
+
+    The attributes a model class declares, such as the name of a place,
+    are kept in slots; any other attribute is kept in a dictionary that is
+    only created when the first such attribute is set. Attributes that were
+    never set read as the default the model class declares; mutable
+    defaults are copied into the instance on first read, so instances no
+    longer share them.
+
+    A compact class is not a subclass of its model class, whose instances
+    have a dictionary, but stands in for it once registered in its place:
+    see ModelMeta.
+
+    Attributes:
+        id (str): A unique identifier generated using the UUID version 4.
+        created_at (datetime): The date and time when an instance is created.
+        updated_at (datetime): The date and time when an instance is last
+                               updated.
+
+    Methods:
+        __init__(): Initializes a new instance with a unique ID and current
+                    timestamps.
+        from_dict(): Builds an instance from its dictionary representation.
+        __getattr__(): Returns the default of a declared attribute, or an
+                       extra attribute.
+        __setattr__(): Sets an attribute and flags the instance as changed
+                       in storage.
+        save(): Updates the `updated_at` timestamp to the current date and
+                time.
+        to_dict(): Converts the object's attributes to a dictionary for
+                   serialization.
+        __str__(): Returns a string representation of the object.
+    """
+    __slots__ = ("id", "created_at", "updated_at", "_extra")
+    _model = None  # The model class the class is the compact version of
+    _defaults = {}  # Default of each declared attribute
+    _fields = ("id", "created_at", "updated_at")  # Attributes in slots
+
+    __init__ = BaseModel.__init__
+    save = BaseModel.save
+
+    @classmethod
+    def from_dict(cls, obj_dict):
+        """
+        Builds an instance from its dictionary representation, as returned
+        by to_dict(), without generating an id or reading the clock and
+        without adding the instance to storage.
+
+        Args:
+            obj_dict (dict): The dictionary representation of the instance.
+
+        Returns:
+            CompactModel: The instance.
+        """
+        instance = cls.__new__(cls)
+        fields = cls._fields
+        for key, value in obj_dict.items():
+            if key == "created_at" or key == "updated_at":
+                value = decode_timestamp(value)
+            elif type(value) in TRACKED_TYPES:
+                value = track(instance, key, value)
+            if key in fields:
+                object.__setattr__(instance, key, value)
+            elif key != "__class__":
+                instance.__extra()[key] = value
+        return instance
+
+    def __getattr__(self, name):
+        """
+        Returns the default of a declared attribute that was never set, or
+        an extra attribute.
+
+        Args:
+            name (str): The name of the attribute.
+
+        Returns:
+            The value of the attribute.
+
+        Raises:
+            AttributeError: If the instance has no such attribute.
+        """
+        if name == "_extra":
+            return None
+        defaults = type(self)._defaults
+        if name in defaults:
+            value = defaults[name]
+            if type(value) in TRACKED_TYPES:
+                # Reading the default changes nothing, so storage is not told;
+                # changing the tracked copy in place tells it
+                value = track(self, name, value)
+                object.__setattr__(self, name, value)
+            return value
+        extra = self._extra
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            type(self).__name__, name))
+
+    def __setattr__(self, name, value):
+        """
+        Sets an attribute and flags the instance as changed in storage, so
+        that only changed instances are serialized again on the next save.
+        A list, dict or set value is kept as a tracked copy, as by
+        BaseModel.
+
+        Args:
+            name (str): The name of the attribute.
+            value: The new value of the attribute.
+        """
+        key = "{}.{}".format(type(self).__name__, getattr(self, "id", None))
+        value = track(self, name, value)
+        if name in type(self)._fields:
+            object.__setattr__(self, name, value)
+        else:
+            self.__extra()[name] = value
+        models.storage.touch(key, self, name)
+
+    def __str__(self):
+        """
+        Returns a string representation of the object.
+
+        Returns:
+            str: A string containing the class name, unique ID, and attribute
+                 dictionary.
+        """
+        class_name = self.__class__.__name__
+        return f"[{class_name}] ({self.id}) {self.__attributes()}"
+
+    def to_dict(self, *, timestamps="iso"):
+        """
+        Converts the object's attributes to a dictionary for serialization.
+
+        Args:
+            timestamps (str): The encoding of the timestamps: "iso" for ISO
+                              8601 strings, "epoch" for integer
+                              microseconds since 1970-01-01.
+
+        Returns:
+            dict: A dictionary containing the object's attributes and values,
+                  suitable for serialization.
+        """
+        obj_dict = self.__attributes()
+        obj_dict['__class__'] = self.__class__.__name__
+        obj_dict['created_at'] = encode_timestamp(obj_dict['created_at'],
+                                                  timestamps)
+        obj_dict['updated_at'] = encode_timestamp(obj_dict['updated_at'],
+                                                  timestamps)
+        return obj_dict
+
+    def __attributes(self):
+        """
+        Returns the attributes set on the instance, declared ones first.
+
+        Returns:
+            dict: The attributes, by name.
+        """
+        attrs = {}
+        for name in type(self)._fields:
+            try:
+                attrs[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        if self._extra is not None:
+            attrs.update(self._extra)
+        return attrs
+
+    def __extra(self):
+        """
+        Returns the dictionary of the extra attributes, creating it if
+        needed.
+
+        Returns:
+            dict: The extra attributes, by name.
+        """
+        extra = self._extra
+        if extra is None:
+            extra = {}
+            object.__setattr__(self, "_extra", extra)
+        return extra
+
+
+def compact(cls):
+    """
+    Builds the compact version of a model class, with a slot for each
+    attribute the class declares.
+
+    Args:
+        cls (type): The model class, a subclass of BaseModel.
+
+    Returns:
+        type: The compact class, a subclass of CompactModel with the same
+              name.
+    """
+    defaults = {}
+    for klass in reversed(cls.__mro__):
+        if issubclass(klass, BaseModel) and klass is not BaseModel:
+            for name, value in vars(klass).items():
+                if not name.startswith("_") and not callable(value):
+                    defaults[name] = value
+    namespace = {
+        "__slots__": tuple(defaults),
+        "__doc__": cls.__doc__,
+        "__module__": cls.__module__,
+        "_model": cls,
+        "_defaults": defaults,
+        "_fields": CompactModel._fields + tuple(defaults),
+    }
+    return type(cls.__name__, (CompactModel,), namespace)
+
+
+def use_compact_models():
+    """
+    Replaces every model class in the registry with its compact version,
+    so that storage builds compact instances when it reads records and the
+    console creates compact instances. The compact versions then stand in
+    for the model classes: Place() builds a compact place, which is an
+    instance of Place.
+    """
+    for name, cls in list(registry.items()):
+        if not issubclass(cls, CompactModel):
+            registry[name] = compact(cls)
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""This module defines the aggregates understood by FileStorage.aggregate(),
+   and the running values that compute them in a single pass over the
+   objects.
+
+   An aggregate is one of count, sum, avg, min, max, median or a percentile
+   p<q> such as p90 or p99.9.
+"""
+import math
+import re
+from models.engine.indexes import is_number
+
+AGGREGATES = ("count", "sum", "avg", "min", "max", "median")
+PERCENTILE = re.compile(r"p(\d+(?:\.\d+)?)$")
+
+
+def percentile_of(op):
+    """
+    Returns the percentile an aggregate computes.
+
+    Args:
+        op (str): The aggregate.
+
+    Returns:
+        float: The percentile, from 0 to 100, or None if op is not a
+               percentile.
+    """
+    if op == "median":
+        return 50.0
+    match = PERCENTILE.match(op)
+    if match is None or float(match.group(1)) > 100:
+        return None
+    return float(match.group(1))
+
+
+def check_aggregate(op, field):
+    """
+    Validates an aggregate.
+
+    Args:
+        op (str): The aggregate.
+        field (str): The attribute aggregated, or None to count objects.
+
+    Raises:
+        ValueError: If op is not a known aggregate, or is not count and
+                    has no attribute.
+    """
+    if op not in AGGREGATES and percentile_of(op) is None:
+        raise ValueError("unknown aggregate: {!r}".format(op))
+    if op != "count" and field is None:
+        raise ValueError("{} needs an attribute".format(op))
+
+
+def percentile(values, q):
+    """
+    Returns a percentile of a sorted list of numbers, interpolating
+    linearly between the two nearest values.
+
+    Args:
+        values (list): The numbers, in ascending order.
+        q (float): The percentile, from 0 to 100.
+
+    Returns:
+        The percentile, or None if there are no numbers.
+    """
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    low = math.floor(position)
+    high = math.ceil(position)
+    if low == high:
+        return values[low]
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class Aggregate:
+    """
+    Running value of an aggregate over a stream of values. Values that are
+    not numbers are left out, except when counting objects.
+
+    Attributes:
+        op (str): The aggregate.
+        count (int): The number of values aggregated.
+        total: The sum of the values.
+        low: The smallest value, or None.
+        high: The largest value, or None.
+
+    Methods:
+        add(self, value): Adds a value to the aggregate.
+        result(self): Returns the value of the aggregate.
+    """
+    def __init__(self, op, numbers=True):
+        """
+        Initializes the aggregate of no values.
+
+        Args:
+            op (str): The aggregate.
+            numbers (bool): Whether only numbers are aggregated; count
+                            counts every value when False.
+        """
+        self.op = op
+        self.count = 0
+        self.total = 0
+        self.low = None
+        self.high = None
+        self.__numbers = numbers
+        self.__percentile = percentile_of(op)
+        self.__values = [] if self.__percentile is not None else None
+
+    def add(self, value):
+        """
+        Adds a value to the aggregate.
+
+        Args:
+            value: The value.
+        """
+        if not self.__numbers:
+            self.count += 1
+            return
+        if not is_number(value):
+            return
+        self.count += 1
+        self.total += value
+        if self.low is None or value < self.low:
+            self.low = value
+        if self.high is None or value > self.high:
+            self.high = value
+        if self.__values is not None:
+            self.__values.append(value)
+
+    def result(self):
+        """
+        Returns the value of the aggregate. Aggregates other than count and
+        sum are None over no values.
+
+        Returns:
+            The value of the aggregate.
+        """
+        if self.__percentile is not None:
+            self.__values.sort()
+            return percentile(self.__values, self.__percentile)
+        if self.op == "count":
+            return self.count
+        if self.op == "sum":
+            return self.total
+        if self.op == "avg":
+            return self.total / self.count if self.count else None
+        return self.low if self.op == "min" else self.high
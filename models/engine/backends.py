@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""This module keeps the storage engines that can be selected by name, as
+   models/__init__.py does with HBNB_TYPE_STORAGE, and that the shared
+   conformance tests and benchmarks run against.
+"""
+from models.engine.base_storage import BaseStorage
+from models.engine.column_storage import ColumnStorage
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+
+# Storage engine classes, by name
+BACKENDS = {
+    "file": FileStorage,
+    "column": ColumnStorage,
+    "db": DBStorage,
+}
+
+
+def register_backend(name, cls):
+    """
+    Makes a storage engine selectable by name, and subject to the shared
+    conformance tests and benchmarks.
+
+    Args:
+        name (str): The name of the engine.
+        cls (type): The engine class, a subclass of BaseStorage.
+
+    Raises:
+        TypeError: If cls does not implement BaseStorage.
+    """
+    if not isinstance(cls, type) or not issubclass(cls, BaseStorage):
+        raise TypeError("{!r} is not a storage engine".format(cls))
+    BACKENDS[name] = cls
+
+
+def create_storage(name="file"):
+    """
+    Creates the storage engine registered under a name.
+
+    Args:
+        name (str): The name of the engine.
+
+    Returns:
+        BaseStorage: The engine.
+
+    Raises:
+        ValueError: If no engine is registered under that name.
+    """
+    if name not in BACKENDS:
+        raise ValueError("unknown storage engine: {!r}".format(name))
+    return BACKENDS[name]()
@@ -0,0 +1,436 @@
+#!/usr/bin/python3
+"""This module defines BaseStorage, the interface every storage engine
+   implements, so that models, the console and the shared conformance tests
+   can use any engine.
+"""
+import heapq
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from models.engine.aggregates import Aggregate, check_aggregate
+from models.engine.indexes import is_number
+from models.engine.query import check_predicates
+
+
+class BaseStorage(ABC):
+    """
+    The interface of a storage engine: where objects are kept while the
+    program runs, and how they are saved and reloaded.
+
+    Methods:
+        all(self, cls=None): Returns all objects in storage, or those of
+                             one class.
+        new(self, obj): Adds a new object to storage.
+        save(self): Saves the objects in storage.
+        reload(self): Reads the saved objects into storage.
+        clear(self): Removes every object from storage without saving.
+        delete(self, obj=None): Removes an object from storage.
+        get(self, cls, obj_id): Returns the object of a class with a given
+                                id.
+        count(self, cls=None, **values): Returns the number of objects in
+                                         storage, or of those of one class.
+        query(self, cls, *predicates): Returns the objects of a class
+                                       satisfying attribute predicates.
+        explain(self, cls, *predicates): Describes how query() finds the
+                                         objects.
+        create_index(self, cls, field, kind="hash"): Indexes an attribute
+                                                     of a class.
+        order_by(self, cls, field, limit=None, reverse=False): Returns the
+            objects of a class ordered by a numeric attribute.
+        aggregate(self, cls, op, field=None, group_by=None): Computes an
+            aggregate of a numeric attribute over the objects of a class.
+        search(self, cls, text, limit=None): Returns the objects of a class
+                                             matching a full-text query.
+        within_box(self, cls, south, west, north, east): Returns the
+            objects of a class located inside a bounding box.
+        within_radius(self, cls, lat, lon, km): Returns the objects of a
+            class located within a distance of a point.
+        nearest(self, cls, lat, lon, k=1): Returns the objects of a class
+                                           located nearest to a point.
+        touch(self, key, obj, name=None): Flags a stored object as changed.
+        begin(self): Opens a batch, deferring saves until it is committed.
+        commit(self): Closes the open batch and saves its changes.
+        rollback(self): Closes the open batch and undoes its changes.
+        batch(self): Returns a context manager running its block in a
+                     batch.
+        in_batch(self): Returns whether a batch is open.
+        compact(self, wait=False): Compacts the saved objects.
+        close(self): Releases the resources held by the engine.
+
+    Only the abstract methods must be implemented. The others default to
+    an engine that does not track changes, has no batches and no indexes:
+    touch(), begin(), rollback(), compact() and create_index() do nothing,
+    commit() saves the objects, clear() deletes them one by one and
+    in_batch() is always False; explain(), order_by() and aggregate() scan
+    the objects of the class, and search() and the spatial queries raise
+    ValueError, as for a class without a full-text or spatial index.
+    """
+    @abstractmethod
+    def all(self, cls=None):
+        """
+        Returns all objects in storage, or only those of a given class.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects to
+                               return. All objects are returned when None.
+
+        Returns:
+            dict: The objects, by key.
+        """
+
+    @abstractmethod
+    def new(self, obj):
+        """
+        Adds a new object to storage.
+
+        Args:
+            obj (BaseModel): The object to be added.
+        """
+
+    @abstractmethod
+    def save(self):
+        """
+        Saves the objects in storage, so that reload() reads them back.
+        """
+
+    @abstractmethod
+    def reload(self):
+        """
+        Reads the saved objects into storage.
+        """
+
+    @abstractmethod
+    def delete(self, obj=None):
+        """
+        Removes an object from storage.
+
+        Args:
+            obj (BaseModel): The object to be removed. Nothing happens when
+                             it is None.
+        """
+
+    @abstractmethod
+    def get(self, cls, obj_id):
+        """
+        Returns the object of a class with a given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            obj_id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is no such object.
+        """
+
+    @abstractmethod
+    def count(self, cls=None, **values):
+        """
+        Returns the number of objects in storage, or of those of a given
+        class, optionally only those whose attributes have given values.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects to
+                               count. All objects are counted when None.
+            **values: The values the attributes of the counted objects must
+                      equal, by attribute name.
+
+        Returns:
+            int: The number of objects.
+        """
+
+    @abstractmethod
+    def query(self, cls, *predicates):
+        """
+        Returns the objects of a class satisfying every one of a sequence
+        of attribute predicates, such as ("price_by_night", "<", 100).
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *predicates (tuple): The (field, op, value) predicates, where
+                                 op is one of ==, !=, <, <=, >, >= or in.
+
+        Returns:
+            dict: The matching objects, by key.
+        """
+
+    def clear(self):
+        """
+        Removes every object from storage without saving the change, so
+        that reload() reads back the objects last saved, as a program
+        starting afresh would. By default, deletes the objects one by one.
+        """
+        for obj in list(self.all().values()):
+            self.delete(obj)
+
+    def explain(self, cls, *predicates):
+        """
+        Describes how query() finds the objects for the same arguments. By
+        default, by scanning the objects of the class.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *predicates (tuple): The (field, op, value) predicates.
+
+        Returns:
+            str: The description of the plan.
+
+        Raises:
+            ValueError: If a predicate is malformed.
+        """
+        check_predicates(predicates)
+        return "scan {} ({} objects)".format(getattr(cls, "__name__", cls),
+                                             len(self.all(cls)))
+
+    def create_index(self, cls, field, kind="hash"):
+        """
+        Indexes an attribute of a class so that query() can use the index
+        instead of scanning the objects of the class. Engines without
+        indexes need not override it; their queries keep scanning.
+
+        Args:
+            cls (type or str): The class, or class name, to index.
+            field (str): The name of the attribute to index.
+            kind (str): The kind of index, such as "hash" or "sorted".
+
+        Returns:
+            object: The index, or None if the engine has no indexes.
+        """
+        return None
+
+    def order_by(self, cls, field, limit=None, reverse=False):
+        """
+        Returns the objects of a class ordered by a numeric attribute, such
+        as the 20 cheapest places. Objects whose attribute is not a number
+        are left out. By default, the objects of the class are scanned.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            field (str): The name of the numeric attribute.
+            limit (int): The maximum number of objects, or None for all.
+            reverse (bool): Whether to start from the largest value.
+
+        Returns:
+            list: The objects, in order.
+        """
+        items = [(getattr(obj, field, None), key, obj)
+                 for key, obj in self.all(cls).items()]
+        items = [item for item in items if is_number(item[0])]
+        if limit is None:
+            items.sort(key=lambda item: item[:2], reverse=reverse)
+        elif reverse:
+            items = heapq.nlargest(limit, items, key=lambda item: item[:2])
+        else:
+            items = heapq.nsmallest(limit, items, key=lambda item: item[:2])
+        return [obj for value, key, obj in items]
+
+    def aggregate(self, cls, op, field=None, group_by=None):
+        """
+        Computes an aggregate of a numeric attribute over the objects of a
+        class, for all of them or for each value of another attribute.
+        Objects whose attribute is not a number are left out, as are
+        objects without a hashable value of group_by. By default, the
+        objects of the class are scanned.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            op (str): The aggregate: count, sum, avg, min, max, median or a
+                      percentile p<q>, such as p90.
+            field (str): The numeric attribute, or None to count objects.
+            group_by (str): The attribute to group the objects by, or None.
+
+        Returns:
+            The value of the aggregate or, when grouped, a dictionary of
+            the value of the aggregate by value of group_by, in order of
+            value when the values can be ordered.
+
+        Raises:
+            ValueError: If op is not a known aggregate, or is not count and
+                        has no attribute.
+        """
+        check_aggregate(op, field)
+        groups = {}
+        for obj in self.all(cls).values():
+            group = None
+            if group_by is not None:
+                group = getattr(obj, group_by, None)
+                if group is None:
+                    continue
+            try:
+                running = groups.get(group)
+            except TypeError:
+                continue
+            if running is None:
+                running = groups[group] = Aggregate(op, field is not None)
+            running.add(getattr(obj, field, None) if field else None)
+        if group_by is None:
+            return groups.get(None, Aggregate(op)).result()
+        results = {group: running.result()
+                   for group, running in groups.items() if running.count}
+        try:
+            return dict(sorted(results.items()))
+        except TypeError:
+            return results
+
+    def search(self, cls, text, limit=None):
+        """
+        Returns the objects of a class matching a full-text query, best
+        first. Engines without full-text indexes need not override it.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            text (str): The query, such as "cozy loft*".
+            limit (int): The maximum number of objects, or None for all.
+
+        Returns:
+            dict: The matching objects, by key, best first.
+
+        Raises:
+            ValueError: If the class has no full-text index, which is
+                        always the case by default.
+        """
+        raise ValueError("{} has no text index".format(
+            getattr(cls, "__name__", cls)))
+
+    def within_box(self, cls, south, west, north, east):
+        """
+        Returns the objects of a class located inside a bounding box.
+        Engines without spatial indexes need not override it.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            south (float): The southern latitude, in degrees.
+            west (float): The western longitude, in degrees.
+            north (float): The northern latitude, in degrees.
+            east (float): The eastern longitude, in degrees.
+
+        Returns:
+            dict: The matching objects, by key.
+
+        Raises:
+            ValueError: If the class has no spatial index, which is always
+                        the case by default.
+        """
+        raise ValueError("{} has no spatial index".format(
+            getattr(cls, "__name__", cls)))
+
+    def within_radius(self, cls, lat, lon, km):
+        """
+        Returns the objects of a class located within a great-circle
+        distance of a point, nearest first. Engines without spatial indexes
+        need not override it.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            lat (float): The latitude of the point, in degrees.
+            lon (float): The longitude of the point, in degrees.
+            km (float): The distance, in kilometers.
+
+        Returns:
+            dict: The matching objects, by key, nearest first.
+
+        Raises:
+            ValueError: If the class has no spatial index, which is always
+                        the case by default.
+        """
+        raise ValueError("{} has no spatial index".format(
+            getattr(cls, "__name__", cls)))
+
+    def nearest(self, cls, lat, lon, k=1):
+        """
+        Returns the k objects of a class located nearest to a point,
+        nearest first. Engines without spatial indexes need not override
+        it.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            lat (float): The latitude of the point, in degrees.
+            lon (float): The longitude of the point, in degrees.
+            k (int): The number of objects.
+
+        Returns:
+            dict: The nearest objects, by key, nearest first.
+
+        Raises:
+            ValueError: If the class has no spatial index, which is always
+                        the case by default.
+        """
+        raise ValueError("{} has no spatial index".format(
+            getattr(cls, "__name__", cls)))
+
+    def touch(self, key, obj, name=None):
+        """
+        Flags a stored object as changed, which models call whenever one
+        of their attributes is set. Engines that save every object on each
+        save need not override it.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object that changed.
+            name (str): The name of the attribute that changed, or None if
+                        any attribute may have changed.
+        """
+
+    def begin(self):
+        """
+        Opens a batch: the changes made until it is committed are saved
+        together by commit(), or undone by rollback(). Engines without
+        batches need not override it; their saves then take effect at once.
+        """
+
+    def commit(self):
+        """
+        Closes the open batch and saves the changes made in it. By default,
+        saves the objects in storage.
+        """
+        self.save()
+
+    def rollback(self):
+        """
+        Closes the open batch and undoes the changes made in it. Engines
+        without batches need not override it; the changes already saved
+        are then kept.
+        """
+
+    @contextmanager
+    def batch(self):
+        """
+        Runs the enclosed block in a batch, committed at the end of the
+        block, or rolled back if the block raises an exception:
+
+            with storage.batch():
+                ...
+
+        Yields:
+            BaseStorage: The storage.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def in_batch(self):
+        """
+        Returns whether a batch is open. Always False for engines without
+        batches.
+
+        Returns:
+            bool: True if a batch is open, False otherwise.
+        """
+        return False
+
+    def compact(self, wait=False):
+        """
+        Compacts the saved objects, such as by folding a journal into a new
+        snapshot. Engines with nothing to compact need not override it.
+
+        Args:
+            wait (bool): Whether to wait for the compaction to finish.
+        """
+
+    def close(self):
+        """
+        Releases the resources held by the engine, such as a connection to
+        a database. Engines holding none need not override it.
+        """
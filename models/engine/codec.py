@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""This module defines how the created_at and updated_at timestamps of
+   objects are written to and read from storage.
+
+   Two encodings are supported: "iso", an ISO 8601 string such as
+   "2017-09-28T21:05:54.119427", and "epoch", an integer number of
+   microseconds since 1970-01-01T00:00:00. Both hold naive datetimes
+   exactly. Encoded values tell their encoding by their type, so stores
+   written with either encoding, or with a mix of both, are read alike.
+"""
+from datetime import datetime, timedelta
+
+TIMESTAMP_CODECS = ("iso", "epoch")
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_timestamp(value, codec="iso"):
+    """
+    Encodes a timestamp.
+
+    Args:
+        value (datetime): The timestamp.
+        codec (str): The encoding, "iso" or "epoch".
+
+    Returns:
+        str or int: The encoded timestamp.
+
+    Raises:
+        ValueError: If codec is not a known encoding.
+    """
+    if codec == "iso":
+        return value.isoformat()
+    if codec == "epoch":
+        return (value - EPOCH) // MICROSECOND
+    raise ValueError("unknown timestamp codec: {!r}".format(codec))
+
+
+def decode_timestamp(value):
+    """
+    Decodes a timestamp encoded by encode_timestamp() with any encoding.
+
+    Args:
+        value (str or int): The encoded timestamp. A datetime is returned
+                            as it is.
+
+    Returns:
+        datetime: The timestamp.
+
+    Raises:
+        TypeError: If value is neither a string nor an integer.
+        ValueError: If value is a string that is not an ISO 8601 timestamp.
+    """
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return EPOCH + value * MICROSECOND
+    if isinstance(value, datetime):
+        return value
+    raise TypeError("invalid timestamp: {!r}".format(value))
@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+"""This module defines ColumnStorage, a FileStorage that also keeps the
+   numeric and reference attributes of every class in column tables, so
+   that filters and aggregates over them run as passes over typed columns
+   instead of loops over objects.
+"""
+from models.base_model import registry
+from models.engine.aggregates import check_aggregate
+from models.engine.columns import AGGREGATES as COLUMN_AGGREGATES
+from models.engine.file_storage import FileStorage
+from models.engine.query import check_predicates
+
+
+class ColumnStorage(FileStorage):
+    """
+    A FileStorage that keeps a column table over the objects of every
+    model class, registered under "columns". Objects are stored, saved and
+    reloaded as by FileStorage; the tables are kept up to date as objects
+    are added, changed and deleted.
+
+    Methods:
+        query(self, cls, *predicates): Returns the objects of a class
+                                       satisfying attribute predicates.
+        explain(self, cls, *predicates): Describes how query() would find
+                                         the objects.
+        aggregate(self, cls, op, field=None, group_by=None): Computes an
+            aggregate of an attribute of the objects of a class.
+    """
+    def __init__(self):
+        """
+        Creates the column table of every model class.
+        """
+        for class_name in registry:
+            self.create_index(class_name, "columns", "column")
+
+    def query(self, cls, *predicates):
+        """
+        Returns the objects of a class satisfying every one of a sequence
+        of attribute predicates, such as ("price_by_night", "<", 100).
+
+        When no other index can serve a predicate and the column table of
+        the class can serve some, those are evaluated over the columns and
+        the others checked on the objects left; otherwise the objects are
+        found as by FileStorage.query().
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *predicates (tuple): The (field, op, value) predicates, where
+                                 op is one of ==, !=, <, <=, >, >= or in.
+
+        Returns:
+            dict: The matching objects, by key.
+
+        Raises:
+            ValueError: If a predicate is malformed.
+        """
+        check_predicates(predicates)
+        table = self.__table(cls, predicates)
+        if table is None:
+            return super().query(cls, *predicates)
+        return table.filter(predicates)
+
+    def explain(self, cls, *predicates):
+        """
+        Describes the plan query() would choose for the same arguments.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *predicates (tuple): The (field, op, value) predicates.
+
+        Returns:
+            str: The description of the plan.
+
+        Raises:
+            ValueError: If a predicate is malformed.
+        """
+        check_predicates(predicates)
+        table = self.__table(cls, predicates)
+        if table is None:
+            return super().explain(cls, *predicates)
+        fields = [field for field, op, value in predicates
+                  if table.can_filter((field, op, value))]
+        return "column filter {} on {} ({} objects)".format(
+            table.class_name, ", ".join(fields), self.count(cls))
+
+    def aggregate(self, cls, op, field=None, group_by=None):
+        """
+        Computes an aggregate of a numeric attribute over the objects of a
+        class, as FileStorage.aggregate() does. Counts, sums, averages,
+        minimums and maximums of a numeric column, grouped by a column if
+        at all, are computed over the column table of the class; other
+        aggregates are computed over the objects.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            op (str): The aggregate: count, sum, avg, min, max, median or a
+                      percentile p<q>, such as p90.
+            field (str): The numeric attribute, or None to count objects.
+            group_by (str): The attribute to group the objects by, or None.
+
+        Returns:
+            The value of the aggregate or, when grouped, a dictionary of
+            the value of the aggregate by value of group_by.
+
+        Raises:
+            ValueError: If op is not a known aggregate, or is not count and
+                        has no attribute.
+        """
+        check_aggregate(op, field)
+        table = self.index(cls, "columns")
+        if (table is None or op not in COLUMN_AGGREGATES or
+                not table.can_aggregate(field, group_by)):
+            return super().aggregate(cls, op, field, group_by)
+        return table.aggregate(op, field, group_by)
+
+    def __table(self, cls, predicates):
+        """
+        Returns the column table to serve a query with, if any.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            predicates (tuple): The (field, op, value) predicates.
+
+        Returns:
+            ColumnTable: The column table of the class, or None if another
+                         index can serve a predicate or the table can serve
+                         none.
+        """
+        table = self.index(cls, "columns")
+        if table is None:
+            return None
+        for field, op, value in predicates:
+            index = self.index(cls, field)
+            if index is not None and index.estimate(op, value) is not None:
+                return None
+        if not any(map(table.can_filter, predicates)):
+            return None
+        return table
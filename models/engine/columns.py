@@ -0,0 +1,557 @@
+#!/usr/bin/python3
+"""This module defines the column tables ColumnStorage keeps for each class,
+   holding the numeric and reference attributes of its objects in typed
+   columns so that filters and aggregates run over arrays instead of
+   objects. When NumPy is installed, they run as vectorized passes over the
+   columns.
+"""
+import math
+from array import array
+from models.base_model import registry
+from models.engine.indexes import is_number
+from models.engine.query import matches
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+NUMBER_OPS = ("==", "!=", "<", "<=", ">", ">=", "in")
+STRING_OPS = ("==", "!=", "in")
+
+
+def declared_attributes(cls):
+    """
+    Returns the attributes a model class declares, with their defaults.
+
+    Args:
+        cls (type): The model class, or its compact version, which declares
+                    the same attributes.
+
+    Returns:
+        dict: The default of each declared attribute, by name.
+    """
+    cls = getattr(cls, "_model", None) or cls
+    attrs = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if not name.startswith("_") and not callable(value):
+                attrs[name] = value
+    return attrs
+
+
+class ColumnTable:
+    """
+    Columns of the attributes of the objects of one class: a float column
+    for each numeric attribute the class declares and a dictionary-encoded
+    string column for each reference attribute (those ending in _id), with
+    one row per object.
+
+    A value a column cannot hold exactly, such as a string in a numeric
+    column, is stored as NaN (numbers) or -1 (strings); rows whose values
+    might then be misjudged are checked against their object instead.
+
+    Attributes:
+        kind (str): The kind of index.
+        class_name (str): The name of the class of the indexed objects.
+        field (str): The name the table is registered under.
+        numeric (tuple): The names of the numeric columns.
+        strings (tuple): The names of the string columns.
+        fields (tuple): The names of all columns.
+
+    Methods:
+        add(self, key, obj): Adds an object to the table.
+        update(self, key, obj): Stores the current values of an object.
+        remove(self, key): Removes an object from the table.
+        clear(self): Removes all objects from the table.
+        estimate(self, op, value): Tells that the table does not serve the
+                                   query planner.
+        can_filter(self, predicate): Tells whether the columns can serve a
+                                     predicate.
+        filter(self, predicates): Returns the objects satisfying
+                                  predicates.
+        can_aggregate(self, field, group_by): Tells whether the columns can
+                                              serve an aggregate.
+        aggregate(self, op, field=None, group_by=None): Computes an
+            aggregate of a numeric column.
+    """
+    kind = "column"
+
+    def __init__(self, class_name, field="columns"):
+        """
+        Initializes an empty table with the columns of a model class.
+
+        Args:
+            class_name (str): The name of the model class.
+            field (str): The name the table is registered under.
+        """
+        self.class_name = class_name
+        self.field = field
+        attrs = {}
+        if class_name in registry:
+            attrs = declared_attributes(registry[class_name])
+        self.numeric = tuple(
+            name for name, value in attrs.items()
+            if isinstance(value, (int, float)) and
+            not isinstance(value, bool))
+        self.strings = tuple(name for name, value in attrs.items()
+                             if isinstance(value, str) and
+                             name.endswith("_id"))
+        self.fields = self.numeric + self.strings
+        self.__integral = {name: isinstance(attrs[name], int)
+                           for name in self.numeric}
+        self.clear()
+
+    def add(self, key, obj):
+        """
+        Adds an object to the table, replacing any object stored under the
+        same key.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object to add.
+        """
+        row = self.__rows.get(key)
+        if row is None:
+            if self.__free:
+                row = self.__free.pop()
+                self.__keys[row] = key
+                self.__objects[row] = obj
+                self.__alive[row] = 1
+            else:
+                row = len(self.__keys)
+                self.__keys.append(key)
+                self.__objects.append(obj)
+                self.__alive.append(1)
+                for column in self.__numbers.values():
+                    column.append(math.nan)
+                for column in self.__codes.values():
+                    column.append(-1)
+            self.__rows[key] = row
+        else:
+            self.__objects[row] = obj
+        self.__store(row, obj)
+
+    def update(self, key, obj):
+        """
+        Stores the current values of the attributes of an object.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object.
+        """
+        self.add(key, obj)
+
+    def remove(self, key):
+        """
+        Removes an object from the table. Its row is reused by the next
+        object added.
+
+        Args:
+            key (str): The key the object is stored under.
+        """
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+        self.__keys[row] = None
+        self.__objects[row] = None
+        self.__alive[row] = 0
+        for column in self.__numbers.values():
+            column[row] = math.nan
+        for column in self.__codes.values():
+            column[row] = -1
+        for rows in self.__inexact.values():
+            rows.discard(row)
+        self.__free.append(row)
+
+    def clear(self):
+        """
+        Removes all objects from the table.
+        """
+        self.__rows = {}  # Row by key
+        self.__keys = []  # Key by row, None for free rows
+        self.__objects = []  # Object by row, None for free rows
+        self.__alive = bytearray()  # 1 for used rows, 0 for free rows
+        self.__free = []  # Free rows
+        self.__numbers = {name: array("d") for name in self.numeric}
+        self.__codes = {name: array("q") for name in self.strings}
+        self.__inexact = {name: set() for name in self.fields}
+        self.__dictionary = {}  # Code by string
+        self.__strings = []  # String by code
+
+    def estimate(self, op, value):
+        """
+        Tells FileStorage.query() that the table does not serve the query
+        planner; ColumnStorage.query() uses filter() instead.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            None: Always.
+        """
+        return None
+
+    def can_filter(self, predicate):
+        """
+        Tells whether the columns can serve a predicate.
+
+        Args:
+            predicate (tuple): A (field, op, value) predicate.
+
+        Returns:
+            bool: True if the predicate is on a column and its value is of
+                  the type of the column.
+        """
+        field, op, value = predicate
+        values = value if op == "in" else [value]
+        if field in self.__numbers:
+            return op in NUMBER_OPS and all(map(is_number, values))
+        if field in self.__codes:
+            return op in STRING_OPS and all(isinstance(value, str)
+                                            for value in values)
+        return False
+
+    def filter(self, predicates):
+        """
+        Returns the objects satisfying every one of a sequence of
+        predicates. The predicates the columns can serve are evaluated over
+        the columns; the others are checked on the objects left.
+
+        Args:
+            predicates (tuple): The (field, op, value) predicates.
+
+        Returns:
+            dict: The matching objects, by key.
+        """
+        served = [predicate for predicate in predicates
+                  if self.can_filter(predicate)]
+        others = [predicate for predicate in predicates
+                  if not self.can_filter(predicate)]
+        rows = self.__select(served)
+        inexact = set()
+        for field, op, value in served:
+            inexact.update(self.__inexact[field])
+        objs = {}
+        for row in rows:
+            if row not in inexact and matches(self.__objects[row], others):
+                objs[self.__keys[row]] = self.__objects[row]
+        for row in sorted(inexact):
+            obj = self.__objects[row]
+            if matches(obj, predicates):
+                objs[self.__keys[row]] = obj
+        return objs
+
+    def can_aggregate(self, field, group_by):
+        """
+        Tells whether the columns can serve an aggregate.
+
+        Args:
+            field (str): The attribute aggregated, or None to count
+                         objects.
+            group_by (str): The attribute the objects are grouped by, or
+                            None.
+
+        Returns:
+            bool: True if field is a numeric column and group_by a column,
+                  and no object holds a value of either that its column
+                  cannot store exactly, such as an int in a string column.
+        """
+        if field is not None and field not in self.__numbers:
+            return False
+        if group_by is not None and group_by not in self.fields:
+            return False
+        if field is not None and any(
+                is_number(getattr(self.__objects[row], field, None))
+                for row in self.__inexact[field]):
+            return False
+        return group_by is None or all(
+            getattr(self.__objects[row], group_by, None) is None
+            for row in self.__inexact[group_by])
+
+    def aggregate(self, op, field=None, group_by=None):
+        """
+        Computes an aggregate of a numeric column over the objects whose
+        value in the column is a number, for all of them or for each value
+        of a grouping column. Values are aggregated as floats.
+
+        Args:
+            op (str): The aggregate: count, sum, avg, min or max.
+            field (str): The numeric column, or None to count objects.
+            group_by (str): The grouping column, or None.
+
+        Returns:
+            The value of the aggregate or, when grouped, a dictionary of
+            the value of the aggregate by value of the grouping column, in
+            order of value. Aggregates other than count and sum are None
+            over no objects.
+
+        Raises:
+            ValueError: If op is not a known aggregate, or the columns
+                        cannot serve the aggregate.
+        """
+        if op not in AGGREGATES:
+            raise ValueError("unknown aggregate: {!r}".format(op))
+        if op != "count" and field is None:
+            raise ValueError("{} needs an attribute".format(op))
+        if not self.can_aggregate(field, group_by):
+            raise ValueError("no column for {!r} or {!r}".format(
+                field, group_by))
+        if numpy is not None and self.__keys:
+            groups = self.__aggregate_arrays(op, field, group_by)
+        else:
+            groups = self.__aggregate_rows(op, field, group_by)
+        integral = field is not None and self.__integral[field]
+        results = {}
+        for label, (count, total, low, high) in sorted(groups.items()):
+            if op == "count":
+                value = count
+            elif op == "avg":
+                value = total / count
+            else:
+                value = {"sum": total, "min": low, "max": high}[op]
+                if integral and value.is_integer():
+                    value = int(value)
+            results[label] = value
+        if group_by is not None:
+            return results
+        if results:
+            return results[None]
+        return 0 if op in ("count", "sum") else None
+
+    def __store(self, row, obj):
+        """
+        Stores the values of the attributes of an object in a row.
+
+        Args:
+            row (int): The row.
+            obj (BaseModel): The object.
+        """
+        for name, column in self.__numbers.items():
+            value = getattr(obj, name, None)
+            exact = True
+            if is_number(value):
+                try:
+                    number = float(value)
+                    exact = number == value
+                except OverflowError:
+                    number = math.nan
+                    exact = False
+            else:
+                number = math.nan
+            column[row] = number
+            if exact:
+                self.__inexact[name].discard(row)
+            else:
+                self.__inexact[name].add(row)
+        for name, column in self.__codes.items():
+            value = getattr(obj, name, None)
+            if isinstance(value, str):
+                column[row] = self.__code(value)
+                self.__inexact[name].discard(row)
+            else:
+                column[row] = -1
+                self.__inexact[name].add(row)
+
+    def __code(self, value):
+        """
+        Returns the code of a string in the string columns, giving it one
+        if it has none yet.
+
+        Args:
+            value (str): The string.
+
+        Returns:
+            int: The code.
+        """
+        code = self.__dictionary.get(value)
+        if code is None:
+            code = self.__dictionary[value] = len(self.__strings)
+            self.__strings.append(value)
+        return code
+
+    def __select(self, predicates):
+        """
+        Returns the used rows satisfying every one of a sequence of
+        predicates the columns can serve.
+
+        Args:
+            predicates (list): The (field, op, value) predicates.
+
+        Returns:
+            list: The rows, in order.
+        """
+        tests = []
+        for field, op, value in predicates:
+            if field in self.__codes:
+                column = self.__codes[field]
+                values = value if op == "in" else [value]
+                codes = [self.__dictionary.get(value, -2) for value in values]
+                if op == "in":
+                    op, value = "in", codes
+                else:
+                    value = codes[0]
+            else:
+                column = self.__numbers[field]
+            tests.append((column, op, value))
+        if numpy is not None and self.__keys:
+            mask = numpy.frombuffer(self.__alive, dtype=numpy.bool_).copy()
+            for column, op, value in tests:
+                values = numpy.frombuffer(column, dtype=column.typecode)
+                if op == "in":
+                    mask &= numpy.isin(values, list(value))
+                else:
+                    mask &= {
+                        "==": numpy.equal, "!=": numpy.not_equal,
+                        "<": numpy.less, "<=": numpy.less_equal,
+                        ">": numpy.greater, ">=": numpy.greater_equal,
+                    }[op](values, value)
+            return numpy.flatnonzero(mask).tolist()
+        rows = []
+        alive = self.__alive
+        for row in range(len(alive)):
+            if alive[row] and all(self.__test(column[row], op, value)
+                                  for column, op, value in tests):
+                rows.append(row)
+        return rows
+
+    @staticmethod
+    def __test(stored, op, value):
+        """
+        Evaluates a predicate on a value stored in a column.
+
+        Args:
+            stored: The value in the column.
+            op (str): The operator of the predicate.
+            value: The value of the predicate, as stored in the column.
+
+        Returns:
+            bool: True if the stored value satisfies the predicate.
+        """
+        if op == "in":
+            return stored in value
+        if op == "==":
+            return stored == value
+        if op == "!=":
+            return stored != value
+        if op == "<":
+            return stored < value
+        if op == "<=":
+            return stored <= value
+        if op == ">":
+            return stored > value
+        return stored >= value
+
+    def __label(self, group_by, value):
+        """
+        Returns the value of a grouping column a group stands for.
+
+        Args:
+            group_by (str): The grouping column.
+            value: The value stored in the column.
+
+        Returns:
+            The string, or number, the stored value stands for.
+        """
+        if group_by in self.__codes:
+            return self.__strings[int(value)]
+        value = float(value)
+        if self.__integral[group_by] and value.is_integer():
+            return int(value)
+        return value
+
+    def __aggregate_rows(self, op, field, group_by):
+        """
+        Computes the count, sum, minimum and maximum of a numeric column
+        for each group, row by row.
+
+        Args:
+            op (str): The aggregate.
+            field (str): The numeric column, or None.
+            group_by (str): The grouping column, or None.
+
+        Returns:
+            dict: The (count, sum, min, max) of each non-empty group, by
+                  group value, or under None when not grouped.
+        """
+        values = self.__numbers.get(field)
+        groups = None
+        if group_by is not None:
+            groups = self.__codes.get(group_by, self.__numbers.get(group_by))
+        stats = {}
+        alive = self.__alive
+        for row in range(len(alive)):
+            if not alive[row]:
+                continue
+            value = 0.0 if values is None else values[row]
+            if value != value:
+                continue
+            group = None
+            if groups is not None:
+                group = groups[row]
+                if group == -1 and group_by in self.__codes or group != group:
+                    continue
+            stat = stats.get(group)
+            if stat is None:
+                stats[group] = [1, value, value, value]
+            else:
+                stat[0] += 1
+                stat[1] += value
+                stat[2] = min(stat[2], value)
+                stat[3] = max(stat[3], value)
+        if group_by is None:
+            return stats
+        return {self.__label(group_by, group): stat
+                for group, stat in stats.items()}
+
+    def __aggregate_arrays(self, op, field, group_by):
+        """
+        Computes the count, sum, minimum and maximum of a numeric column
+        for each group, with vectorized passes over the columns.
+
+        Args:
+            op (str): The aggregate.
+            field (str): The numeric column, or None.
+            group_by (str): The grouping column, or None.
+
+        Returns:
+            dict: The (count, sum, min, max) of each non-empty group, by
+                  group value, or under None when not grouped.
+        """
+        mask = numpy.frombuffer(self.__alive, dtype=numpy.bool_).copy()
+        if field is None:
+            values = numpy.zeros(len(mask))
+        else:
+            column = self.__numbers[field]
+            values = numpy.frombuffer(column, dtype=column.typecode).copy()
+            mask &= ~numpy.isnan(values)
+        if group_by is None:
+            groups = numpy.zeros(len(mask), dtype=numpy.int64)
+        else:
+            column = self.__codes.get(group_by, self.__numbers.get(group_by))
+            groups = numpy.frombuffer(column, dtype=column.typecode).copy()
+            if group_by in self.__codes:
+                mask &= groups >= 0
+            else:
+                mask &= ~numpy.isnan(groups)
+        values = values[mask]
+        labels, inverse = numpy.unique(groups[mask], return_inverse=True)
+        inverse = inverse.reshape(-1)
+        size = len(labels)
+        counts = numpy.bincount(inverse, minlength=size)
+        sums = numpy.bincount(inverse, weights=values, minlength=size)
+        lows = numpy.full(size, numpy.inf)
+        highs = numpy.full(size, -numpy.inf)
+        if op in ("min", "max"):
+            numpy.minimum.at(lows, inverse, values)
+            numpy.maximum.at(highs, inverse, values)
+        stats = {}
+        for i, label in enumerate(labels.tolist()):
+            if group_by is not None:
+                label = self.__label(group_by, label)
+            else:
+                label = None
+            stats[label] = (int(counts[i]), float(sums[i]),
+                            float(lows[i]), float(highs[i]))
+        return stats
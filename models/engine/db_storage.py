@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+"""This module defines DBStorage, a FileStorage that saves objects to a
+   SQLite database instead of the JSON file, writing only the objects
+   changed since the last save, in one transaction.
+"""
+import json
+import os
+import sqlite3
+from models.base_model import registry
+from models.engine.file_storage import FileStorage
+from models.engine.indexes import REFERENCES
+
+
+class DBStorage(FileStorage):
+    """
+    A FileStorage whose objects are saved to a SQLite database, with one
+    table per model class, created when an object of the class is first
+    saved. Each table holds the id of each object, its
+    reference fields, which are indexed, and its dictionary representation
+    as JSON text. The database runs in write-ahead logging mode, so a save
+    is durable once it returns and readers are never blocked.
+
+    Objects are kept in memory and found as by FileStorage; only saving
+    and reloading go through the database.
+
+    Attributes:
+        __db_path (str): The path to the SQLite database. Set by
+                         HBNB_DB_PATH, "file.db" by default.
+        __timestamps (str): How save() encodes timestamps, as for
+                            FileStorage. Set by HBNB_TIMESTAMP_CODEC.
+
+    Methods:
+        save(self): Writes the objects changed since the last save to the
+                    database.
+        reload(self): Reads the objects saved to the database into storage.
+        compact(self, wait=False): Folds the write-ahead log into the
+                                   database.
+        close(self): Closes the connection to the database.
+    """
+    __db_path = os.getenv("HBNB_DB_PATH", "file.db")
+    __timestamps = os.getenv("HBNB_TIMESTAMP_CODEC", "iso")
+
+    def __init__(self):
+        """
+        Initializes the engine, without connecting to the database yet.
+        """
+        self.__connection = None
+        self.__tables = set()
+
+    def save(self):
+        """
+        Writes the objects added, changed or deleted since the last save
+        to the database, in a single transaction, with one batch of
+        statements per class. Nothing is written while a batch is open.
+        """
+        if self.in_batch():
+            return
+        changes = self.changes()
+        if not changes:
+            return
+        rows = {}
+        deleted = {}
+        for key, obj in changes.items():
+            class_name, _, obj_id = key.partition(".")
+            if obj is None:
+                deleted.setdefault(class_name, []).append((obj_id,))
+                continue
+            fields = tuple(REFERENCES.get(class_name, {}))
+            rows.setdefault(class_name, []).append(
+                (obj_id,) + tuple(self.__column_value(getattr(obj, field,
+                                                              None))
+                                  for field in fields) +
+                (json.dumps(obj.to_dict(timestamps=DBStorage.__timestamps)),))
+        connection = self.__connect()
+        with connection:
+            for class_name in rows:
+                self.__create_table(connection, class_name)
+        with connection:
+            for class_name, params in deleted.items():
+                if class_name in self.__tables:
+                    connection.executemany('DELETE FROM "{}" WHERE id = ?'
+                                           .format(class_name), params)
+            for class_name, params in rows.items():
+                fields = ["id"] + list(REFERENCES.get(class_name, {}))
+                connection.executemany(
+                    'INSERT OR REPLACE INTO "{}" ({}, data) VALUES ({})'
+                    .format(class_name, ", ".join(
+                        '"{}"'.format(field) for field in fields),
+                        ", ".join("?" * (len(fields) + 1))), params)
+        self.clear_changes(changes)
+
+    def reload(self):
+        """
+        Reads the objects saved to the database into storage. In lazy mode
+        the records are kept unbuilt, as by FileStorage.reload(). The model
+        classes without a table, none of whose objects were ever saved,
+        are skipped.
+        """
+        connection = self.__connect()
+        for class_name in registry:
+            if class_name not in self.__tables:
+                continue
+            cursor = connection.execute('SELECT data FROM "{}"'.format(
+                class_name))
+            self.load(("{}.{}".format(class_name, record["id"]), record)
+                      for record in map(json.loads,
+                                        (row[0] for row in cursor)))
+
+    def compact(self, wait=False):
+        """
+        Folds the write-ahead log into the database and truncates it.
+
+        Args:
+            wait (bool): Accepted for compatibility with FileStorage; the
+                         checkpoint always completes before returning.
+        """
+        self.__connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """
+        Closes the connection to the database, if it is open. It is opened
+        again on the next save or reload.
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+            self.__tables = set()
+
+    @staticmethod
+    def __column_value(value):
+        """
+        Returns the value to store in the column of a reference field.
+
+        Args:
+            value: The value of the field.
+
+        Returns:
+            The value itself if SQLite can store it, or its JSON text.
+        """
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        return json.dumps(value, default=str)
+
+    def __connect(self):
+        """
+        Returns the connection to the database, opening it and reading the
+        names of its tables if needed.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        if self.__connection is None:
+            connection = sqlite3.connect(DBStorage.__db_path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            self.__tables = {name for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.__connection = connection
+        return self.__connection
+
+    def __create_table(self, connection, class_name):
+        """
+        Creates the table of a model class, and the indexes on its
+        reference fields, unless it exists.
+
+        Args:
+            connection (sqlite3.Connection): The connection.
+            class_name (str): The name of the class.
+        """
+        if class_name in self.__tables:
+            return
+        fields = list(REFERENCES.get(class_name, {}))
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY KEY, {}data '
+            'TEXT NOT NULL)'.format(class_name, "".join(
+                '"{}" TEXT, '.format(field) for field in fields)))
+        for field in fields:
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" ("{1}")'
+                .format(class_name, field))
+        self.__tables.add(class_name)
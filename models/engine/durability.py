@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+"""This module defines when the files FileStorage writes are flushed to
+   disk with fsync(), trading the latency of saves for how many of them a
+   crash of the machine can lose:
+
+   - "always": every file is synced before save() returns, along with its
+     directory, so a save that returned survives a crash.
+   - "batched": the journal appends and the directories are synced at
+     most once per interval, in the background, so a crash loses at most
+     the saves of the last interval.
+   - "os": the journal appends and the directories are never synced
+     explicitly; the operating system writes them back when it sees fit.
+
+   Whatever the policy, snapshots are written to a temporary file that is
+   synced before it is renamed over the old one, so a crash, of the
+   program or of the machine, never leaves an empty or partly written
+   snapshot behind: the old one or the new one is found after it.
+"""
+import atexit
+import os
+import threading
+import time
+
+SYNC_POLICIES = ("always", "batched", "os")
+
+
+class SyncPolicy:
+    """
+    Syncs the files written by a storage engine to disk according to one of
+    the policies in SYNC_POLICIES.
+
+    Attributes:
+        mode (str): The policy, one of SYNC_POLICIES.
+        interval (float): The time between two syncs in batched mode, in
+                          seconds.
+
+    Methods:
+        sync_file(self, file): Syncs a file just written, before it is
+                               closed and renamed.
+        appended(self, file): Syncs a file just appended to, now or later.
+        written(self, path): Records that a file was written, renamed or
+                             appended to.
+        flush(self): Syncs the files and directories not synced yet.
+    """
+    def __init__(self, mode="always", interval=100):
+        """
+        Initializes a sync policy.
+
+        Args:
+            mode (str): The policy, one of SYNC_POLICIES.
+            interval (int): The time between two syncs in batched mode, in
+                            milliseconds.
+
+        Raises:
+            ValueError: If mode is not a known policy or interval is
+                        negative.
+        """
+        if mode not in SYNC_POLICIES:
+            raise ValueError("unknown sync policy: {!r}".format(mode))
+        if interval < 0:
+            raise ValueError("negative sync interval: {}".format(interval))
+        self.mode = mode
+        self.interval = interval / 1000
+        self.__files = set()
+        self.__directories = set()
+        self.__last_sync = None
+        self.__timer = None
+        self.__lock = threading.Lock()
+        if mode == "batched":
+            atexit.register(self.flush)
+
+    def sync_file(self, file):
+        """
+        Syncs a file just written, before it is closed and renamed over the
+        file it replaces. Whatever the policy, it is synced right away: a
+        file renamed before its contents reach the disk may be found empty
+        after a crash, in place of the file it replaced.
+
+        Args:
+            file (file): The open file.
+        """
+        file.flush()
+        os.fsync(file.fileno())
+
+    def appended(self, file):
+        """
+        Syncs a file just appended to, such as the journal. The "always"
+        policy syncs it right away, the "batched" one when the directories
+        are next synced, and the "os" one never.
+
+        Args:
+            file (file): The open file.
+        """
+        if self.mode == "always":
+            file.flush()
+            os.fsync(file.fileno())
+        elif self.mode == "batched":
+            file.flush()
+            with self.__lock:
+                self.__files.add(file.name)
+
+    def written(self, path):
+        """
+        Records that a file was written, renamed or appended to, so that
+        its directory is synced and a new or renamed file is found after a
+        crash. In "always" mode the directory is synced now. In "batched"
+        mode it is synced, along with the files appended to, now if the
+        last sync is older than the interval, and otherwise when the
+        interval ends.
+
+        Args:
+            path (str): The path of the file.
+        """
+        if self.mode == "always":
+            sync_directory(os.path.dirname(os.path.abspath(path)))
+        elif self.mode == "batched":
+            with self.__lock:
+                self.__directories.add(os.path.dirname(os.path.abspath(path)))
+                now = time.monotonic()
+                if (self.__last_sync is not None and
+                        now - self.__last_sync < self.interval):
+                    if self.__timer is None:
+                        self.__timer = threading.Timer(
+                            self.__last_sync + self.interval - now,
+                            self.flush)
+                        self.__timer.daemon = True
+                        self.__timer.start()
+                    return
+            self.flush()
+
+    def flush(self):
+        """
+        Syncs the files appended to, and the directories of the files
+        written, since the last sync in "batched" mode. Nothing happens in
+        the other modes.
+        """
+        with self.__lock:
+            paths, self.__files = self.__files, set()
+            directories, self.__directories = self.__directories, set()
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            for path in paths:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except FileNotFoundError:
+                    continue
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            for directory in directories:
+                sync_directory(directory)
+            if paths or directories:
+                self.__last_sync = time.monotonic()
+
+
+def sync_directory(directory):
+    """
+    Syncs a directory, so that the files created, renamed or removed in it
+    are found after a crash. Does nothing on platforms where directories
+    cannot be opened, such as Windows.
+
+    Args:
+        directory (str): The path of the directory.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -3,40 +3,757 @@
     JSON file and deserializes string representations saved to a JSON file to
     instances
 """
+import itertools
 import json
-from models.base_model import BaseModel
+import os
+import threading
+from types import SimpleNamespace
+from models.base_model import BaseModel, registry
 from models.user import User
 from models.state import State
 from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
+from models.engine.indexes import REFERENCES, HashIndex, SortedIndex
+from models.engine.aggregates import Aggregate, check_aggregate
+from models.engine.base_storage import BaseStorage
+from models.engine.columns import ColumnTable
+from models.engine.durability import SyncPolicy
+from models.engine.query import check_predicates, matches
+from models.engine.snapshot import Snapshot, encode_record, write_snapshot
+from models.engine.stream import read_records, write_records
+from models.engine.spatial_index import GridIndex
+from models.engine.text_index import TextIndex
+from models.tracked import adopt
 
 
-class FileStorage:
+def default_indexes():
+    """
+    Creates the indexes every storage engine starts with: a hash index on
+    each reference attribute, a grid index on the location of places and
+    full-text indexes on the text of places and reviews.
+
+    Returns:
+        dict: The indexes, by attribute or index name, by class name.
+    """
+    indexes = {
+        class_name: {field: HashIndex(class_name, field) for field in fields}
+        for class_name, fields in REFERENCES.items()
+        }
+    indexes["Place"]["location"] = GridIndex("Place", "latitude",
+                                             "longitude")
+    indexes["Place"]["fulltext"] = TextIndex("Place",
+                                             ("name", "description"))
+    indexes["Review"]["fulltext"] = TextIndex("Review", ("text",))
+    return indexes
+
+
+class FileStorage(BaseStorage):
     """
     This module contains a class that provides methods for serializing
     instances to a JSON file and deserializing JSON files to instances.
 
     Attributes:
         __file_path (str): The path to the JSON file where data is stored.
+        __journal_path (str): The path to the append-only journal that
+                              records changes made since the last snapshot.
+        __compacting_path (str): The path the journal is moved to while it
+                                 is folded into a new snapshot.
+        __text_path (str): The path the full-text indexes matching the JSON
+                           file are saved to by close() and compact(), so
+                           reload() does not have to rebuild them.
+        __binary_path (str): The path to the binary snapshot, saved instead
+                             of the JSON file in binary format.
+        __format (str): The format of the snapshot: "json", the default, or
+                        "binary", whose records reload() maps into memory
+                        without reading them and decodes on first use. Set
+                        by HBNB_STORAGE_FORMAT; a JSON file is read when
+                        there is no binary snapshot yet.
+        __journal (bool): Whether save() appends changes to the journal
+                          instead of rewriting the whole JSON file. Enabled
+                          by setting HBNB_STORAGE_JOURNAL=1.
+        __lazy (bool): Whether reload() keeps the records it reads as they
+                       are and builds an object from a record only when it
+                       is first used. Enabled by setting HBNB_STORAGE_LAZY=1.
+        __timestamps (str): How save() encodes timestamps: "iso" strings,
+                            the default, or "epoch" microsecond integers,
+                            which are faster to encode and decode. Set by
+                            HBNB_TIMESTAMP_CODEC; either is read back.
+        __max_journal_records (int): Journal length, in records, past which
+                                     a compaction starts automatically
+                                     (HBNB_JOURNAL_MAX_RECORDS, 0 disables).
+        __max_journal_bytes (int): Journal size, in bytes, past which a
+                                   compaction starts automatically
+                                   (HBNB_JOURNAL_MAX_BYTES, 0 disables).
+        __write_behind (bool): Whether save() defers saving the changes
+                               until there are __flush_changes of them or
+                               __flush_interval has elapsed, to save many
+                               changes at once. Set by
+                               HBNB_STORAGE_WRITE_BEHIND=1.
+        __flush_interval (int): The longest time a change is deferred in
+                                write-behind mode, in milliseconds
+                                (HBNB_FLUSH_INTERVAL).
+        __flush_changes (int): The number of changed objects past which
+                               save() saves them right away in write-behind
+                               mode (HBNB_FLUSH_CHANGES).
+        __sync (SyncPolicy): When the journal appends and the directories
+                             of the files written are synced to disk:
+                             "always", the default, before save() returns;
+                             "batched", at most once every
+                             HBNB_STORAGE_SYNC_INTERVAL milliseconds; or
+                             "os", when the operating system sees fit. Set
+                             by HBNB_STORAGE_SYNC. Snapshots are synced
+                             before they are renamed whatever the policy.
         __objects (dict): A dictionary to store objects.
+        __classes (dict): The stored objects by class name, then by key.
+        __raw (dict): The records reload() did not build into objects yet,
+                      in lazy mode, by class name, then by key.
+        __indexes (dict): The secondary indexes over object attributes, by
+                          class name, then by attribute name. Every
+                          reference field listed in REFERENCES is indexed,
+                          as are the coordinates of places, under
+                          "location", and the text of places and reviews,
+                          under "fulltext"; other fields through
+                          create_index().
+        __index_kinds (dict): The index class for each kind of index
+                              create_index() can build.
+        __indexes_built (dict): The __objects dictionary __indexes were
+                                built for; they are rebuilt if __objects is
+                                replaced. Like __indexes, it is kept per
+                                class, since every subclass has its own
+                                indexes.
+        __indexed (dict): The __objects dictionary __classes was built
+                          for; it is rebuilt if __objects is replaced.
+        __dirty (set): Keys of the objects added, changed or deleted since
+                       the last save.
+        __encoded (dict): JSON text of the objects as last saved, by key,
+                          reused for the objects that did not change.
+        __journal_records (int): Number of records in the journal.
+        __compactor (Thread): The thread running the latest compaction.
+        __lock (Lock): Serializes journal appends and journal rotation.
+        __write_lock (RLock): Serializes the changes to storage with the
+                              saves made by the write-behind thread.
+        __flusher (Timer): The deferred save scheduled in write-behind mode.
+        __batch (tuple): The state of storage when the open batch began:
+                         the JSON text of each object, the records not
+                         built yet and the keys changed but not saved,
+                         followed by the object stored under each key
+                         changed in the batch, or None if there was none.
+                         None when no batch is open.
 
     Methods:
-        all(self): Returns all objects in storage.
+        all(self, cls=None): Returns all objects in storage, or those of
+                             one class.
+        count(self, cls=None, **values): Returns the number of objects in
+                                         storage, or of those of one class.
+        check_counts(self, repair=False): Verifies the counts of objects
+                                          against a full scan.
+        get(self, cls, obj_id): Returns the object of a class with a given
+                                id.
+        children(self, parent_cls, parent_id, child_cls): Returns the
+            objects of a class that refer to a given object.
+        create_index(self, cls, field, kind="hash"): Indexes an attribute
+                                                    of a class.
+        index(self, cls, name): Returns an index over the objects of a
+                                class.
+        query(self, cls, *predicates): Returns the objects of a class
+                                       satisfying attribute predicates.
+        explain(self, cls, *predicates): Describes how query() would find
+                                         the objects.
+        order_by(self, cls, field, limit=None, reverse=False): Returns the
+            objects of a class ordered by a numeric attribute.
+        within_box(self, cls, south, west, north, east): Returns the
+            objects of a class located inside a bounding box.
+        within_radius(self, cls, lat, lon, km): Returns the objects of a
+            class located within a distance of a point.
+        nearest(self, cls, lat, lon, k=1): Returns the objects of a class
+            located nearest to a point.
+        search(self, cls, text, limit=None): Returns the objects of a class
+            matching a full-text query, best first.
+        aggregate(self, cls, op, field=None, group_by=None): Computes an
+            aggregate of an attribute of the objects of a class.
         new(self, obj): Adds a new object to storage.
+        touch(self, key, obj, name=None): Flags a stored object as changed.
+        delete(self, obj=None): Removes an object from storage.
         save(self): Serializes objects and saves them to the JSON file.
+        flush(self): Saves the changes deferred in write-behind mode.
+        export(self, path=None): Writes every object to a JSON file.
         reload(self): Deserializes string representations saved to the
                       JSON file into objects and then into storage.
+        clear(self): Removes every object from storage without saving.
+        changes(self): Returns the objects changed since the last save.
+        clear_changes(self, keys=None): Flags changes as saved.
+        load(self, records): Adds records read by a storage engine to
+                             storage.
+        compact(self, wait=False): Folds the journal into a new snapshot of
+                                   the JSON file.
+        close(self): Saves the deferred changes and syncs the files not
+                     synced yet.
+        begin(self): Opens a batch, deferring saves until it is committed.
+        commit(self): Closes the open batch and saves its changes.
+        rollback(self): Closes the open batch and undoes its changes.
+        batch(self): Returns a context manager running its block in a
+                     batch.
+        in_batch(self): Returns whether a batch is open.
     """
     __file_path = "file.json"  # Default JSON file path
+    __journal_path = "file.json.log"  # Changes since the last snapshot
+    __compacting_path = "file.json.log.compacting"  # Journal being folded
+    __text_path = "file.json.text"  # Full-text indexes of the JSON file
+    __binary_path = "file.bin"  # Binary snapshot
+    __format = os.getenv("HBNB_STORAGE_FORMAT", "json")
+    __journal = os.getenv("HBNB_STORAGE_JOURNAL") == "1"
+    __lazy = os.getenv("HBNB_STORAGE_LAZY") == "1"
+    __timestamps = os.getenv("HBNB_TIMESTAMP_CODEC", "iso")
+    __max_journal_records = int(os.getenv("HBNB_JOURNAL_MAX_RECORDS",
+                                          "10000"))
+    __max_journal_bytes = int(os.getenv("HBNB_JOURNAL_MAX_BYTES",
+                                        str(16 * 1024 * 1024)))
+    __write_behind = os.getenv("HBNB_STORAGE_WRITE_BEHIND") == "1"
+    __flush_interval = int(os.getenv("HBNB_FLUSH_INTERVAL", "1000"))
+    __flush_changes = int(os.getenv("HBNB_FLUSH_CHANGES", "1000"))
+    __sync = SyncPolicy(os.getenv("HBNB_STORAGE_SYNC", "always"),
+                        int(os.getenv("HBNB_STORAGE_SYNC_INTERVAL", "100")))
     __objects = {}  # Dictionary to store objects
+    __classes = {}  # Objects by class name
+    __raw = {}  # Records not built into objects yet, by class name
+    __indexes = default_indexes()
+    __indexed = None
+    __indexes_built = None
+    __index_kinds = {"hash": HashIndex, "sorted": SortedIndex,
+                     "column": ColumnTable}
+    __dirty = set()  # Keys changed since the last save
+    __encoded = {}  # JSON text of the unchanged objects
+    __journal_records = 0
+    __compactor = None
+    __lock = threading.Lock()
+    __write_lock = threading.RLock()
+    __flusher = None
+    __batch = None
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Gives a subclass indexes of its own, so that the indexes a storage
+        engine creates, such as the column tables of ColumnStorage, are not
+        added to those of FileStorage and of the other engines.
+
+        Args:
+            **kwargs(dict): Keyword arguments for the parent class.
+        """
+        super().__init_subclass__(**kwargs)
+        cls.__indexes = default_indexes()
+        cls.__indexes_built = None
+
+    def all(self, cls=None):
+        """
+        Returns all objects in storage, or only those of a given class.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects to
+                               return. All objects are returned when None.
+
+        Returns:
+            dict: The objects, by key. Unless filtered by class, this is the
+                  storage dictionary itself.
+        """
+        if cls is None:
+            self.__materialize()
+            return FileStorage.__objects
+        class_name = self.__materialize(cls)
+        return dict(FileStorage.__classes.get(class_name, {}))
+
+    def count(self, cls=None, **values):
+        """
+        Returns the number of objects in storage, or of those of a given
+        class, optionally only those whose attributes have given values.
+
+        The number of objects of each class is kept up to date as objects
+        are added, deleted and reloaded, as are the number of objects with
+        each value of a hash-indexed attribute, so these counts take O(1);
+        other counts query the objects of the class.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects to
+                               count. All objects are counted when None.
+            **values: The values the attributes of the counted objects must
+                      equal, by attribute name, such as city_id="c1".
+
+        Returns:
+            int: The number of objects.
+
+        Raises:
+            ValueError: If values are given without a class.
+        """
+        self.__check_indexes()
+        if cls is None:
+            if values:
+                raise ValueError("counting by value needs a class")
+            return len(FileStorage.__objects) + sum(
+                len(records) for records in FileStorage.__raw.values())
+        class_name = self.__class_name(cls)
+        if not values:
+            return (len(FileStorage.__classes.get(class_name, {})) +
+                    len(FileStorage.__raw.get(class_name, {})))
+        index = None
+        if len(values) == 1:
+            [(field, value)] = values.items()
+            index = self.__indexes.get(class_name, {}).get(field)
+        if not isinstance(index, HashIndex):
+            return len(self.query(class_name, *[
+                (name, "==", value) for name, value in values.items()]))
+        default = getattr(self.__model_of(class_name), field, None)
+        return index.count(value) + sum(
+            1 for record in FileStorage.__raw.get(class_name, {}).values()
+            if record.get(field, default) == value)
+
+    def check_counts(self, repair=False):
+        """
+        Verifies the number of objects kept for each class, and for each
+        value of each hash index, against a full scan of the objects.
+
+        Args:
+            repair (bool): Whether to rebuild the index of objects by class
+                           and the secondary indexes from the objects when
+                           they disagree.
+
+        Returns:
+            list: A description of each disagreement found; empty when the
+                  counts are consistent.
+        """
+        self.__check_indexes()
+        objects = {}
+        for key, obj in FileStorage.__objects.items():
+            objects.setdefault(obj.__class__.__name__, {})[key] = obj
+        problems = []
+        for class_name in sorted(set(objects) | set(FileStorage.__classes)):
+            found = len(objects.get(class_name, {}))
+            counted = len(FileStorage.__classes.get(class_name, {}))
+            if found != counted:
+                problems.append("{}: {} counted, {} found".format(
+                    class_name, counted, found))
+        for class_name, indexes in sorted(self.__indexes.items()):
+            for field, index in sorted(indexes.items()):
+                if not isinstance(index, HashIndex):
+                    continue
+                found = {}
+                for obj in objects.get(class_name, {}).values():
+                    value = getattr(obj, field, None)
+                    try:
+                        found[value] = found.get(value, 0) + 1
+                    except TypeError:
+                        pass
+                counted = index.counts()
+                for value in list(found) + [value for value in counted
+                                            if value not in found]:
+                    if found.get(value, 0) != counted.get(value, 0):
+                        problems.append(
+                            "{}.{} == {!r}: {} counted, {} found".format(
+                                class_name, field, value,
+                                counted.get(value, 0), found.get(value, 0)))
+        if problems and repair:
+            self.__rebuild_classes()
+            self.__rebuild_indexes()
+        return problems
+
+    def children(self, parent_cls, parent_id, child_cls):
+        """
+        Returns the objects of a class that refer to a given object through
+        one of their reference fields, such as the cities of a state.
+
+        Args:
+            parent_cls (type or str): The class, or class name, of the
+                                      object referred to.
+            parent_id (str): The id of the object referred to.
+            child_cls (type or str): The class, or class name, of the
+                                     referring objects.
+
+        Returns:
+            dict: The referring objects, by key.
+
+        Raises:
+            ValueError: If child_cls has no reference field to parent_cls.
+        """
+        parent_name = self.__class_name(parent_cls)
+        child_name = self.__class_name(child_cls)
+        fields = [field for field, target in
+                  REFERENCES.get(child_name, {}).items()
+                  if target == parent_name]
+        if not fields:
+            raise ValueError("{} has no reference to {}".format(
+                child_name, parent_name))
+        self.__materialize(child_name)
+        objs = {}
+        for field in fields:
+            index = self.__indexes[child_name][field]
+            objs.update(index.lookup(parent_id))
+        return objs
+
+    def get(self, cls, obj_id):
+        """
+        Returns the object of a class with a given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            obj_id (str): The id of the object.
+
+        Returns:
+            BaseModel: The object, or None if there is no such object.
+        """
+        self.__check_indexes()
+        class_name = self.__class_name(cls)
+        key = "{}.{}".format(class_name, obj_id)
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            record = FileStorage.__raw.get(class_name, {}).pop(key, None)
+            if record is not None:
+                dirty = key in FileStorage.__dirty
+                obj = self.__load(record)
+                if not dirty:
+                    FileStorage.__dirty.discard(key)
+        return obj
+
+    def create_index(self, cls, field, kind="hash"):
+        """
+        Indexes an attribute of a class so that query() can use the index
+        instead of scanning every object of the class. An existing index on
+        the attribute is replaced.
+
+        Args:
+            cls (type or str): The class, or class name, to index.
+            field (str): The name of the attribute to index.
+            kind (str): The kind of index: "hash" for equality and
+                        membership predicates, "sorted" for numeric
+                        attributes, serving range predicates and
+                        order_by() as well, "column" for the column table
+                        of the class, registered under field.
+
+        Returns:
+            object: The index.
+
+        Raises:
+            ValueError: If kind is not a known kind of index.
+        """
+        if kind not in FileStorage.__index_kinds:
+            raise ValueError("unknown kind of index: {!r}".format(kind))
+        class_name = self.__materialize(cls)
+        index = FileStorage.__index_kinds[kind](class_name, field)
+        for key, obj in FileStorage.__classes.get(class_name, {}).items():
+            index.add(key, obj)
+        self.__indexes.setdefault(class_name, {})[field] = index
+        return index
+
+    def index(self, cls, name):
+        """
+        Returns an index over the objects of a class, complete with the
+        objects not built yet.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            name (str): The name the index is registered under, such as
+                        "city_id" or "location".
+
+        Returns:
+            object: The index, or None if there is no such index.
+        """
+        class_name = self.__materialize(cls)
+        return self.__indexes.get(class_name, {}).get(name)
+
+    def query(self, cls, *predicates):
+        """
+        Returns the objects of a class satisfying every one of a sequence
+        of attribute predicates, such as ("price_by_night", "<", 100).
+
+        The predicate whose index yields the fewest candidates is served by
+        that index and the other predicates are checked on the candidates;
+        when no index applies, the objects of the class are scanned once.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *predicates (tuple): The (field, op, value) predicates, where
+                                 op is one of ==, !=, <, <=, >, >= or in.
+
+        Returns:
+            dict: The matching objects, by key.
 
-    def all(self):
+        Raises:
+            ValueError: If a predicate is malformed.
         """
-        Returns all objects in storage.
+        check_predicates(predicates)
+        class_name = self.__materialize(cls)
+        plan = self.__plan(class_name, predicates)
+        if plan is None:
+            candidates = FileStorage.__classes.get(class_name, {})
+        else:
+            size, index, op, value = plan
+            candidates = index.select(op, value)
+        return {key: obj for key, obj in candidates.items()
+                if matches(obj, predicates)}
+
+    def explain(self, cls, *predicates):
         """
-        return FileStorage.__objects
+        Describes the plan query() would choose for the same arguments.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *predicates (tuple): The (field, op, value) predicates.
+
+        Returns:
+            str: The description of the plan.
+
+        Raises:
+            ValueError: If a predicate is malformed.
+        """
+        check_predicates(predicates)
+        class_name = self.__materialize(cls)
+        total = len(FileStorage.__classes.get(class_name, {}))
+        plan = self.__plan(class_name, predicates)
+        if plan is None:
+            return "scan {} ({} objects)".format(class_name, total)
+        size, index, op, value = plan
+        return "{} index {}.{} {} {!r} ({} of {} objects)".format(
+            index.kind, class_name, index.field, op, value, size, total)
+
+    def order_by(self, cls, field, limit=None, reverse=False):
+        """
+        Returns the objects of a class ordered by a numeric attribute, such
+        as the 20 cheapest places. Objects whose attribute is not a number
+        are left out.
+
+        A sorted index on the attribute returns the first objects in
+        O(log n + k); otherwise the objects of the class are scanned.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            field (str): The name of the numeric attribute.
+            limit (int): The maximum number of objects, or None for all.
+            reverse (bool): Whether to start from the largest value.
+
+        Returns:
+            list: The objects, in order.
+        """
+        class_name = self.__materialize(cls)
+        index = self.__indexes.get(class_name, {}).get(field)
+        if isinstance(index, SortedIndex):
+            return [obj for key, obj in index.ordered(reverse, limit)]
+        return super().order_by(class_name, field, limit, reverse)
+
+    def within_box(self, cls, south, west, north, east):
+        """
+        Returns the objects of a class located inside a bounding box. A box
+        whose west edge lies east of its east edge crosses the
+        antimeridian.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            south (float): The southern latitude, in degrees.
+            west (float): The western longitude, in degrees.
+            north (float): The northern latitude, in degrees.
+            east (float): The eastern longitude, in degrees.
+
+        Returns:
+            dict: The matching objects, by key.
+
+        Raises:
+            ValueError: If the class has no spatial index.
+        """
+        index = self.__index_of_kind(cls, "spatial")
+        return index.within_box(south, west, north, east)
+
+    def within_radius(self, cls, lat, lon, km):
+        """
+        Returns the objects of a class located within a great-circle
+        distance of a point, nearest first.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            lat (float): The latitude of the point, in degrees.
+            lon (float): The longitude of the point, in degrees.
+            km (float): The distance, in kilometers.
+
+        Returns:
+            dict: The matching objects, by key, nearest first.
+
+        Raises:
+            ValueError: If the class has no spatial index.
+        """
+        index = self.__index_of_kind(cls, "spatial")
+        return index.within_radius(lat, lon, km)
+
+    def nearest(self, cls, lat, lon, k=1):
+        """
+        Returns the k objects of a class located nearest to a point,
+        nearest first.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            lat (float): The latitude of the point, in degrees.
+            lon (float): The longitude of the point, in degrees.
+            k (int): The number of objects.
+
+        Returns:
+            dict: The nearest objects, by key, nearest first.
+
+        Raises:
+            ValueError: If the class has no spatial index.
+        """
+        index = self.__index_of_kind(cls, "spatial")
+        return index.nearest(lat, lon, k)
+
+    def search(self, cls, text, limit=None):
+        """
+        Returns the objects of a class matching a full-text query, ranked
+        by BM25 score. An object matches when its text has any word of the
+        query; a query word ending with '*' matches every word it is a
+        prefix of.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            text (str): The query, such as "cozy loft*".
+            limit (int): The maximum number of objects, or None for all.
+
+        Returns:
+            dict: The matching objects, by key, best first.
+
+        Raises:
+            ValueError: If the class has no full-text index.
+        """
+        index = self.__index_of_kind(cls, "text")
+        objs = FileStorage.__classes.get(index.class_name, {})
+        return {key: objs[key] for key, score in index.search(text, limit)}
+
+    def aggregate(self, cls, op, field=None, group_by=None):
+        """
+        Computes an aggregate of a numeric attribute over the objects of a
+        class, for all of them or for each value of another attribute, such
+        as the average price_by_night of places by city_id. Objects whose
+        attribute is not a number are left out, as are objects without a
+        hashable value of group_by.
+
+        The objects are read in a single pass; records reload() left
+        unbuilt in lazy mode are read as they are, without building them.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            op (str): The aggregate: count, sum, avg, min, max, median or a
+                      percentile p<q>, such as p90.
+            field (str): The numeric attribute, or None to count objects.
+            group_by (str): The attribute to group the objects by, or None.
+
+        Returns:
+            The value of the aggregate or, when grouped, a dictionary of
+            the value of the aggregate by value of group_by, in order of
+            value when the values can be ordered. Aggregates other than
+            count and sum are None over no objects.
+
+        Raises:
+            ValueError: If op is not a known aggregate, or is not count and
+                        has no attribute.
+        """
+        check_aggregate(op, field)
+        self.__check_indexes()
+        class_name = self.__class_name(cls)
+        klass = self.__model_of(class_name)
+        names = [name for name in (field, group_by) if name is not None]
+        defaults = [getattr(klass, name, None) for name in names]
+        rows = itertools.chain(
+            ([getattr(obj, name, None) for name in names] for obj in
+             FileStorage.__classes.get(class_name, {}).values()),
+            ([record.get(name, default)
+              for name, default in zip(names, defaults)]
+             for record in FileStorage.__raw.get(class_name, {}).values()))
+        groups = {}
+        for row in rows:
+            value = row[0] if field is not None else None
+            group = row[-1] if group_by is not None else None
+            if group_by is not None and group is None:
+                continue
+            try:
+                running = groups.get(group)
+            except TypeError:
+                continue
+            if running is None:
+                running = groups[group] = Aggregate(op, field is not None)
+            running.add(value)
+        if group_by is None:
+            return groups.get(None, Aggregate(op)).result()
+        results = {group: running.result()
+                   for group, running in groups.items() if running.count}
+        try:
+            return dict(sorted(results.items()))
+        except TypeError:
+            return results
+
+    def __materialize(self, cls=None):
+        """
+        Builds the objects of the records reload() left unbuilt in lazy
+        mode, for one class or for all of them. The objects are indexed as
+        they are added, so the indexes over a class are complete once its
+        objects are built.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects to
+                               build. The objects of all classes are built
+                               when None.
+
+        Returns:
+            str: The class name, or None if cls is None.
+        """
+        self.__check_indexes()
+        class_name = None if cls is None else self.__class_name(cls)
+        raw = FileStorage.__raw
+        names = [name for name in (raw if cls is None else [class_name])
+                 if raw.get(name)]
+        if names:
+            dirty = set(FileStorage.__dirty)
+            for name in names:
+                for record in raw.pop(name).values():
+                    self.__load(record)
+            FileStorage.__dirty = dirty
+        return class_name
+
+    def __index_of_kind(self, cls, kind):
+        """
+        Returns the index of a given kind over the objects of a class.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            kind (str): The kind of index, such as "spatial".
+
+        Returns:
+            object: The index.
+
+        Raises:
+            ValueError: If the class has no index of that kind.
+        """
+        class_name = self.__materialize(cls)
+        for index in self.__indexes.get(class_name, {}).values():
+            if index.kind == kind:
+                return index
+        raise ValueError("{} has no {} index".format(class_name, kind))
+
+    def __plan(self, class_name, predicates):
+        """
+        Picks the predicate served by an index with the fewest candidates.
+
+        Args:
+            class_name (str): The class name of the objects.
+            predicates (tuple): The (field, op, value) predicates.
+
+        Returns:
+            tuple: The (size, index, op, value) of the chosen predicate, or
+                   None if no index can serve any predicate.
+        """
+        best = None
+        indexes = self.__indexes.get(class_name, {})
+        for field, op, value in predicates:
+            index = indexes.get(field)
+            if index is None:
+                continue
+            size = index.estimate(op, value)
+            if size is not None and (best is None or size < best[0]):
+                best = (size, index, op, value)
+        return best
 
     def new(self, obj):
         """
@@ -46,31 +763,834 @@ class FileStorage:
             obj (BaseModel): The object to be added.
         """
         if obj:
-            key = f"{obj.__class__.__name__}.{obj.id}"
-            FileStorage.__objects[key] = obj
+            with FileStorage.__write_lock:
+                self.__check_indexes()
+                class_name = obj.__class__.__name__
+                key = f"{class_name}.{obj.id}"
+                self.__flag(key)
+                FileStorage.__objects[key] = obj
+                FileStorage.__raw.get(class_name, {}).pop(key, None)
+                FileStorage.__classes.setdefault(class_name, {})[key] = obj
+                indexes = self.__indexes.get(class_name, {})
+                for index in indexes.values():
+                    index.add(key, obj)
+
+    def touch(self, key, obj, name=None):
+        """
+        Flags a stored object as changed, so that it is serialized again on
+        the next save, and updates the indexes over the changed attribute.
+        Objects that are not in storage are ignored.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object that changed.
+            name (str): The name of the attribute that changed, or None if
+                        any attribute may have changed.
+        """
+        with FileStorage.__write_lock:
+            if FileStorage.__objects.get(key) is obj:
+                self.__flag(key)
+                indexes = self.__indexes.get(obj.__class__.__name__, {})
+                for index in indexes.values():
+                    if name is None or name in index.fields:
+                        index.update(key, obj)
+
+    def delete(self, obj=None):
+        """
+        Removes an object from storage.
+
+        Args:
+            obj (BaseModel): The object to be removed. Nothing happens when
+                             it is None.
+        """
+        if obj is not None:
+            self.__remove(f"{obj.__class__.__name__}.{obj.id}")
+
+    def __remove(self, key):
+        """
+        Removes the object stored under a key from storage.
+
+        Args:
+            key (str): The key of the object.
+        """
+        with FileStorage.__write_lock:
+            self.__check_indexes()
+            self.__flag(key)
+            FileStorage.__raw.get(key.partition(".")[0], {}).pop(key, None)
+            obj = FileStorage.__objects.pop(key, None)
+            if obj is not None:
+                class_name = obj.__class__.__name__
+                FileStorage.__classes[class_name].pop(key, None)
+                indexes = self.__indexes.get(class_name, {})
+                for index in indexes.values():
+                    index.remove(key)
+            FileStorage.__encoded.pop(key, None)
+
+    def __flag(self, key):
+        """
+        Flags the object stored under a key as changed since the last save.
+        When a batch is open, the object stored under the key when the
+        batch began is kept, so that rollback() can restore it; this must
+        therefore be called before the object is replaced or removed.
+
+        Args:
+            key (str): The key of the object.
+        """
+        FileStorage.__dirty.add(key)
+        if FileStorage.__batch is not None:
+            FileStorage.__batch[3].setdefault(
+                key, FileStorage.__objects.get(key))
+
+    def __check_indexes(self):
+        """
+        Rebuilds the index of objects by class and the secondary indexes if
+        the storage dictionary was replaced since they were built.
+        """
+        if FileStorage.__indexed is not FileStorage.__objects:
+            FileStorage.__indexed = FileStorage.__objects
+            FileStorage.__raw = {}
+            self.__rebuild_classes()
+        if self.__indexes_built is not FileStorage.__objects:
+            type(self).__indexes_built = FileStorage.__objects
+            self.__rebuild_indexes()
+
+    def __rebuild_classes(self):
+        """
+        Rebuilds the index of objects by class from the storage
+        dictionary.
+        """
+        FileStorage.__classes = {}
+        for key, obj in FileStorage.__objects.items():
+            FileStorage.__classes.setdefault(
+                obj.__class__.__name__, {})[key] = obj
+
+    def __rebuild_indexes(self):
+        """
+        Rebuilds the secondary indexes from the storage dictionary.
+        """
+        for indexes in self.__indexes.values():
+            for index in indexes.values():
+                index.clear()
+        for key, obj in FileStorage.__objects.items():
+            for index in self.__indexes.get(obj.__class__.__name__,
+                                            {}).values():
+                index.add(key, obj)
+
+    @staticmethod
+    def __model_of(class_name):
+        """
+        Returns the model class registered under a name, whose class
+        attributes are the defaults of its attributes: for a compact
+        version, the model class it stands in for.
+
+        Args:
+            class_name (str): The name of the class.
+
+        Returns:
+            type: The model class, or None if there is no such class.
+        """
+        klass = registry.get(class_name)
+        return getattr(klass, "_model", None) or klass
+
+    @staticmethod
+    def __class_name(cls):
+        """
+        Returns the name of a class, given the class or its name.
+
+        Args:
+            cls (type or str): The class or class name.
+
+        Returns:
+            str: The class name.
+        """
+        return cls if isinstance(cls, str) else cls.__name__
 
     def save(self):
         """
         Serializes objects and saves them to the JSON file.
+
+        In journal mode only the objects added, changed or deleted since the
+        last save are appended to the journal, on a single line so that a
+        save, or a committed batch, is replayed whole or not at all.
+        Otherwise the whole JSON file is rewritten and the journal, which
+        the new snapshot supersedes, is discarded. Either way only the
+        changed objects are serialized again; the JSON text of the others
+        is reused from the previous save. An object is changed when one of
+        its attributes is set or, as models keep their list, dict and set
+        values in tracked containers, when such a value is changed in
+        place; a container nested in such a value must be set again.
+
+        The JSON file is written to a temporary file, synced to disk and
+        renamed over it, so an interrupted save leaves the previous JSON
+        file in place. The journal appends and the directory are synced
+        according to the sync policy.
+
+        In write-behind mode the changes are only saved once there are
+        enough of them; otherwise a background thread saves them at the end
+        of the flush interval, unless flush() or close() does first. While
+        a batch is open nothing is saved until it is committed.
+        """
+        with FileStorage.__write_lock:
+            if FileStorage.__batch is not None:
+                return
+            if (FileStorage.__write_behind and
+                    len(FileStorage.__dirty) < FileStorage.__flush_changes):
+                if FileStorage.__flusher is None and FileStorage.__dirty:
+                    flusher = threading.Timer(
+                        FileStorage.__flush_interval / 1000, self.flush)
+                    flusher.daemon = True
+                    FileStorage.__flusher = flusher
+                    flusher.start()
+                return
+            self.__cancel_flush()
+            self.__save()
+
+    def flush(self):
+        """
+        Saves the changes save() deferred in write-behind mode, if any.
+        While a batch is open they are left pending: commit() saves them,
+        and rollback() defers them again.
+        """
+        with FileStorage.__write_lock:
+            pending = self.__cancel_flush() or (FileStorage.__write_behind and
+                                                FileStorage.__dirty)
+            if pending and FileStorage.__batch is None:
+                self.__save()
+
+    def begin(self):
         """
-        with open(FileStorage.__file_path, 'w', encoding="utf-8") as file:
-            obj_dict = {
-                key: obj.to_dict()
-                for key, obj in FileStorage.__objects.items()
-                }
-            json.dump(obj_dict, file)
+        Opens a batch: the changes made until it is committed are saved
+        together by commit(), or undone by rollback().
+
+        Raises:
+            ValueError: If a batch is already open.
+        """
+        with FileStorage.__write_lock:
+            if FileStorage.__batch is not None:
+                raise ValueError("a batch is already open")
+            self.__check_indexes()
+            encoded = FileStorage.__encoded
+            dirty = FileStorage.__dirty
+            timestamps = FileStorage.__timestamps
+            for key, obj in FileStorage.__objects.items():
+                if key in dirty or key not in encoded:
+                    encoded[key] = json.dumps(
+                        obj.to_dict(timestamps=timestamps))
+            FileStorage.__batch = (
+                dict(encoded),
+                {class_name: dict(records)
+                 for class_name, records in FileStorage.__raw.items()},
+                set(dirty),
+                {})
+
+    def commit(self):
+        """
+        Closes the open batch and saves the changes made in it, along with
+        any made before, in a single save.
+
+        Raises:
+            ValueError: If no batch is open.
+        """
+        with FileStorage.__write_lock:
+            if FileStorage.__batch is None:
+                raise ValueError("no batch is open")
+            FileStorage.__batch = None
+            self.save()
+
+    def rollback(self):
+        """
+        Closes the open batch and puts storage back in the state it was in
+        when the batch began: the objects added in the batch are removed,
+        and those changed or deleted in it are put back as they were. The
+        objects are restored in place, so the references held to them stay
+        valid; only the keys changed in the batch are touched, and the
+        changes made before it stay unsaved.
+
+        Raises:
+            ValueError: If no batch is open.
+        """
+        with FileStorage.__write_lock:
+            if FileStorage.__batch is None:
+                raise ValueError("no batch is open")
+            texts, raw, dirty, originals = FileStorage.__batch
+            FileStorage.__batch = None
+            for key, original in originals.items():
+                class_name = key.partition(".")[0]
+                record = raw.get(class_name, {}).get(key)
+                if original is None and record is None:
+                    self.__remove(key)
+                    continue
+                obj = FileStorage.__objects.get(key)
+                if original is not None:
+                    record = json.loads(texts[key])
+                    if obj is not original:
+                        self.__remove(key)
+                        self.new(original)
+                        obj = original
+                if obj is None:
+                    FileStorage.__raw.setdefault(class_name, {})[key] = record
+                    continue
+                self.__restore(key, obj, record)
+                if key in texts:
+                    FileStorage.__encoded[key] = texts[key]
+                else:
+                    FileStorage.__encoded.pop(key, None)
+            FileStorage.__dirty = dirty
+            if FileStorage.__write_behind and dirty:
+                # The changes deferred before the batch are still to save
+                self.save()
+
+    def __restore(self, key, obj, record):
+        """
+        Puts the attributes of a stored object back to those of a record,
+        in place, and updates the indexes over the object.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object.
+            record (Mapping): The dictionary representation to restore.
+        """
+        state = type(obj).from_dict(record)
+        if hasattr(state, "__dict__"):
+            vars(obj).clear()
+            vars(obj).update(vars(state))
+        for cls in type(obj).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                try:
+                    object.__setattr__(obj, name,
+                                       object.__getattribute__(state, name))
+                except AttributeError:
+                    try:
+                        object.__delattr__(obj, name)
+                    except AttributeError:
+                        pass
+        # The tracked containers of the state now hold values of obj
+        adopt(obj, obj.to_dict())
+        self.touch(key, obj)
+
+    def in_batch(self):
+        """
+        Returns whether a batch is open, for storage engines whose save()
+        must defer to it.
+
+        Returns:
+            bool: True if a batch is open, False otherwise.
+        """
+        return FileStorage.__batch is not None
+
+    def __cancel_flush(self):
+        """
+        Cancels the deferred save scheduled by save() in write-behind mode.
+
+        Returns:
+            bool: True if a save was scheduled, False otherwise.
+        """
+        flusher = FileStorage.__flusher
+        if flusher is None:
+            return False
+        flusher.cancel()
+        FileStorage.__flusher = None
+        return True
+
+    def __save(self):
+        """
+        Saves the changes to the journal or rewrites the JSON file, as
+        described in save().
+        """
+        encoded = FileStorage.__encoded
+        timestamps = FileStorage.__timestamps
+        for key in FileStorage.__dirty:
+            obj = FileStorage.__objects.get(key)
+            if obj is None:
+                encoded.pop(key, None)
+            else:
+                encoded[key] = json.dumps(
+                    obj.to_dict(timestamps=timestamps))
+        if FileStorage.__journal:
+            self.__append_journal()
+        else:
+            self.__wait_for_compaction()
+            sync = FileStorage.__sync
+            if FileStorage.__format == "binary":
+                write_snapshot(FileStorage.__binary_path, self.__items(),
+                               sync.sync_file)
+                sync.written(FileStorage.__binary_path)
+            else:
+                write_records(FileStorage.__file_path, self.__items(),
+                              sync=sync.sync_file)
+                sync.written(FileStorage.__file_path)
+            for path in (FileStorage.__compacting_path,
+                         FileStorage.__journal_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            FileStorage.__journal_records = 0
+        FileStorage.__dirty.clear()
+
+    def export(self, path=None):
+        """
+        Writes every object in storage to a JSON file, in the format of the
+        JSON file save() writes in JSON format, without building the
+        records not built yet.
+
+        Args:
+            path (str): The path of the JSON file, the JSON file of the
+                        storage when None.
+        """
+        self.__check_indexes()
+        write_records(path or FileStorage.__file_path, self.__items())
+
+    def __items(self):
+        """
+        Yields the key and JSON text of every object in storage, built or
+        not. The text of the objects that did not change since the last
+        save is reused.
+        """
+        encoded = FileStorage.__encoded
+        timestamps = FileStorage.__timestamps
+        for key, obj in FileStorage.__objects.items():
+            text = encoded.get(key)
+            if text is None:
+                text = encoded[key] = json.dumps(
+                    obj.to_dict(timestamps=timestamps))
+            yield key, text
+        # Lazy records may be built by other threads while they are written
+        for records in list(FileStorage.__raw.values()):
+            for key, record in list(records.items()):
+                text = encoded.get(key)
+                if text is None:
+                    text = encode_record(record)
+                yield key, text
 
     def reload(self):
         """
         Deserializes string representations saved to the JSON file into
-        objects and then into storage.
+        objects and then into storage. The JSON file is read one record at
+        a time, each object being built as soon as its record is read.
+
+        The journal, if any, is replayed on top of the JSON file so the
+        changes appended since the last snapshot are restored as well. The
+        full-text indexes saved along with the JSON file are restored as
+        they are instead of being rebuilt from the text of every object.
+
+        In binary format the binary snapshot is read instead, and only its
+        index: its records are kept as they are, as in lazy mode, and are
+        only decoded when they are used.
+        """
+        with FileStorage.__write_lock:
+            dirty = set(FileStorage.__dirty)
+            self.__wait_for_compaction()
+            self.__check_indexes()
+            held = {}
+            binary = FileStorage.__format == "binary"
+            texts = {}
+            if not FileStorage.__lazy and not binary:
+                texts = self.__load_text_indexes()
+            for class_name, state in texts.items():
+                indexes = self.__indexes.get(class_name, {})
+                for name, index in list(indexes.items()):
+                    if index.kind == "text":
+                        held[class_name, name] = (indexes.pop(name), state)
+            try:
+                if binary and os.path.exists(FileStorage.__binary_path):
+                    snapshot = Snapshot(FileStorage.__binary_path)
+                    for key, record in snapshot.records().items():
+                        self.__stage(key, record, lazy=True)
+                else:
+                    with open(FileStorage.__file_path, 'r',
+                              encoding="utf-8") as file:
+                        if FileStorage.__lazy:
+                            for key, obj, text in read_records(
+                                    file, texts=True):
+                                self.__stage(key, obj, text=text)
+                        else:
+                            for key, obj in read_records(file):
+                                self.__stage(key, obj)
+            except FileNotFoundError:
+                pass
+            finally:
+                for (class_name, name), (index, state) in held.items():
+                    self.__restore_text_index(index, state)
+                    self.__indexes[class_name][name] = index
+            for record in self.__read_journal(FileStorage.__compacting_path):
+                self.__replay(record)
+            FileStorage.__journal_records = 0
+            for record in self.__read_journal(FileStorage.__journal_path):
+                self.__replay(record)
+                FileStorage.__journal_records += 1
+            FileStorage.__dirty = dirty
+
+    def clear(self):
+        """
+        Removes every object from storage without saving the change, so
+        that reload() reads back the objects last saved. The changes not
+        saved yet, including those deferred in write-behind mode, are
+        dropped.
+
+        Raises:
+            ValueError: If a batch is open.
+        """
+        with FileStorage.__write_lock:
+            if FileStorage.__batch is not None:
+                raise ValueError("a batch is open")
+            self.__cancel_flush()
+            self.__wait_for_compaction()
+            FileStorage.__objects = {}
+            FileStorage.__dirty = set()
+            FileStorage.__encoded = {}
+            self.__check_indexes()
+
+    def changes(self):
+        """
+        Returns the objects added, changed or deleted since the last save,
+        for storage engines that save them elsewhere than the JSON file.
+
+        Returns:
+            dict: The changed objects, by key, with None for the keys of
+                  deleted objects.
+        """
+        self.__check_indexes()
+        return {key: FileStorage.__objects.get(key)
+                for key in FileStorage.__dirty}
+
+    def clear_changes(self, keys=None):
+        """
+        Flags changes as saved.
+
+        Args:
+            keys (iterable): The keys of the saved changes, or None for all
+                             of them.
+        """
+        if keys is None:
+            FileStorage.__dirty.clear()
+        else:
+            FileStorage.__dirty.difference_update(keys)
+
+    def load(self, records):
+        """
+        Adds records read by a storage engine to storage, as reload() does
+        with those of the JSON file, without flagging them as changed.
+
+        Args:
+            records (iterable): The (key, record) pairs, where each record
+                                is the dictionary representation of an
+                                instance.
+        """
+        dirty = set(FileStorage.__dirty)
+        self.__check_indexes()
+        for key, record in records:
+            self.__stage(key, record)
+        FileStorage.__dirty = dirty
+
+    def compact(self, wait=False):
+        """
+        Folds the journal into a new snapshot of the JSON file.
+
+        The journal is first moved aside, which only takes a rename, so
+        that saves made in the meantime go to a fresh journal. The snapshot
+        is then rebuilt from the files alone, without touching the objects
+        in storage, in a background thread. The new snapshot is written to
+        a temporary file and renamed over the JSON file, so a crash at any
+        point leaves either the old or the new snapshot in place, with the
+        journal records needed to bring it up to date.
+
+        Args:
+            wait (bool): Whether to wait for the compaction to finish.
+        """
+        with FileStorage.__lock:
+            compactor = FileStorage.__compactor
+            if compactor is None or not compactor.is_alive():
+                compactor = None
+                if self.__rotate_journal():
+                    compactor = threading.Thread(target=self.__fold_journal)
+                    FileStorage.__compactor = compactor
+                    compactor.start()
+        if wait and compactor is not None:
+            compactor.join()
+
+    def close(self):
+        """
+        Saves the changes deferred in write-behind mode, waits for the
+        compaction in progress, if any, saves the full-text indexes if the
+        JSON file holds every change, and syncs the files written but not
+        synced yet under the "batched" sync policy.
+
+        The full-text indexes are only saved here and by compact(), rather
+        than on every save, since they are written whole.
+        """
+        self.flush()
+        self.__wait_for_compaction()
+        with FileStorage.__write_lock:
+            if (FileStorage.__format != "binary" and
+                    not FileStorage.__dirty and
+                    not os.path.exists(FileStorage.__journal_path) and
+                    os.path.exists(FileStorage.__file_path) and
+                    not self.__load_text_indexes()):
+                self.__save_text_indexes(
+                    [index for indexes in self.__indexes.values()
+                     for index in indexes.values()
+                     if index.kind == "text" and
+                     not FileStorage.__raw.get(index.class_name)])
+        FileStorage.__sync.flush()
+
+    def __wait_for_compaction(self):
+        """
+        Waits for the compaction in progress, if any, to finish.
+        """
+        compactor = FileStorage.__compactor
+        if compactor is not None:
+            compactor.join()
+
+    def __load(self, obj):
+        """
+        Builds an instance from its dictionary representation and adds it
+        to storage.
+
+        Args:
+            obj (dict): The dictionary representation of the instance.
+
+        Returns:
+            BaseModel: The instance.
+        """
+        instance = registry[obj["__class__"]].from_dict(obj)
+        self.new(instance)
+        return instance
+
+    def __stage(self, key, obj, lazy=False, text=None):
+        """
+        Adds a record read from the JSON file or the journal to storage: in
+        lazy mode, as a record to build into an object on first use, unless
+        it replaces an object already built; otherwise as an object.
+
+        Args:
+            key (str): The key of the record.
+            obj (Mapping): The dictionary representation of the instance.
+            lazy (bool): Whether to keep the record as it is even outside
+                         lazy mode.
+            text (str): The JSON text of the record as read, kept for save()
+                        to write the record again without encoding it, or
+                        None.
+        """
+        if ((lazy or FileStorage.__lazy) and
+                key not in FileStorage.__objects):
+            if text is None:
+                FileStorage.__encoded.pop(key, None)
+            else:
+                FileStorage.__encoded[key] = text
+            FileStorage.__raw.setdefault(key.partition(".")[0], {})[key] = obj
+        else:
+            self.__load(obj)
+
+    def __append_journal(self):
+        """
+        Appends one record per key in __dirty to the journal: a "put"
+        record holding the object, as encoded by save(), for added or
+        changed objects and a "delete" record for removed ones. Several
+        records are framed in a single "batch" record, written as one line,
+        so that a save torn by a crash is dropped whole on reload instead
+        of being replayed in part.
+        """
+        lines = []
+        for key in FileStorage.__dirty:
+            text = FileStorage.__encoded.get(key)
+            if text is None:
+                line = '{{"op": "delete", "key": {}}}'
+            else:
+                line = '{{"op": "put", "key": {}, "value": {}}}'
+            lines.append(line.format(json.dumps(key), text))
+        if not lines:
+            return
+        if len(lines) == 1:
+            text = lines[0] + "\n"
+        else:
+            text = '{{"op": "batch", "records": [{}]}}\n'.format(
+                ", ".join(lines))
+        with FileStorage.__lock:
+            with open(FileStorage.__journal_path, 'a',
+                      encoding="utf-8") as file:
+                file.write(text)
+                size = file.tell()
+                FileStorage.__sync.appended(file)
+            FileStorage.__sync.written(FileStorage.__journal_path)
+            FileStorage.__journal_records += len(lines)
+            records = FileStorage.__journal_records
+        max_records = FileStorage.__max_journal_records
+        max_bytes = FileStorage.__max_journal_bytes
+        if (max_records and records >= max_records or
+                max_bytes and size >= max_bytes):
+            self.compact()
+
+    def __rotate_journal(self):
+        """
+        Moves the journal aside to be folded into the snapshot. Records left
+        behind by an interrupted compaction are kept in front of it.
+
+        Returns:
+            bool: True if there is a journal to fold, False otherwise.
+        """
+        journal = FileStorage.__journal_path
+        compacting = FileStorage.__compacting_path
+        FileStorage.__journal_records = 0
+        if not os.path.exists(compacting):
+            try:
+                os.replace(journal, compacting)
+            except FileNotFoundError:
+                return False
+            return True
+        try:
+            with open(journal, 'rb') as src, open(compacting, 'ab') as dst:
+                dst.write(src.read())
+            os.remove(journal)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def __fold_journal(self):
+        """
+        Replays the journal moved aside by __rotate_journal() over the
+        records of the snapshot and atomically replaces the snapshot with
+        the result.
+        """
+        binary = FileStorage.__format == "binary"
+        try:
+            if binary and os.path.exists(FileStorage.__binary_path):
+                obj_dict = Snapshot(FileStorage.__binary_path).records()
+            else:
+                with open(FileStorage.__file_path, 'r',
+                          encoding="utf-8") as file:
+                    obj_dict = dict(read_records(file))
+        except FileNotFoundError:
+            obj_dict = {}
+        for record in self.__read_journal(FileStorage.__compacting_path):
+            if record["op"] == "put":
+                obj_dict[record["key"]] = record["value"]
+            else:
+                obj_dict.pop(record["key"], None)
+        items = ((key, encode_record(value))
+                 for key, value in obj_dict.items())
+        sync = FileStorage.__sync
+        if binary:
+            write_snapshot(FileStorage.__binary_path, items, sync.sync_file)
+            sync.written(FileStorage.__binary_path)
+            os.remove(FileStorage.__compacting_path)
+            return
+        write_records(FileStorage.__file_path, items, sync=sync.sync_file)
+        sync.written(FileStorage.__file_path)
+        indexes = []
+        for class_name, class_indexes in list(self.__indexes.items()):
+            for index in list(class_indexes.values()):
+                if index.kind == "text":
+                    indexes.append(TextIndex(class_name, index.fields))
+                    for key, value in obj_dict.items():
+                        if value.get("__class__") == class_name:
+                            indexes[-1].add(key, SimpleNamespace(**value))
+        self.__save_text_indexes(indexes)
+        os.remove(FileStorage.__compacting_path)
+
+    def __save_text_indexes(self, indexes):
+        """
+        Saves the contents of full-text indexes matching the JSON file as
+        just written, stamped with the size and modification time of the
+        JSON file so that reload() can tell whether they still match it.
+
+        Args:
+            indexes (list): The full-text indexes.
+        """
+        stat = os.stat(FileStorage.__file_path)
+        items = ["{}: {}".format(json.dumps(index.class_name), index.dumps())
+                 for index in indexes]
+        tmp_path = FileStorage.__text_path + ".tmp"
+        with open(tmp_path, 'w', encoding="utf-8") as file:
+            file.write('{{"snapshot": {}, "indexes": {{{}}}}}'.format(
+                json.dumps([stat.st_size, stat.st_mtime_ns]),
+                ", ".join(items)))
+            FileStorage.__sync.sync_file(file)
+        os.replace(tmp_path, FileStorage.__text_path)
+        FileStorage.__sync.written(FileStorage.__text_path)
+
+    def __load_text_indexes(self):
+        """
+        Loads the contents of the full-text indexes saved along with the
+        JSON file, unless the JSON file changed since they were saved.
+
+        Returns:
+            dict: The saved contents of each full-text index, by class name.
+        """
+        try:
+            stat = os.stat(FileStorage.__file_path)
+            with open(FileStorage.__text_path, 'r', encoding="utf-8") as file:
+                saved = json.load(file)
+            if saved["snapshot"] == [stat.st_size, stat.st_mtime_ns]:
+                return saved["indexes"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return {}
+
+    def __restore_text_index(self, index, state):
+        """
+        Restores the saved contents of a full-text index, then indexes the
+        stored objects missing from them and drops the keys of objects no
+        longer stored. The index is rebuilt if the contents are unusable.
+
+        Args:
+            index (TextIndex): The full-text index.
+            state (dict): The saved contents of the index.
+        """
+        self.__check_indexes()
+        objs = FileStorage.__classes.get(index.class_name, {})
+        try:
+            index.loads(state)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            index.clear()
+        indexed = index.keys()
+        for key in indexed.difference(objs):
+            index.remove(key)
+        for key, obj in objs.items():
+            if key not in indexed:
+                index.add(key, obj)
+
+    def __replay(self, record):
+        """
+        Applies one journal record to the objects in storage.
+
+        Args:
+            record (dict): A "put" or "delete" journal record.
+        """
+        if record["op"] == "put":
+            self.__stage(record["key"], record["value"])
+        else:
+            self.__remove(record["key"])
+
+    def __read_journal(self, path):
+        """
+        Yields the records of a journal file, in order, those framed in a
+        "batch" record included.
+
+        A record torn by an interrupted append can only be the last line;
+        it is dropped, with every record it frames, and cut off the journal
+        so later appends start on a clean line.
+
+        Args:
+            path (str): The path of the journal file.
         """
+        offset = 0
         try:
-            with open(FileStorage.__file_path, 'r', encoding="utf-8") as file:
-                json_file = json.load(file)
-                for obj in json_file.values():
-                    class_name = obj["__class__"]
-                    del obj["__class__"]
-                    self.new(eval('{}({})'.format(class_name, '**obj')))
+            with open(path, 'rb') as file:
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get("op") == "batch":
+                        yield from record["records"]
+                    else:
+                        yield record
+                    offset += len(line)
+                else:
+                    return
+            os.truncate(path, offset)
         except FileNotFoundError:
             pass
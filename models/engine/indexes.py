@@ -0,0 +1,509 @@
+#!/usr/bin/python3
+"""This module defines the secondary indexes FileStorage keeps over the
+   attributes of stored objects, and the reference fields that relate the
+   models to one another.
+"""
+from bisect import bisect_left, bisect_right
+from heapq import merge
+
+# Attributes holding the id of another object, by class name, with the
+# class name of the object they refer to.
+REFERENCES = {
+    "City": {"state_id": "State"},
+    "Place": {"city_id": "City", "user_id": "User"},
+    "Review": {"place_id": "Place", "user_id": "User"},
+}
+
+
+def is_number(value):
+    """
+    Tells whether a value can be placed in a SortedIndex: an int or a float
+    other than NaN.
+
+    Args:
+        value: The value.
+
+    Returns:
+        bool: True if the value can be indexed.
+    """
+    return isinstance(value, (int, float)) and value == value
+
+
+class HashIndex:
+    """
+    Index of the objects of one class by the value of one of their
+    attributes, answering equality lookups in O(1).
+
+    Objects whose value is not hashable are left out of the index.
+
+    Attributes:
+        kind (str): The kind of index, as given to FileStorage.create_index.
+        class_name (str): The name of the class of the indexed objects.
+        field (str): The name of the indexed attribute.
+        fields (tuple): The names of the attributes the index depends on.
+
+    Methods:
+        add(self, key, obj): Adds an object to the index.
+        update(self, key, obj): Moves an object to the bucket of its
+                                current value.
+        remove(self, key): Removes an object from the index.
+        clear(self): Removes all objects from the index.
+        lookup(self, value): Returns the objects with a given value.
+        count(self, value): Returns the number of objects with a given
+                            value.
+        counts(self): Returns the number of objects with each value.
+        estimate(self, op, value): Returns the number of objects select()
+                                   would return.
+        select(self, op, value): Returns the objects satisfying a
+                                 predicate.
+    """
+    kind = "hash"
+
+    def __init__(self, class_name, field):
+        """
+        Initializes an empty index.
+
+        Args:
+            class_name (str): The name of the class of the indexed objects.
+            field (str): The name of the indexed attribute.
+        """
+        self.class_name = class_name
+        self.field = field
+        self.fields = (field,)
+        self.__buckets = {}  # Objects by value, then by key
+        self.__values = {}  # Indexed value by key
+
+    def add(self, key, obj):
+        """
+        Adds an object to the index, replacing any object indexed under the
+        same key.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object to index.
+        """
+        if key in self.__values:
+            self.remove(key)
+        value = getattr(obj, self.field, None)
+        try:
+            self.__buckets.setdefault(value, {})[key] = obj
+        except TypeError:
+            return
+        self.__values[key] = value
+
+    def update(self, key, obj):
+        """
+        Moves an object to the bucket of its current value, if it changed.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The indexed object.
+        """
+        value = getattr(obj, self.field, None)
+        if key not in self.__values or self.__values[key] != value:
+            self.add(key, obj)
+
+    def remove(self, key):
+        """
+        Removes an object from the index.
+
+        Args:
+            key (str): The key the object is stored under.
+        """
+        if key in self.__values:
+            value = self.__values.pop(key)
+            bucket = self.__buckets[value]
+            del bucket[key]
+            if not bucket:
+                del self.__buckets[value]
+
+    def clear(self):
+        """
+        Removes all objects from the index.
+        """
+        self.__buckets = {}
+        self.__values = {}
+
+    def lookup(self, value):
+        """
+        Returns the objects whose indexed attribute equals a value.
+
+        Args:
+            value: The value to look up.
+
+        Returns:
+            dict: The matching objects, by key.
+        """
+        try:
+            return dict(self.__buckets.get(value, {}))
+        except TypeError:
+            return {}
+
+    def count(self, value):
+        """
+        Returns the number of objects whose indexed attribute equals a
+        value.
+
+        Args:
+            value: The value to look up.
+
+        Returns:
+            int: The number of matching objects.
+        """
+        try:
+            return len(self.__buckets.get(value, {}))
+        except TypeError:
+            return 0
+
+    def counts(self):
+        """
+        Returns the number of objects with each indexed value.
+
+        Returns:
+            dict: The number of objects, by value.
+        """
+        return {value: len(bucket) for value, bucket in
+                self.__buckets.items()}
+
+    def estimate(self, op, value):
+        """
+        Returns the number of objects select() would return for a
+        predicate, without building the result.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            int: The number of objects, or None if the index cannot serve
+                 the predicate: only "==" and "in" with hashable values are
+                 served.
+        """
+        values = self.__values_of(op, value)
+        if values is None:
+            return None
+        return sum(len(self.__buckets.get(v, {})) for v in values)
+
+    def select(self, op, value):
+        """
+        Returns the objects satisfying a predicate the index can serve.
+
+        Args:
+            op (str): The operator of the predicate, "==" or "in".
+            value: The value of the predicate.
+
+        Returns:
+            dict: The matching objects, by key.
+        """
+        objs = {}
+        for v in self.__values_of(op, value):
+            objs.update(self.__buckets.get(v, {}))
+        return objs
+
+    @staticmethod
+    def __values_of(op, value):
+        """
+        Returns the values to look up to serve a predicate.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            list: The values, or None if the predicate cannot be served.
+        """
+        if op == "==":
+            values = [value]
+        elif op == "in":
+            values = value
+        else:
+            return None
+        try:
+            return list(dict.fromkeys(values))
+        except TypeError:
+            return None
+
+
+class SortedIndex:
+    """
+    Index of the objects of one class ordered by the numeric value of one
+    of their attributes, answering range and top-k queries in
+    O(log n + k).
+
+    Objects whose value is not a number are left out of the index. Added
+    objects are buffered and merged into the ordered run on the next
+    lookup, so loading many objects costs one sort rather than one list
+    insertion each.
+
+    Attributes:
+        kind (str): The kind of index, as given to FileStorage.create_index.
+        class_name (str): The name of the class of the indexed objects.
+        field (str): The name of the indexed attribute.
+        fields (tuple): The names of the attributes the index depends on.
+
+    Methods:
+        add(self, key, obj): Adds an object to the index.
+        update(self, key, obj): Moves an object to the position of its
+                                current value.
+        remove(self, key): Removes an object from the index.
+        clear(self): Removes all objects from the index.
+        range(self, low=None, high=None, include_low=True,
+              include_high=True): Returns the objects with a value in a
+                                  range, in order.
+        ordered(self, reverse=False, limit=None): Returns the objects in
+                                                  order.
+        estimate(self, op, value): Returns the number of objects select()
+                                   would return.
+        select(self, op, value): Returns the objects satisfying a
+                                 predicate.
+    """
+    kind = "sorted"
+    __merge_threshold = 64  # Buffered objects inserted one by one
+
+    def __init__(self, class_name, field):
+        """
+        Initializes an empty index.
+
+        Args:
+            class_name (str): The name of the class of the indexed objects.
+            field (str): The name of the indexed attribute.
+        """
+        self.class_name = class_name
+        self.field = field
+        self.fields = (field,)
+        self.__values = {}  # Indexed value by key
+        self.__objects = {}  # Indexed object by key
+        self.__sorted_values = []  # Values of the ordered run
+        self.__sorted_keys = []  # Keys of the ordered run, by (value, key)
+        self.__pending = {}  # Value by key, not merged into the run yet
+
+    def add(self, key, obj):
+        """
+        Adds an object to the index, replacing any object indexed under the
+        same key.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object to index.
+        """
+        if key in self.__values:
+            self.remove(key)
+        value = getattr(obj, self.field, None)
+        if is_number(value):
+            self.__values[key] = value
+            self.__objects[key] = obj
+            self.__pending[key] = value
+
+    def update(self, key, obj):
+        """
+        Moves an object to the position of its current value, if it
+        changed.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The indexed object.
+        """
+        value = getattr(obj, self.field, None)
+        if key not in self.__values or self.__values[key] != value:
+            self.add(key, obj)
+
+    def remove(self, key):
+        """
+        Removes an object from the index.
+
+        Args:
+            key (str): The key the object is stored under.
+        """
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        del self.__objects[key]
+        if self.__pending.pop(key, None) is None:
+            pos = self.__position(value, key)
+            del self.__sorted_values[pos]
+            del self.__sorted_keys[pos]
+
+    def clear(self):
+        """
+        Removes all objects from the index.
+        """
+        self.__values = {}
+        self.__objects = {}
+        self.__sorted_values = []
+        self.__sorted_keys = []
+        self.__pending = {}
+
+    def range(self, low=None, high=None, include_low=True,
+              include_high=True):
+        """
+        Returns the objects whose value lies in a range, ordered by value.
+
+        Args:
+            low (int or float): The lower bound, or None for no lower bound.
+            high (int or float): The upper bound, or None for no upper
+                                 bound.
+            include_low (bool): Whether the lower bound is included.
+            include_high (bool): Whether the upper bound is included.
+
+        Returns:
+            dict: The matching objects, by key, in order.
+        """
+        self.__merge_pending()
+        start, end = self.__bounds(low, high, include_low, include_high)
+        return {key: self.__objects[key]
+                for key in self.__sorted_keys[start:end]}
+
+    def ordered(self, reverse=False, limit=None):
+        """
+        Returns the indexed objects ordered by value, in O(k) for the first
+        k objects.
+
+        Args:
+            reverse (bool): Whether to start from the largest value.
+            limit (int): The maximum number of objects, or None for all.
+
+        Returns:
+            list: The (key, obj) pairs.
+        """
+        self.__merge_pending()
+        keys = self.__sorted_keys
+        if limit is None:
+            limit = len(keys)
+        if reverse:
+            keys = keys[:-limit - 1:-1] if limit else []
+        else:
+            keys = keys[:limit]
+        return [(key, self.__objects[key]) for key in keys]
+
+    def estimate(self, op, value):
+        """
+        Returns the number of objects select() would return for a
+        predicate, without building the result.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            int: The number of objects, or None if the index cannot serve
+                 the predicate: every operator but "!=" is served, with
+                 numeric values only.
+        """
+        ranges = self.__ranges(op, value)
+        if ranges is None:
+            return None
+        return sum(end - start for start, end in ranges)
+
+    def select(self, op, value):
+        """
+        Returns the objects satisfying a predicate the index can serve.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            dict: The matching objects, by key, in order.
+        """
+        objs = {}
+        for start, end in self.__ranges(op, value):
+            for key in self.__sorted_keys[start:end]:
+                objs[key] = self.__objects[key]
+        return objs
+
+    def __ranges(self, op, value):
+        """
+        Returns the positions, in the ordered run, of the objects
+        satisfying a predicate.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            list: The (start, end) slices, or None if the predicate cannot
+                  be served.
+        """
+        if op == "in":
+            values = value
+        elif op in ("==", "<", "<=", ">", ">="):
+            values = [value]
+        else:
+            return None
+        if not all(is_number(v) for v in values):
+            return None
+        self.__merge_pending()
+        if op == "in":
+            return [self.__bounds(v, v, True, True) for v in set(values)]
+        bounds = {
+            "==": (value, value, True, True),
+            "<": (None, value, True, False),
+            "<=": (None, value, True, True),
+            ">": (value, None, False, True),
+            ">=": (value, None, True, True),
+        }
+        return [self.__bounds(*bounds[op])]
+
+    def __bounds(self, low, high, include_low, include_high):
+        """
+        Returns the slice of the ordered run holding the values in a range.
+
+        Args:
+            low (int or float): The lower bound, or None.
+            high (int or float): The upper bound, or None.
+            include_low (bool): Whether the lower bound is included.
+            include_high (bool): Whether the upper bound is included.
+
+        Returns:
+            tuple: The start and end positions.
+        """
+        values = self.__sorted_values
+        if low is None:
+            start = 0
+        elif include_low:
+            start = bisect_left(values, low)
+        else:
+            start = bisect_right(values, low)
+        if high is None:
+            end = len(values)
+        elif include_high:
+            end = bisect_right(values, high)
+        else:
+            end = bisect_left(values, high)
+        return start, max(start, end)
+
+    def __position(self, value, key):
+        """
+        Returns the position of a key in the ordered run.
+
+        Args:
+            value (int or float): The indexed value of the key.
+            key (str): The key.
+
+        Returns:
+            int: The position.
+        """
+        start = bisect_left(self.__sorted_values, value)
+        end = bisect_right(self.__sorted_values, value, start)
+        return bisect_left(self.__sorted_keys, key, start, end)
+
+    def __merge_pending(self):
+        """
+        Merges the buffered objects into the ordered run: one by one when
+        there are few of them, with a single sort and merge otherwise.
+        """
+        if not self.__pending:
+            return
+        if len(self.__pending) <= self.__merge_threshold:
+            for key, value in self.__pending.items():
+                pos = self.__position(value, key)
+                self.__sorted_values.insert(pos, value)
+                self.__sorted_keys.insert(pos, key)
+        else:
+            pending = sorted((value, key)
+                             for key, value in self.__pending.items())
+            entries = list(merge(zip(self.__sorted_values,
+                                     self.__sorted_keys), pending))
+            self.__sorted_values = [value for value, key in entries]
+            self.__sorted_keys = [key for value, key in entries]
+        self.__pending = {}
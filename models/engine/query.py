@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""This module defines the attribute predicates understood by
+   FileStorage.query(), and how they are evaluated against objects.
+
+   A predicate is a (field, op, value) tuple such as
+   ("price_by_night", "<", 100) or ("city_id", "in", ["c1", "c2"]).
+"""
+import operator
+
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, values: value in values,
+}
+
+
+def check_predicates(predicates):
+    """
+    Validates a sequence of predicates.
+
+    Args:
+        predicates (tuple): The (field, op, value) predicates.
+
+    Raises:
+        ValueError: If a predicate is not a (field, op, value) tuple, uses
+                    an unknown operator, or tests membership in something
+                    other than a list, tuple or set.
+    """
+    for predicate in predicates:
+        if not isinstance(predicate, (tuple, list)) or len(predicate) != 3:
+            raise ValueError("invalid predicate: {!r}".format(predicate))
+        field, op, value = predicate
+        if op not in OPERATORS:
+            raise ValueError("unknown operator: {!r}".format(op))
+        if op == "in" and not isinstance(value, (list, tuple, set,
+                                                 frozenset)):
+            raise ValueError("'in' needs a list of values")
+
+
+def matches(obj, predicates):
+    """
+    Tells whether an object satisfies all of a sequence of predicates.
+
+    An object lacking the attribute of a predicate, or whose attribute
+    cannot be compared with the value of a predicate, does not satisfy it.
+
+    Args:
+        obj (BaseModel): The object to test.
+        predicates (tuple): The (field, op, value) predicates.
+
+    Returns:
+        bool: True if the object satisfies every predicate.
+    """
+    for field, op, value in predicates:
+        try:
+            if not OPERATORS[op](getattr(obj, field), value):
+                return False
+        except (AttributeError, TypeError):
+            return False
+    return True
@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+"""This module defines the binary snapshot format FileStorage saves to when
+   HBNB_STORAGE_FORMAT=binary, and reads through a memory map so that
+   records are only decoded when they are used.
+
+   A snapshot is a header, the JSON text of each record prefixed with its
+   length, and a trailer indexing the records by key:
+
+       b"HBNBSNAP" version:u32
+       (length:u32 text)*                      one per record
+       keys_length:u64 keys                    JSON list of the keys
+       offsets:u64[count] lengths:u32[count]   position of each record
+       index_offset:u64 count:u64 b"HBNBSNAP"
+
+   Integers are little-endian.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b"HBNBSNAP"
+VERSION = 1
+HEADER = struct.Struct("<8sI")
+LENGTH = struct.Struct("<I")
+KEYS_LENGTH = struct.Struct("<Q")
+FOOTER = struct.Struct("<QQ8s")
+
+
+def write_snapshot(path, items, sync=None):
+    """
+    Writes records to a snapshot file, through a temporary file renamed
+    over it so that readers see either the old or the new snapshot.
+
+    Args:
+        path (str): The path of the snapshot file.
+        items (iterable): The (key, text) pairs, where text is the JSON
+                          text of the record.
+        sync (callable): Called with the temporary file once written, before
+                         it is renamed, to flush it to disk.
+    """
+    keys = []
+    offsets = array("Q")
+    lengths = array("I")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION))
+        position = HEADER.size
+        for key, text in items:
+            data = text.encode("utf-8")
+            file.write(LENGTH.pack(len(data)))
+            file.write(data)
+            keys.append(key)
+            offsets.append(position + LENGTH.size)
+            lengths.append(len(data))
+            position += LENGTH.size + len(data)
+        encoded = json.dumps(keys).encode("utf-8")
+        if sys.byteorder == "big":
+            offsets.byteswap()
+            lengths.byteswap()
+        file.write(KEYS_LENGTH.pack(len(encoded)))
+        file.write(encoded)
+        file.write(offsets.tobytes())
+        file.write(lengths.tobytes())
+        file.write(FOOTER.pack(position, len(keys), MAGIC))
+        if sync is not None:
+            sync(file)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """
+    A snapshot file opened through a memory map. Opening it only reads its
+    trailer; each record is read and decoded when it is used.
+
+    Attributes:
+        path (str): The path of the snapshot file.
+
+    Methods:
+        records(self): Returns the records of the snapshot, by key.
+        text(self, offset, length): Returns the JSON text of a record.
+        close(self): Unmaps the file.
+    """
+    def __init__(self, path):
+        """
+        Opens a snapshot file and reads its index.
+
+        Args:
+            path (str): The path of the snapshot file.
+
+        Raises:
+            FileNotFoundError: If there is no such file.
+            ValueError: If the file is not a valid snapshot.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size + FOOTER.size:
+                raise ValueError("{} is not a snapshot".format(path))
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self.__map, 0)
+        index_offset, count, end = FOOTER.unpack_from(
+            self.__map, size - FOOTER.size)
+        if magic != MAGIC or end != MAGIC or version != VERSION:
+            raise ValueError("{} is not a snapshot".format(path))
+        position = index_offset + KEYS_LENGTH.size
+        [keys_length] = KEYS_LENGTH.unpack_from(self.__map, index_offset)
+        self.__keys = json.loads(self.__map[position:position + keys_length])
+        position += keys_length
+        self.__offsets = array("Q")
+        self.__offsets.frombytes(self.__map[position:position + 8 * count])
+        position += 8 * count
+        self.__lengths = array("I")
+        self.__lengths.frombytes(self.__map[position:position + 4 * count])
+        if sys.byteorder == "big":
+            self.__offsets.byteswap()
+            self.__lengths.byteswap()
+
+    def records(self):
+        """
+        Returns the records of the snapshot, none of them decoded yet.
+
+        Returns:
+            dict: The SnapshotRecord of each key, in the order saved.
+        """
+        return {key: SnapshotRecord(self, offset, length) for key, offset,
+                length in zip(self.__keys, self.__offsets, self.__lengths)}
+
+    def text(self, offset, length):
+        """
+        Returns the JSON text of a record.
+
+        Args:
+            offset (int): The position of the record in the file.
+            length (int): The length of the record, in bytes.
+
+        Returns:
+            str: The JSON text.
+        """
+        return self.__map[offset:offset + length].decode("utf-8")
+
+    def close(self):
+        """
+        Unmaps the file. The records of the snapshot can no longer be read
+        afterwards.
+        """
+        self.__map.close()
+
+
+class SnapshotRecord(Mapping):
+    """
+    A record of a snapshot, read-only, decoded from the memory map the
+    first time one of its fields is read.
+
+    Attributes:
+        text (str): The JSON text of the record.
+    """
+    __slots__ = ("__snapshot", "__offset", "__length", "__fields")
+
+    def __init__(self, snapshot, offset, length):
+        """
+        Initializes a record, without reading it.
+
+        Args:
+            snapshot (Snapshot): The snapshot holding the record.
+            offset (int): The position of the record in the file.
+            length (int): The length of the record, in bytes.
+        """
+        self.__snapshot = snapshot
+        self.__offset = offset
+        self.__length = length
+        self.__fields = None
+
+    @property
+    def text(self):
+        """
+        The JSON text of the record, as saved.
+        """
+        return self.__snapshot.text(self.__offset, self.__length)
+
+    def __getitem__(self, name):
+        """
+        Returns a field of the record.
+
+        Args:
+            name (str): The name of the field.
+
+        Returns:
+            The value of the field.
+
+        Raises:
+            KeyError: If the record has no such field.
+        """
+        return self.__decoded()[name]
+
+    def __iter__(self):
+        """
+        Returns an iterator over the names of the fields of the record.
+        """
+        return iter(self.__decoded())
+
+    def __len__(self):
+        """
+        Returns the number of fields of the record.
+        """
+        return len(self.__decoded())
+
+    def __decoded(self):
+        """
+        Returns the fields of the record, decoding them on first use.
+
+        Returns:
+            dict: The fields, by name.
+        """
+        if self.__fields is None:
+            self.__fields = json.loads(self.text)
+        return self.__fields
+
+
+def encode_record(record):
+    """
+    Returns the JSON text of a record, reusing the saved text of snapshot
+    records.
+
+    Args:
+        record (Mapping): The record.
+
+    Returns:
+        str: The JSON text.
+    """
+    if isinstance(record, SnapshotRecord):
+        return record.text
+    return json.dumps(record)
@@ -0,0 +1,370 @@
+#!/usr/bin/python3
+"""This module defines the grid index FileStorage keeps over the
+   coordinates of places, answering bounding-box, radius and
+   nearest-neighbour searches without scanning every place.
+
+   Distances are great-circle distances in kilometers. When NumPy is
+   installed, large candidate sets are refined with a vectorized distance
+   pass.
+"""
+import math
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EARTH_RADIUS = 6371.0088  # Mean Earth radius, in kilometers
+KM_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+HALF_CIRCUMFERENCE = EARTH_RADIUS * math.pi  # Farthest possible distance
+EARTH_AREA = 4 * math.pi * EARTH_RADIUS ** 2
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points.
+
+    Args:
+        lat1 (float): The latitude of the first point, in degrees.
+        lon1 (float): The longitude of the first point, in degrees.
+        lat2 (float): The latitude of the second point, in degrees.
+        lon2 (float): The longitude of the second point, in degrees.
+
+    Returns:
+        float: The distance, in kilometers.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distances(lat, lon, points):
+    """
+    Returns the great-circle distances from one point to many, with NumPy
+    when it is installed and there are enough points to make it pay off.
+
+    Args:
+        lat (float): The latitude of the origin, in degrees.
+        lon (float): The longitude of the origin, in degrees.
+        points (list): The (latitude, longitude) pairs, in degrees.
+
+    Returns:
+        list: The distances, in kilometers, in the order of points.
+    """
+    if numpy is None or len(points) < 64:
+        return [distance(lat, lon, plat, plon) for plat, plon in points]
+    coords = numpy.radians(numpy.array(points, dtype=float))
+    lat, lon = math.radians(lat), math.radians(lon)
+    a = (numpy.sin((coords[:, 0] - lat) / 2) ** 2 +
+         math.cos(lat) * numpy.cos(coords[:, 0]) *
+         numpy.sin((coords[:, 1] - lon) / 2) ** 2)
+    return (2 * EARTH_RADIUS *
+            numpy.arcsin(numpy.minimum(1.0, numpy.sqrt(a)))).tolist()
+
+
+class GridIndex:
+    """
+    Index of the objects of one class by their coordinates, bucketed in a
+    grid of cells spanning a fixed number of degrees.
+
+    Objects whose coordinates are not valid latitude and longitude numbers
+    are left out of the index.
+
+    Attributes:
+        kind (str): The kind of index.
+        class_name (str): The name of the class of the indexed objects.
+        field (str): The name the index is registered under.
+        fields (tuple): The names of the latitude and longitude attributes.
+        cell_size (float): The size of a cell, in degrees.
+
+    Methods:
+        add(self, key, obj): Adds an object to the index.
+        update(self, key, obj): Moves an object to the cell of its current
+                                coordinates.
+        remove(self, key): Removes an object from the index.
+        clear(self): Removes all objects from the index.
+        estimate(self, op, value): Tells that the index cannot serve
+                                   attribute predicates.
+        within_box(self, south, west, north, east): Returns the objects in
+                                                    a bounding box.
+        within_radius(self, lat, lon, km): Returns the objects within a
+                                           distance of a point.
+        nearest(self, lat, lon, k=1): Returns the objects nearest to a
+                                      point.
+    """
+    kind = "spatial"
+
+    def __init__(self, class_name, lat_field="latitude",
+                 lon_field="longitude", cell_size=0.1):
+        """
+        Initializes an empty index.
+
+        Args:
+            class_name (str): The name of the class of the indexed objects.
+            lat_field (str): The name of the latitude attribute.
+            lon_field (str): The name of the longitude attribute.
+            cell_size (float): The size of a cell, in degrees.
+        """
+        self.class_name = class_name
+        self.field = "location"
+        self.fields = (lat_field, lon_field)
+        self.cell_size = cell_size
+        self.__rows = math.ceil(180 / cell_size)
+        self.__cols = math.ceil(360 / cell_size)
+        self.__cells = {}  # (lat, lon) by key, by cell
+        self.__cell_of = {}  # Cell by key
+        self.__objects = {}  # Indexed object by key
+
+    def add(self, key, obj):
+        """
+        Adds an object to the index, replacing any object indexed under the
+        same key.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object to index.
+        """
+        if key in self.__cell_of:
+            self.remove(key)
+        point = self.__point_of(obj)
+        if point is not None:
+            cell = self.__cell(*point)
+            self.__cells.setdefault(cell, {})[key] = point
+            self.__cell_of[key] = cell
+            self.__objects[key] = obj
+
+    def update(self, key, obj):
+        """
+        Moves an object to the cell of its current coordinates, if they
+        changed.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The indexed object.
+        """
+        cell = self.__cell_of.get(key)
+        if cell is None or self.__cells[cell][key] != self.__point_of(obj):
+            self.add(key, obj)
+
+    def remove(self, key):
+        """
+        Removes an object from the index.
+
+        Args:
+            key (str): The key the object is stored under.
+        """
+        cell = self.__cell_of.pop(key, None)
+        if cell is not None:
+            del self.__objects[key]
+            points = self.__cells[cell]
+            del points[key]
+            if not points:
+                del self.__cells[cell]
+
+    def clear(self):
+        """
+        Removes all objects from the index.
+        """
+        self.__cells = {}
+        self.__cell_of = {}
+        self.__objects = {}
+
+    def estimate(self, op, value):
+        """
+        Tells FileStorage.query() that the index cannot serve attribute
+        predicates.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            None: Always.
+        """
+        return None
+
+    def within_box(self, south, west, north, east):
+        """
+        Returns the objects inside a bounding box. A box whose west edge
+        lies east of its east edge crosses the antimeridian.
+
+        Args:
+            south (float): The southern latitude, in degrees.
+            west (float): The western longitude, in degrees.
+            north (float): The northern latitude, in degrees.
+            east (float): The eastern longitude, in degrees.
+
+        Returns:
+            dict: The matching objects, by key.
+        """
+        objs = {}
+        for key, point in self.__box_points(south, west, north, east):
+            objs[key] = self.__objects[key]
+        return objs
+
+    def within_radius(self, lat, lon, km):
+        """
+        Returns the objects within a distance of a point, nearest first.
+
+        Args:
+            lat (float): The latitude of the point, in degrees.
+            lon (float): The longitude of the point, in degrees.
+            km (float): The distance, in kilometers.
+
+        Returns:
+            dict: The matching objects, by key, nearest first.
+        """
+        return {key: self.__objects[key]
+                for dist, key in self.__radius_points(lat, lon, km)}
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Returns the k objects nearest to a point, nearest first.
+
+        The search starts with the radius that would hold k objects if they
+        were spread evenly over the globe, and doubles it until it holds k
+        objects; the k nearest objects are then all within it.
+
+        Args:
+            lat (float): The latitude of the point, in degrees.
+            lon (float): The longitude of the point, in degrees.
+            k (int): The number of objects.
+
+        Returns:
+            dict: The k nearest objects, by key, nearest first.
+        """
+        if k <= 0 or not self.__cell_of:
+            return {}
+        k = min(k, len(self.__cell_of))
+        km = min(HALF_CIRCUMFERENCE, math.sqrt(
+            EARTH_AREA * k / len(self.__cell_of) / math.pi))
+        found = self.__radius_points(lat, lon, km)
+        while len(found) < k:
+            km = min(HALF_CIRCUMFERENCE, 2 * km)
+            found = self.__radius_points(lat, lon, km)
+        return {key: self.__objects[key] for dist, key in found[:k]}
+
+    def __radius_points(self, lat, lon, km):
+        """
+        Returns the indexed points within a distance of a point, searching
+        the bounding box of the circle and then measuring the distance of
+        each candidate.
+
+        Args:
+            lat (float): The latitude of the point, in degrees.
+            lon (float): The longitude of the point, in degrees.
+            km (float): The distance, in kilometers.
+
+        Returns:
+            list: The (distance, key) pairs, nearest first.
+        """
+        dlat = km / KM_PER_DEGREE
+        south, north = lat - dlat, lat + dlat
+        if south <= -90 or north >= 90:
+            west, east = -180, 180
+        else:
+            cos = min(math.cos(math.radians(south)),
+                      math.cos(math.radians(north)))
+            dlon = km / (KM_PER_DEGREE * cos)
+            if dlon >= 180:
+                west, east = -180, 180
+            else:
+                west = (lon - dlon + 180) % 360 - 180
+                east = (lon + dlon + 180) % 360 - 180
+        candidates = self.__box_points(max(south, -90), west,
+                                       min(north, 90), east)
+        dists = distances(lat, lon, [point for key, point in candidates])
+        found = [(dist, key) for (key, point), dist in zip(candidates, dists)
+                 if dist <= km]
+        found.sort()
+        return found
+
+    def __box_points(self, south, west, north, east):
+        """
+        Returns the indexed points inside a bounding box.
+
+        Args:
+            south (float): The southern latitude, in degrees.
+            west (float): The western longitude, in degrees.
+            north (float): The northern latitude, in degrees.
+            east (float): The eastern longitude, in degrees.
+
+        Returns:
+            list: The (key, (lat, lon)) pairs.
+        """
+        if west > east:
+            return (self.__box_points(south, west, north, 180) +
+                    self.__box_points(south, -180, north, east))
+        first_row, first_col = self.__cell(south, west)
+        last_row, last_col = self.__cell(north, east)
+        span = (last_row - first_row + 1) * (last_col - first_col + 1)
+        if span > len(self.__cells):
+            cells = [cell for cell in self.__cells
+                     if first_row <= cell[0] <= last_row and
+                     first_col <= cell[1] <= last_col]
+        else:
+            cells = [(r, c) for r in range(first_row, last_row + 1)
+                     for c in range(first_col, last_col + 1)]
+        return [(key, (lat, lon)) for cell in cells
+                for key, (lat, lon) in self.__cells.get(cell, {}).items()
+                if south <= lat <= north and west <= lon <= east]
+
+    def __cell(self, lat, lon):
+        """
+        Returns the cell holding a point.
+
+        Args:
+            lat (float): The latitude, in degrees.
+            lon (float): The longitude, in degrees.
+
+        Returns:
+            tuple: The (row, col) of the cell.
+        """
+        row = min(int((lat + 90) / self.cell_size), self.__rows - 1)
+        col = min(int((lon + 180) / self.cell_size), self.__cols - 1)
+        return row, col
+
+    @staticmethod
+    def __own_value(obj, field):
+        """
+        Returns the value of an attribute set on an object, ignoring the
+        default of its class.
+
+        Args:
+            obj (BaseModel): The object, keeping its attributes in a
+                             dictionary or, as compact objects do, in slots
+                             and a dictionary of extra attributes.
+            field (str): The name of the attribute.
+
+        Returns:
+            The value of the attribute, or None if it is not set.
+        """
+        try:
+            return vars(obj).get(field)
+        except TypeError:
+            pass
+        try:
+            return object.__getattribute__(obj, field)
+        except AttributeError:
+            return (getattr(obj, "_extra", None) or {}).get(field)
+
+    def __point_of(self, obj):
+        """
+        Returns the coordinates of an object. Only coordinates set on the
+        object count: the defaults its class declares, such as 0.0, do not
+        locate it anywhere.
+
+        Args:
+            obj (BaseModel): The object.
+
+        Returns:
+            tuple: The (lat, lon) of the object, or None if they are not
+                   set or not valid coordinates.
+        """
+        lat = self.__own_value(obj, self.fields[0])
+        lon = self.__own_value(obj, self.fields[1])
+        for value, limit in ((lat, 90), (lon, 180)):
+            if (not isinstance(value, (int, float)) or
+                    not -limit <= value <= limit):
+                return None
+        return float(lat), float(lon)
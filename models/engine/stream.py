@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+"""This module reads and writes the JSON file of FileStorage one record at
+   a time, so that reload() builds each object as soon as its record is
+   read and save() writes each record as soon as it is encoded, instead of
+   holding the records of the whole file in memory first.
+"""
+import json
+import os
+import re
+
+CHUNK_SIZE = 1 << 16
+WRITE_BUFFER_SIZE = 1 << 20
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+DECODER = json.JSONDecoder()
+
+
+def read_records(file, chunk_size=CHUNK_SIZE, texts=False):
+    """
+    Reads the entries of a JSON object, such as the JSON file of
+    FileStorage, in chunks and yields them as they are decoded.
+
+    Args:
+        file (file): The JSON file, opened in text mode.
+        chunk_size (int): The number of characters read at a time.
+        texts (bool): Whether to yield the JSON text of each value as well,
+                      as it is in the file, so it can be written again
+                      without encoding the value.
+
+    Yields:
+        tuple: The (key, value) pair of each entry, in file order, or the
+               (key, value, text) triple if texts is True.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a JSON object.
+    """
+    buffer = ""
+    position = 0
+
+    def peek():
+        """
+        Skips whitespace and returns the next character, or "" at the end
+        of the file.
+        """
+        nonlocal buffer, position
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            buffer, position = file.read(chunk_size), 0
+            if not buffer:
+                return ""
+
+    def expect(chars, message):
+        """
+        Consumes and returns the next character, one of chars.
+        """
+        nonlocal position
+        char = peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(message, buffer, position)
+        position += 1
+        return char
+
+    def value():
+        """
+        Consumes the next JSON value, reading more of the file until the
+        buffer holds all of it, and returns it along with its text.
+        """
+        nonlocal buffer, position
+        peek()
+        while True:
+            try:
+                result, end = DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                result, end = None, None
+            # A number or literal ending the buffer may go on in the file
+            if end is not None and (end < len(buffer) or
+                                    isinstance(result, (str, dict, list))):
+                start, position = position, end
+                return result, buffer[start:end] if texts else None
+            chunk = file.read(chunk_size)
+            if not chunk:
+                if end is None:
+                    DECODER.raw_decode(buffer, position)
+                start, position = position, end
+                return result, buffer[start:end] if texts else None
+            buffer, position = buffer[position:] + chunk, 0
+
+    expect("{", "Expecting '{'")
+    if peek() == "}":
+        position += 1
+    else:
+        while True:
+            if peek() != '"':
+                raise json.JSONDecodeError(
+                    "Expecting property name enclosed in double quotes",
+                    buffer, position)
+            key = value()[0]
+            expect(":", "Expecting ':' delimiter")
+            result, text = value()
+            yield (key, result, text) if texts else (key, result)
+            if expect(",}", "Expecting ',' delimiter") == "}":
+                break
+    if peek():
+        raise json.JSONDecodeError("Extra data", buffer, position)
+
+
+def write_records(path, items, buffering=WRITE_BUFFER_SIZE, sync=None):
+    """
+    Writes entries as a JSON object, such as the JSON file of FileStorage,
+    each one as soon as it is produced. The entries are written to a
+    temporary file renamed over the file at the end, so that the file holds
+    either all the old entries or all the new ones, never a part.
+
+    Args:
+        path (str): The path of the JSON file.
+        items (iterable): The (key, text) pairs, where text is the JSON
+                          text of the value.
+        buffering (int): The size of the write buffer, in bytes.
+        sync (callable): Called with the temporary file once written, before
+                         it is renamed, to flush it to disk.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding="utf-8",
+                  buffering=buffering) as file:
+            write = file.write
+            separator = "{"
+            for key, text in items:
+                write(separator)
+                write(json.dumps(key))
+                write(": ")
+                write(text)
+                separator = ", "
+            write("{}" if separator == "{" else "}")
+            if sync is not None:
+                sync(file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
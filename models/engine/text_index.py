@@ -0,0 +1,283 @@
+#!/usr/bin/python3
+"""This module defines the full-text index FileStorage keeps over the
+   free-text attributes of places and reviews, answering ranked keyword
+   and prefix searches with the BM25 ranking function.
+"""
+import bisect
+import heapq
+import json
+import math
+import re
+
+WORD = re.compile(r"\w+")
+QUERY_WORD = re.compile(r"\w+\*?")
+
+
+def tokenize(text):
+    """
+    Splits a text into lowercase words.
+
+    Args:
+        text (str): The text. Anything else than a string has no words.
+
+    Returns:
+        list: The words, in order.
+    """
+    if not isinstance(text, str):
+        return []
+    return WORD.findall(text.lower())
+
+
+class TextIndex:
+    """
+    Inverted index of the objects of one class by the words of some of
+    their text attributes.
+
+    Attributes:
+        kind (str): The kind of index.
+        class_name (str): The name of the class of the indexed objects.
+        field (str): The name the index is registered under.
+        fields (tuple): The names of the indexed text attributes.
+        k1 (float): The BM25 term frequency saturation.
+        b (float): The BM25 document length normalization.
+
+    Methods:
+        add(self, key, obj): Adds an object to the index.
+        update(self, key, obj): Reindexes the words of an object.
+        remove(self, key): Removes an object from the index.
+        clear(self): Removes all objects from the index.
+        estimate(self, op, value): Tells that the index cannot serve
+                                   attribute predicates.
+        search(self, text, limit=None): Returns the keys of the objects
+                                        matching a query, best first.
+        keys(self): Returns the keys of the indexed objects.
+        dumps(self): Returns the contents of the index as JSON text.
+        loads(self, state): Replaces the contents of the index.
+    """
+    kind = "text"
+
+    def __init__(self, class_name, fields, k1=1.2, b=0.75):
+        """
+        Initializes an empty index.
+
+        Args:
+            class_name (str): The name of the class of the indexed objects.
+            fields (tuple): The names of the text attributes to index.
+            k1 (float): The BM25 term frequency saturation.
+            b (float): The BM25 document length normalization.
+        """
+        self.class_name = class_name
+        self.field = "fulltext"
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.b = b
+        self.clear()
+
+    def add(self, key, obj):
+        """
+        Adds an object to the index, replacing any object indexed under the
+        same key.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The object to index.
+        """
+        self.remove(key)
+        self.__add_counts(key, self.__counts_of(obj))
+
+    def update(self, key, obj):
+        """
+        Reindexes the words of an object, if they changed.
+
+        Args:
+            key (str): The key the object is stored under.
+            obj (BaseModel): The indexed object.
+        """
+        counts = self.__counts_of(obj)
+        if self.__docs.get(key) != counts:
+            self.remove(key)
+            self.__add_counts(key, counts)
+
+    def remove(self, key):
+        """
+        Removes an object from the index.
+
+        Args:
+            key (str): The key the object is stored under.
+        """
+        counts = self.__docs.pop(key, None)
+        if counts is None:
+            return
+        self.__encoded.pop(key, None)
+        self.__total -= self.__lengths.pop(key)
+        for term in counts:
+            postings = self.__postings[term]
+            del postings[key]
+            if not postings:
+                del self.__postings[term]
+                self.__vocabulary = None
+
+    def clear(self):
+        """
+        Removes all objects from the index.
+        """
+        self.__docs = {}  # Word counts by key
+        self.__lengths = {}  # Number of words by key
+        self.__postings = {}  # Word count by key, by word
+        self.__total = 0  # Number of words of all objects
+        self.__vocabulary = None  # Sorted words, built for prefix searches
+        self.__encoded = {}  # JSON text of the word counts by key
+
+    def estimate(self, op, value):
+        """
+        Tells FileStorage.query() that the index cannot serve attribute
+        predicates.
+
+        Args:
+            op (str): The operator of the predicate.
+            value: The value of the predicate.
+
+        Returns:
+            None: Always.
+        """
+        return None
+
+    def search(self, text, limit=None):
+        """
+        Returns the keys of the objects matching a query, ranked by BM25
+        score. An object matches when it has any word of the query; a
+        query word ending with '*' matches every word it is a prefix of.
+
+        Args:
+            text (str): The query.
+            limit (int): The maximum number of keys, or None for all.
+
+        Returns:
+            list: The (key, score) pairs, best first.
+        """
+        if not self.__docs:
+            return []
+        count = len(self.__docs)
+        average = self.__total / count
+        scores = {}
+        for word in QUERY_WORD.findall(text.lower()):
+            if word.endswith("*"):
+                terms = self.__expand(word[:-1])
+            else:
+                terms = [word] if word in self.__postings else []
+            for term in terms:
+                postings = self.__postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) /
+                               (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b *
+                                      self.__lengths[key] / average)
+                    scores[key] = (scores.get(key, 0.0) +
+                                   idf * tf * (self.k1 + 1) / (tf + norm))
+        ranked = [(-score, key) for key, score in scores.items()]
+        if limit is None:
+            ranked.sort()
+        else:
+            ranked = heapq.nsmallest(limit, ranked)
+        return [(key, -score) for score, key in ranked]
+
+    def keys(self):
+        """
+        Returns the keys of the indexed objects.
+
+        Returns:
+            set: The keys.
+        """
+        return set(self.__docs)
+
+    def dumps(self):
+        """
+        Returns the contents of the index as JSON text, for loads() to
+        restore without reading the objects again. The text of the objects
+        that did not change since the last call is reused.
+
+        Returns:
+            str: The JSON text.
+        """
+        encoded = self.__encoded
+        items = []
+        for key, counts in self.__docs.items():
+            text = encoded.get(key)
+            if text is None:
+                text = encoded[key] = json.dumps(counts)
+            items.append("{}: {}".format(json.dumps(key), text))
+        return '{{"fields": {}, "docs": {{{}}}}}'.format(
+            json.dumps(list(self.fields)), ", ".join(items))
+
+    def loads(self, state):
+        """
+        Replaces the contents of the index with contents saved by dumps().
+
+        Args:
+            state (dict): The contents, as decoded from the JSON text.
+
+        Raises:
+            ValueError: If the contents were saved for other attributes.
+        """
+        if tuple(state["fields"]) != self.fields:
+            raise ValueError("index of other attributes")
+        self.clear()
+        for key, counts in state["docs"].items():
+            self.__add_counts(key, counts)
+
+    def __add_counts(self, key, counts):
+        """
+        Indexes the word counts of an object.
+
+        Args:
+            key (str): The key the object is stored under.
+            counts (dict): The number of occurrences of each word.
+        """
+        if not counts:
+            return
+        self.__docs[key] = counts
+        self.__lengths[key] = sum(counts.values())
+        self.__total += self.__lengths[key]
+        for term, tf in counts.items():
+            postings = self.__postings.get(term)
+            if postings is None:
+                postings = self.__postings[term] = {}
+                self.__vocabulary = None
+            postings[key] = tf
+
+    def __counts_of(self, obj):
+        """
+        Counts the words of the indexed attributes of an object.
+
+        Args:
+            obj (BaseModel): The object.
+
+        Returns:
+            dict: The number of occurrences of each word.
+        """
+        counts = {}
+        for field in self.fields:
+            for word in tokenize(getattr(obj, field, None)):
+                counts[word] = counts.get(word, 0) + 1
+        return counts
+
+    def __expand(self, prefix):
+        """
+        Returns the indexed words starting with a prefix.
+
+        Args:
+            prefix (str): The prefix.
+
+        Returns:
+            list: The words.
+        """
+        if self.__vocabulary is None:
+            self.__vocabulary = sorted(self.__postings)
+        vocabulary = self.__vocabulary
+        terms = []
+        for i in range(bisect.bisect_left(vocabulary, prefix),
+                       len(vocabulary)):
+            if not vocabulary[i].startswith(prefix):
+                break
+            terms.append(vocabulary[i])
+        return terms
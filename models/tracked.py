@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+"""This module provides the list, dict and set types the values of model
+   attributes are kept in, which flag their instance as changed in storage
+   whenever they are changed in place, as setting the attribute does.
+"""
+import models
+
+
+class Tracked:
+    """
+    A parent class for the tracked containers. A tracked container belongs
+    to one attribute of one instance, and flags that instance as changed in
+    storage after each call of a method that changes the container.
+
+    Copies and pickles of a tracked container are plain containers, which
+    belong to no instance.
+
+    Attributes:
+        _owner (BaseModel): The instance the container belongs to.
+        _name (str): The name of the attribute holding the container.
+
+    Methods:
+        _changed(self): Flags the owner as changed in storage.
+    """
+    __slots__ = ()
+    _base = None  # The built-in type of the container
+    _mutators = ()  # The names of the methods changing the container
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Wraps the methods of the built-in type that change the container,
+        so that they flag the owner as changed once done.
+
+        Args:
+            **kwargs(dict): Keyword arguments for the parent class.
+        """
+        super().__init_subclass__(**kwargs)
+        for name in cls._mutators:
+            setattr(cls, name, mutator(getattr(cls._base, name)))
+
+    def _changed(self):
+        """
+        Flags the owner of the container as changed in storage.
+        """
+        owner = self._owner
+        key = "{}.{}".format(type(owner).__name__, getattr(owner, "id", None))
+        models.storage.touch(key, owner, self._name)
+
+    def __reduce_ex__(self, protocol):
+        """
+        Copies and pickles the container as a plain container.
+
+        Args:
+            protocol (int): The pickle protocol.
+
+        Returns:
+            tuple: The built-in type and the arguments to build the copy.
+        """
+        return self._base, (self._base(self),)
+
+
+def mutator(method):
+    """
+    Returns a method calling a method of a built-in container and then
+    flagging the owner of the container as changed.
+
+    Args:
+        method (callable): The method of the built-in container.
+
+    Returns:
+        callable: The wrapping method.
+    """
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class TrackedList(Tracked, list):
+    """A list flagging its owner as changed when it is changed."""
+    __slots__ = ("_owner", "_name")
+    _base = list
+    _mutators = ("__setitem__", "__delitem__", "__iadd__", "__imul__",
+                 "append", "extend", "insert", "remove", "pop", "clear",
+                 "sort", "reverse")
+
+
+class TrackedDict(Tracked, dict):
+    """A dict flagging its owner as changed when it is changed."""
+    __slots__ = ("_owner", "_name")
+    _base = dict
+    _mutators = ("__setitem__", "__delitem__", "__ior__", "pop", "popitem",
+                 "clear", "update", "setdefault")
+
+
+class TrackedSet(Tracked, set):
+    """A set flagging its owner as changed when it is changed."""
+    __slots__ = ("_owner", "_name")
+    _base = set
+    _mutators = ("__ior__", "__iand__", "__isub__", "__ixor__", "add",
+                 "discard", "remove", "pop", "clear", "update",
+                 "difference_update", "intersection_update",
+                 "symmetric_difference_update")
+
+
+TRACKED_TYPES = {list: TrackedList, dict: TrackedDict, set: TrackedSet}
+
+
+def track(owner, name, value):
+    """
+    Returns the value to keep in an attribute of an instance: a list, dict
+    or set is copied into a tracked container belonging to the attribute,
+    unless it already is the container of the attribute; any other value
+    is returned as it is.
+
+    Containers nested in the value are not tracked; changing them in place
+    must be followed by setting the attribute again.
+
+    Args:
+        owner (BaseModel): The instance.
+        name (str): The name of the attribute.
+        value: The value.
+
+    Returns:
+        The value to keep.
+    """
+    if isinstance(value, Tracked):
+        if value._owner is owner and value._name == name:
+            return value
+        value = value._base(value)
+    kind = TRACKED_TYPES.get(type(value))
+    if kind is None:
+        return value
+    tracked = kind(value)
+    tracked._owner = owner
+    tracked._name = name
+    return tracked
+
+
+def adopt(owner, attrs):
+    """
+    Makes the tracked containers among the attributes of an instance,
+    copied from another instance, belong to the instance.
+
+    Args:
+        owner (BaseModel): The instance.
+        attrs (dict): The attributes of the instance, by name.
+    """
+    for name, value in attrs.items():
+        if isinstance(value, Tracked):
+            value._owner = owner
+            value._name = name
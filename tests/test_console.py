@@ -10,12 +10,21 @@ Unittest classes:
     TestHBNBCommand_all
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_count
+    TestHBNBCommand_compact
+    TestHBNBCommand_where
+    TestHBNBCommand_order
+    TestHBNBCommand_spatial
+    TestHBNBCommand_search
+    TestHBNBCommand_aggregate
+    TestHBNBCommand_batch
 """
 
 
 import os
 import console
 import json
+import models
 import sys
 import unittest
 from models import storage
@@ -115,7 +124,11 @@ class TestHBNBCommand_help(unittest.TestCase):
     def test_help(self):
         h = ("Documented commands (type help <topic>):\n"
              "========================================\n"
-             "EOF  all  count  create  destroy  help  quit  show  update")
+             "EOF        begin    count    explain  nearby   quit      show"
+             "    within\n"
+             "aggregate  commit   create   help     nearest  rollback"
+             "  update\n"
+             "all        compact  destroy  index    order    search    where")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
             self.assertEqual(h, output.getvalue().strip())
@@ -132,6 +145,13 @@ class TestHBNBCommand_exit(unittest.TestCase):
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertTrue(HBNBCommand().onecmd("EOF"))
 
+    def test_exit_saves_deferred_changes(self):
+        for command in ("quit", "EOF"):
+            with patch.object(storage, "close") as close:
+                with patch("sys.stdout", new=StringIO()):
+                    self.assertTrue(HBNBCommand().onecmd(command))
+                close.assert_called_once_with()
+
 
 class TestHBNBCommand_create(unittest.TestCase):
     """Unittests for testing create from the HBNB command interpreter."""
@@ -1124,10 +1144,32 @@ class TestHBNBCommand_count(unittest.TestCase):
         except IOError:
             pass
 
+    def test_count_missing_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("count"))
+            self.assertEqual("** class name missing **",
+                             output.getvalue().strip())
+
     def test_count_invalid_class(self):
+        correct = "** class doesn't exist **"
+        for command in ("MyModel.count()", "MyModel.count(x, 1)",
+                        "count MyModel"):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(correct, output.getvalue().strip())
+
+    def test_count_by_value(self):
+        for i in range(3):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            HBNBCommand().onecmd("update Place {} max_guest {}".format(
+                output.getvalue().strip(), i % 2))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("Place.count(max_guest, 0)"))
+            self.assertEqual("2", output.getvalue().strip())
         with patch("sys.stdout", new=StringIO()) as output:
-            self.assertFalse(HBNBCommand().onecmd("MyModel.count()"))
-            """self.assertEqual("0", output.getvalue().strip())"""
+            self.assertFalse(HBNBCommand().onecmd("Place.count(max_guest)"))
+            self.assertEqual("** value missing **", output.getvalue().strip())
 
     def test_count_object(self):
         with patch("sys.stdout", new=StringIO()) as output:
@@ -1167,5 +1209,416 @@ class TestHBNBCommand_count(unittest.TestCase):
             self.assertEqual("1", output.getvalue().strip())
 
 
+class TestHBNBCommand_compact(unittest.TestCase):
+    """Unittests for testing compact from the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        # The journal and its snapshot are those of FileStorage
+        patch.object(models, "storage", FileStorage()).start()
+        FileStorage._FileStorage__journal = True
+
+    def tearDown(self):
+        patch.stopall()
+        FileStorage._FileStorage__journal = False
+        for path in ("file.json", "file.json.log", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_compact_writes_snapshot(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+            testKey = "User.{}".format(output.getvalue().strip())
+        self.assertFalse(os.path.exists("file.json"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("compact"))
+            self.assertEqual("", output.getvalue().strip())
+        with open("file.json", "r") as f:
+            self.assertIn(testKey, json.load(f))
+        self.assertFalse(os.path.exists("file.json.log"))
+
+
+class TestHBNBCommand_where(unittest.TestCase):
+    """Unittests for testing where and explain from the HBNB command
+    interpreter."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.ids = []
+        for price in (40, 90, 150):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            self.ids.append(output.getvalue().strip())
+            HBNBCommand().onecmd("update Place {} price_by_night {}".format(
+                self.ids[-1], price))
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+
+    def test_where_missing_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("where"))
+            self.assertEqual("** class name missing **",
+                             output.getvalue().strip())
+
+    def test_where_invalid_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("MyModel.where(a == 1)"))
+            self.assertEqual("** class doesn't exist **",
+                             output.getvalue().strip())
+
+    def test_where_invalid_predicate(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("Place.where(max_guest)"))
+            self.assertEqual("** invalid predicate **",
+                             output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "Place.where(max_guest in 4)"))
+            self.assertEqual("** invalid predicate **",
+                             output.getvalue().strip())
+
+    def test_where_dot_notation(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "Place.where(price_by_night >= 50, price_by_night < 200)"))
+            result = output.getvalue().strip()
+        self.assertNotIn(self.ids[0], result)
+        self.assertIn(self.ids[1], result)
+        self.assertIn(self.ids[2], result)
+
+    def test_where_space_notation(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                'where Place id in ["{}"]'.format(self.ids[2])))
+            result = output.getvalue().strip()
+        self.assertNotIn(self.ids[0], result)
+        self.assertIn(self.ids[2], result)
+
+    def test_explain(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "Place.explain(price_by_night < 100)"))
+            self.assertEqual("scan Place (3 objects)",
+                             output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                'explain Place city_id == "c1"'))
+            self.assertEqual(
+                "hash index Place.city_id == 'c1' (0 of 3 objects)",
+                output.getvalue().strip())
+
+
+class TestHBNBCommand_order(unittest.TestCase):
+    """Unittests for testing index and order from the HBNB command
+    interpreter."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.ids = []
+        for price in (90, 40, 150):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            self.ids.append(output.getvalue().strip())
+            HBNBCommand().onecmd("update Place {} price_by_night {}".format(
+                self.ids[-1], price))
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__indexes["Place"].pop("price_by_night",
+                                                        None)
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+
+    def order(self, line):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(line))
+        result = output.getvalue()
+        return sorted([i for i in self.ids if i in result], key=result.find)
+
+    def test_order_dot_notation(self):
+        self.assertEqual([self.ids[1], self.ids[0], self.ids[2]],
+                         self.order("Place.order(price_by_night)"))
+        self.assertEqual([self.ids[2], self.ids[0]],
+                         self.order("Place.order(-price_by_night, 2)"))
+
+    def test_order_space_notation(self):
+        self.assertEqual([self.ids[1]],
+                         self.order("order Place price_by_night 1"))
+
+    def test_order_with_index(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "index Place price_by_night sorted"))
+            self.assertEqual("", output.getvalue().strip())
+        self.assertEqual([self.ids[1], self.ids[0]],
+                         self.order("Place.order(price_by_night, 2)"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "Place.explain(price_by_night > 50)"))
+            self.assertEqual(
+                "sorted index Place.price_by_night > 50 (2 of 3 objects)",
+                output.getvalue().strip())
+
+    def test_order_errors(self):
+        for line, correct in (
+                ("order", "** class name missing **"),
+                ("order MyModel", "** class doesn't exist **"),
+                ("Place.order()", "** attribute name missing **"),
+                ("Place.order(price_by_night, x)",
+                 "** limit must be a number **"),
+                ("index Place", "** attribute name missing **"),
+                ("index Place price_by_night bitmap",
+                 "** index kind doesn't exist **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(line))
+                self.assertEqual(correct, output.getvalue().strip())
+
+
+class TestHBNBCommand_spatial(unittest.TestCase):
+    """Unittests for testing within, nearby and nearest from the HBNB
+    command interpreter."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.ids = []
+        for lat, lon in ((37.7749, -122.4194), (37.8044, -122.2712),
+                         (48.8566, 2.3522)):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            self.ids.append(output.getvalue().strip())
+            HBNBCommand().onecmd("update Place {} latitude {}".format(
+                self.ids[-1], lat))
+            HBNBCommand().onecmd("update Place {} longitude {}".format(
+                self.ids[-1], lon))
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+
+    def search(self, line):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(line))
+        result = output.getvalue()
+        return sorted([i for i in self.ids if i in result], key=result.find)
+
+    def test_within(self):
+        self.assertEqual(self.ids[:2], sorted(
+            self.search("Place.within(37, -123, 38, -122)"),
+            key=self.ids.index))
+        self.assertEqual([self.ids[2]],
+                         self.search("within Place 48 2 49 3"))
+
+    def test_nearby(self):
+        self.assertEqual([self.ids[0]],
+                         self.search("Place.nearby(37.77, -122.42, 5)"))
+        self.assertEqual([self.ids[1], self.ids[0]],
+                         self.search("nearby Place 37.80 -122.27 50"))
+
+    def test_nearest(self):
+        self.assertEqual([self.ids[2]],
+                         self.search("Place.nearest(51.5, -0.12)"))
+        self.assertEqual([self.ids[2], self.ids[1], self.ids[0]],
+                         self.search("nearest Place 51.5 -0.12 3"))
+
+    def test_spatial_errors(self):
+        for line, correct in (
+                ("within", "** class name missing **"),
+                ("nearby MyModel", "** class doesn't exist **"),
+                ("Place.within(37, -123, 38)", "** coordinates missing **"),
+                ("Place.nearby(37, -123)", "** distance missing **"),
+                ("Place.nearest(37)", "** coordinates missing **"),
+                ("Place.nearest(37, x)",
+                 "** coordinates must be numbers **"),
+                ("Place.nearest(37, -123, x)",
+                 "** limit must be a number **"),
+                ("nearest User 37 -123", "** class has no spatial index **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(line))
+                self.assertEqual(correct, output.getvalue().strip())
+
+
+class TestHBNBCommand_search(unittest.TestCase):
+    """Unittests for testing search from the HBNB command interpreter."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.ids = []
+        for name in ("Beach house", "Mountain cabin", "Beachfront loft"):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            self.ids.append(output.getvalue().strip())
+            HBNBCommand().onecmd('update Place {} name "{}"'.format(
+                self.ids[-1], name))
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def search(self, line):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(line))
+        result = output.getvalue()
+        return sorted([i for i in self.ids if i in result], key=result.find)
+
+    def test_search_dot_notation(self):
+        self.assertEqual([self.ids[1]],
+                         self.search('Place.search("mountain")'))
+        self.assertEqual([self.ids[0], self.ids[2]], sorted(
+            self.search('Place.search("beach*")'), key=self.ids.index))
+
+    def test_search_space_notation(self):
+        self.assertEqual([self.ids[0]], self.search("search Place house"))
+        self.assertEqual({self.ids[0], self.ids[1]},
+                         set(self.search("search Place cabin house")))
+
+    def test_search_errors(self):
+        for line, correct in (
+                ("search", "** class name missing **"),
+                ("search MyModel beach", "** class doesn't exist **"),
+                ("Place.search()", "** query missing **"),
+                ("search User beach", "** class has no text index **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(line))
+                self.assertEqual(correct, output.getvalue().strip())
+
+
+class TestHBNBCommand_aggregate(unittest.TestCase):
+    """Unittests for testing aggregate from the HBNB command interpreter."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        for price, city_id in ((100, "c1"), (50, "c1"), (80, "c2")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("create Place")
+            HBNBCommand().onecmd("update Place {} price_by_night {}".format(
+                output.getvalue().strip(), price))
+            HBNBCommand().onecmd("update Place {} city_id {}".format(
+                output.getvalue().strip(), city_id))
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def aggregate(self, line):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(line))
+        return output.getvalue().strip()
+
+    def test_aggregate_dot_notation(self):
+        self.assertEqual("230", self.aggregate(
+            "Place.aggregate(sum, price_by_night)"))
+        self.assertEqual("{'c1': 75.0, 'c2': 80.0}", self.aggregate(
+            "Place.aggregate(avg, price_by_night, group_by=city_id)"))
+        self.assertEqual("{'c1': 2, 'c2': 1}", self.aggregate(
+            "Place.aggregate(count, group_by=city_id)"))
+
+    def test_aggregate_space_notation(self):
+        self.assertEqual("3", self.aggregate("aggregate Place count"))
+        self.assertEqual("80", self.aggregate(
+            "aggregate Place median price_by_night"))
+        self.assertEqual("{'c1': 100, 'c2': 80}", self.aggregate(
+            "aggregate Place max price_by_night group_by=city_id"))
+
+    def test_aggregate_errors(self):
+        for line, correct in (
+                ("aggregate", "** class name missing **"),
+                ("aggregate MyModel count", "** class doesn't exist **"),
+                ("Place.aggregate()", "** aggregate missing **"),
+                ("Place.aggregate(avg)", "** attribute name missing **"),
+                ("Place.aggregate(mode, price_by_night)",
+                 "** unknown aggregate **")):
+            self.assertEqual(correct, self.aggregate(line))
+
+
+class TestHBNBCommand_batch(unittest.TestCase):
+    """Unittests for testing begin, commit and rollback from the HBNB
+    command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        if storage.in_batch():
+            storage.rollback()
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def run_command(self, line):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(line))
+        return output.getvalue().strip()
+
+    def test_commit(self):
+        self.assertEqual("", self.run_command("begin"))
+        obj_id = self.run_command("create User")
+        self.run_command('update User {} first_name "Betty"'.format(obj_id))
+        self.assertFalse(os.path.exists("file.json"))
+        self.assertEqual("", self.run_command("commit"))
+        storage.clear()
+        storage.reload()
+        self.assertEqual("Betty", storage.get("User", obj_id).first_name)
+
+    def test_rollback(self):
+        obj_id = self.run_command("create User")
+        self.run_command("begin")
+        self.run_command('update User {} first_name "Betty"'.format(obj_id))
+        self.run_command("create State")
+        self.run_command("destroy User {}".format(obj_id))
+        self.assertEqual("", self.run_command("rollback"))
+        self.assertEqual("1", self.run_command("count User"))
+        self.assertEqual("0", self.run_command("count State"))
+        self.assertNotIn("Betty", self.run_command(
+            "show User {}".format(obj_id)))
+
+    def test_nested_begin(self):
+        self.run_command("begin")
+        self.assertEqual("** batch already open **",
+                         self.run_command("begin"))
+
+    def test_no_batch(self):
+        self.assertEqual("** no batch open **", self.run_command("commit"))
+        self.assertEqual("** no batch open **",
+                         self.run_command("rollback"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -132,8 +132,9 @@ class TestAmenity_save(unittest.TestCase):
         am = Amenity()
         am.save()
         amid = "Amenity." + am.id
-        with open("file.json", "r") as f:
-            self.assertIn(amid, f.read())
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn(amid, models.storage.all())
 
 
 class TestAmenity_to_dict(unittest.TestCase):
@@ -5,11 +5,14 @@ Unittest classes:
     TestBaseModel_instantiation
     TestBaseModel_save
     TestBaseModel_to_dict
+    TestBaseModel_registry
+    TestBaseModel_from_dict
 """
 
 import unittest
+from unittest.mock import patch
 import os
-from models.base_model import BaseModel
+from models.base_model import BaseModel, registry
 from models import storage
 from datetime import datetime
 from time import sleep
@@ -135,8 +138,20 @@ class TestBaseModel_save(unittest.TestCase):
         bm = BaseModel()
         bm.save()
         bmid = "BaseModel." + bm.id
-        with open("file.json", "r") as f:
-            self.assertIn(bmid, f.read())
+        storage.clear()
+        storage.reload()
+        self.assertIn(bmid, storage.all())
+
+    def test_save_after_delete(self):
+        bm = BaseModel()
+        storage.delete(bm)
+        storage.save()
+        bm.save()
+        bmid = "BaseModel." + bm.id
+        self.assertNotIn(bmid, storage.all())
+        storage.clear()
+        storage.reload()
+        self.assertNotIn(bmid, storage.all())
 
 
 class TestBaseModel_to_dict(unittest.TestCase):
@@ -166,6 +181,18 @@ class TestBaseModel_to_dict(unittest.TestCase):
         self.assertEqual(str, type(bm_dict["created_at"]))
         self.assertEqual(str, type(bm_dict["updated_at"]))
 
+    def test_to_dict_epoch_timestamps(self):
+        bm = BaseModel()
+        bm_dict = bm.to_dict(timestamps="epoch")
+        self.assertEqual(int, type(bm_dict["created_at"]))
+        self.assertEqual(bm.to_dict()["id"], bm_dict["id"])
+        self.assertEqual(bm.created_at, BaseModel(**bm_dict).created_at)
+        self.assertEqual(bm.updated_at, BaseModel(**bm_dict).updated_at)
+
+    def test_to_dict_unknown_timestamps(self):
+        with self.assertRaises(ValueError):
+            BaseModel().to_dict(timestamps="binary")
+
     def test_to_dict_output(self):
         dt = datetime.today()
         bm = BaseModel()
@@ -189,5 +216,62 @@ class TestBaseModel_to_dict(unittest.TestCase):
             bm.to_dict(None)
 
 
+class TestBaseModel_registry(unittest.TestCase):
+    """Unittests for testing the registry of model classes."""
+
+    def test_models_registered(self):
+        from models.place import Place
+        from models.review import Review
+        self.assertIs(BaseModel, registry["BaseModel"])
+        self.assertIs(Place, registry["Place"])
+        self.assertIs(Review, registry["Review"])
+
+    def test_subclass_registered(self):
+        class Booking(BaseModel):
+            pass
+        try:
+            self.assertIs(Booking, registry["Booking"])
+        finally:
+            del registry["Booking"]
+
+
+class TestBaseModel_from_dict(unittest.TestCase):
+    """Unittests for testing the from_dict class method of the BaseModel
+    class."""
+
+    def setUp(self):
+        self.bm = BaseModel()
+        self.bm.name = "Holberton"
+        self.bm_dict = self.bm.to_dict()
+
+    def test_from_dict_round_trip(self):
+        bm = BaseModel.from_dict(self.bm_dict)
+        self.assertEqual(BaseModel, type(bm))
+        self.assertEqual(self.bm.__dict__, bm.__dict__)
+        self.assertEqual(self.bm_dict, bm.to_dict())
+
+    def test_from_dict_epoch_timestamps(self):
+        bm = BaseModel.from_dict(self.bm.to_dict(timestamps="epoch"))
+        self.assertEqual(self.bm.created_at, bm.created_at)
+        self.assertEqual(self.bm.updated_at, bm.updated_at)
+
+    def test_from_dict_leaves_argument(self):
+        BaseModel.from_dict(self.bm_dict)
+        self.assertEqual("BaseModel", self.bm_dict["__class__"])
+        self.assertEqual(str, type(self.bm_dict["created_at"]))
+
+    def test_from_dict_generates_nothing(self):
+        with patch("models.base_model.uuid4") as uuid4, \
+                patch("models.base_model.datetime") as clock:
+            BaseModel.from_dict(self.bm_dict)
+        uuid4.assert_not_called()
+        clock.now.assert_not_called()
+
+    def test_from_dict_not_stored(self):
+        self.bm_dict["id"] = "from-dict"
+        BaseModel.from_dict(self.bm_dict)
+        self.assertNotIn("BaseModel.from-dict", storage.all())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -137,8 +137,9 @@ class TestCity_save(unittest.TestCase):
         cy = City()
         cy.save()
         cyid = "City." + cy.id
-        with open("file.json", "r") as f:
-            self.assertIn(cyid, f.read())
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn(cyid, models.storage.all())
 
 
 class TestCity_to_dict(unittest.TestCase):
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+"""Defines unittests for models/compact_model.py.
+
+Unittest classes:
+    TestCompactModel_compact
+    TestCompactModel_instances
+    TestCompactModel_storage
+"""
+import os
+import unittest
+from datetime import datetime
+from io import StringIO
+from unittest.mock import patch
+import models
+from console import HBNBCommand
+from models.base_model import BaseModel, registry
+from models.compact_model import CompactModel, compact, use_compact_models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+CompactPlace = compact(Place)
+
+
+class TestCompactModel_compact(unittest.TestCase):
+    """Unittests for testing the compact function."""
+
+    def test_compact_class(self):
+        self.assertEqual("Place", CompactPlace.__name__)
+        self.assertTrue(issubclass(CompactPlace, CompactModel))
+        self.assertNotIn(Place, CompactPlace.__mro__)
+        self.assertIs(Place, CompactPlace._model)
+        self.assertIn("price_by_night", CompactPlace.__slots__)
+        self.assertEqual([], CompactPlace._defaults["amenity_ids"])
+
+    def test_compact_base_model(self):
+        self.assertEqual((), compact(BaseModel).__slots__)
+
+    def test_use_compact_models(self):
+        saved = dict(registry)
+        try:
+            use_compact_models()
+            self.assertEqual(set(saved), set(registry))
+            for name, cls in registry.items():
+                self.assertTrue(issubclass(cls, CompactModel))
+                self.assertEqual(name, cls.__name__)
+        finally:
+            registry.clear()
+            registry.update(saved)
+
+
+class TestCompactModel_instances(unittest.TestCase):
+    """Unittests for testing instances of compact model classes."""
+
+    def setUp(self):
+        self.pl = CompactPlace()
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.pl, "__dict__"))
+
+    def test_new_instance(self):
+        self.assertEqual(str, type(self.pl.id))
+        self.assertEqual(datetime, type(self.pl.created_at))
+        self.assertEqual(self.pl.created_at, self.pl.updated_at)
+        self.assertIs(self.pl, models.storage.get(Place, self.pl.id))
+
+    def test_defaults(self):
+        self.assertEqual("", self.pl.name)
+        self.assertEqual(0, self.pl.price_by_night)
+        self.assertNotIn("name", self.pl.to_dict())
+
+    def test_mutable_defaults_not_shared(self):
+        self.pl.amenity_ids.append("a1")
+        self.assertEqual([], CompactPlace().amenity_ids)
+        self.assertEqual(["a1"], self.pl.amenity_ids)
+
+    def test_declared_and_extra_attributes(self):
+        self.pl.name = "Loft"
+        self.pl.pets_allowed = True
+        self.assertEqual("Loft", self.pl.name)
+        self.assertTrue(self.pl.pets_allowed)
+        with self.assertRaises(AttributeError):
+            self.pl.garden
+
+    def test_to_dict(self):
+        self.pl.name = "Loft"
+        self.pl.pets_allowed = True
+        pl_dict = self.pl.to_dict()
+        self.assertEqual("Place", pl_dict["__class__"])
+        self.assertEqual("Loft", pl_dict["name"])
+        self.assertTrue(pl_dict["pets_allowed"])
+        self.assertEqual(self.pl.created_at.isoformat(),
+                         pl_dict["created_at"])
+        self.assertEqual(int, type(
+            self.pl.to_dict(timestamps="epoch")["updated_at"]))
+
+    def test_to_dict_matches_base_model(self):
+        pl = Place(name="Loft", max_guest=3, pets_allowed=True)
+        compact_pl = CompactPlace.from_dict(pl.to_dict())
+        self.assertEqual(pl.to_dict(), compact_pl.to_dict())
+        self.assertEqual(str(pl), str(compact_pl))
+
+    def test_from_dict_round_trip(self):
+        self.pl.name = "Loft"
+        self.pl.pets_allowed = True
+        other = CompactPlace.from_dict(self.pl.to_dict())
+        self.assertEqual(self.pl.to_dict(), other.to_dict())
+        self.assertEqual(self.pl.created_at, other.created_at)
+
+    def test_str(self):
+        self.pl.name = "Loft"
+        attrs = {"id": self.pl.id, "created_at": self.pl.created_at,
+                 "updated_at": self.pl.updated_at, "name": "Loft"}
+        self.assertEqual("[Place] ({}) {}".format(self.pl.id, attrs),
+                         str(self.pl))
+
+    def test_save(self):
+        updated_at = self.pl.updated_at
+        self.pl.save()
+        self.assertLess(updated_at, self.pl.updated_at)
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+
+
+class TestCompactModel_storage(unittest.TestCase):
+    """Unittests for testing compact instances in storage and the
+    console."""
+
+    def setUp(self):
+        self.saved = dict(registry)
+        use_compact_models()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        registry.clear()
+        registry.update(self.saved)
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def test_model_classes_build_compact_instances(self):
+        pl = Place(name="Loft")
+        self.assertIsInstance(pl, CompactModel)
+        self.assertIsInstance(pl, Place)
+        self.assertIsInstance(pl, BaseModel)
+        self.assertNotIsInstance(pl, User)
+        self.assertTrue(issubclass(registry["Place"], Place))
+        self.assertIs(pl, models.storage.get(Place, pl.id))
+        self.assertIsInstance(Place.from_dict(pl.to_dict()), CompactModel)
+
+    def test_model_classes_after_switch_back(self):
+        registry["Place"] = Place
+        pl = Place()
+        self.assertNotIsInstance(pl, CompactModel)
+        self.assertEqual(Place, type(pl))
+
+    def test_reading_default_is_not_a_change(self):
+        pl = Place()
+        models.storage.save()
+        self.assertEqual([], pl.amenity_ids)
+        self.assertNotIn("Place." + pl.id, models.storage.changes())
+
+    def test_reload_builds_compact_instances(self):
+        pl = registry["Place"](name="Loft")
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        reloaded = models.storage.get(Place, pl.id)
+        self.assertIsInstance(reloaded, CompactModel)
+        self.assertIsInstance(reloaded, Place)
+        self.assertEqual("Loft", reloaded.name)
+
+    def test_indexes_follow_changes(self):
+        pl = registry["Place"]()
+        pl.price_by_night = 90
+        self.assertEqual([pl], list(models.storage.query(
+            Place, ("price_by_night", "==", 90)).values()))
+        pl.description = "Quiet loft"
+        self.assertEqual([pl], list(models.storage.search(
+            Place, "loft").values()))
+
+    def test_save_default_changed_in_place(self):
+        pl = registry["Place"]()
+        models.storage.save()
+        pl.amenity_ids.append("wifi")
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["wifi"],
+                         models.storage.get(Place, pl.id).amenity_ids)
+
+    def test_rollback_restores_in_place(self):
+        pl = registry["Place"](name="Loft")
+        models.storage.save()
+        models.storage.begin()
+        pl.name = "Barn"
+        pl.rooms = 3
+        models.storage.rollback()
+        self.assertIs(pl, models.storage.get(Place, pl.id))
+        self.assertEqual("Loft", pl.name)
+        self.assertFalse(hasattr(pl, "rooms"))
+
+    def test_console_create_and_update(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create User")
+        user_id = output.getvalue().strip()
+        user = models.storage.get(User, user_id)
+        self.assertIsInstance(user, CompactModel)
+        HBNBCommand().onecmd('update User {} first_name "Betty"'.format(
+            user_id))
+        HBNBCommand().onecmd("User.update({}, {{'age': 30}})".format(
+            user_id))
+        self.assertEqual("Betty", user.first_name)
+        self.assertEqual(30, user.age)
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("show User {}".format(user_id))
+        self.assertIn("'first_name': 'Betty'", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
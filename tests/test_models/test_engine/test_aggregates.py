@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/aggregates.py.
+
+Unittest classes:
+    TestAggregates_check_aggregate
+    TestAggregates_percentile
+    TestAggregate
+"""
+import unittest
+from models.engine.aggregates import Aggregate, check_aggregate
+from models.engine.aggregates import percentile, percentile_of
+
+
+class TestAggregates_check_aggregate(unittest.TestCase):
+    """Unittests for testing the check_aggregate function."""
+
+    def test_valid_aggregates(self):
+        check_aggregate("count", None)
+        for op in ("sum", "avg", "min", "max", "median", "p90", "p99.9"):
+            check_aggregate(op, "price_by_night")
+
+    def test_unknown_aggregate(self):
+        for op in ("mode", "p101", "p", "P50"):
+            with self.assertRaises(ValueError):
+                check_aggregate(op, "price_by_night")
+
+    def test_needs_attribute(self):
+        with self.assertRaises(ValueError):
+            check_aggregate("sum", None)
+
+
+class TestAggregates_percentile(unittest.TestCase):
+    """Unittests for testing the percentile functions."""
+
+    def test_percentile_of(self):
+        self.assertEqual(50.0, percentile_of("median"))
+        self.assertEqual(99.5, percentile_of("p99.5"))
+        self.assertIsNone(percentile_of("avg"))
+
+    def test_percentile(self):
+        values = [10, 20, 30, 40]
+        self.assertEqual(10, percentile(values, 0))
+        self.assertEqual(40, percentile(values, 100))
+        self.assertEqual(25.0, percentile(values, 50))
+        self.assertAlmostEqual(37.0, percentile(values, 90))
+        self.assertEqual(30, percentile([10, 30, 50], 50))
+        self.assertIsNone(percentile([], 50))
+
+
+class TestAggregate(unittest.TestCase):
+    """Unittests for testing the Aggregate class."""
+
+    def aggregate(self, op, values):
+        running = Aggregate(op)
+        for value in values:
+            running.add(value)
+        return running.result()
+
+    def test_aggregates(self):
+        values = [3, "x", 1.5, None, 4, True]
+        self.assertEqual(4, self.aggregate("count", values))
+        self.assertEqual(9.5, self.aggregate("sum", values))
+        self.assertEqual(9.5 / 4, self.aggregate("avg", values))
+        self.assertEqual(1, self.aggregate("min", values))
+        self.assertEqual(4, self.aggregate("max", values))
+        self.assertEqual(2.25, self.aggregate("median", values))
+
+    def test_no_values(self):
+        self.assertEqual(0, self.aggregate("count", []))
+        self.assertEqual(0, self.aggregate("sum", ["x"]))
+        for op in ("avg", "min", "max", "p90"):
+            self.assertIsNone(self.aggregate(op, []))
+
+    def test_count_objects(self):
+        running = Aggregate("count", numbers=False)
+        for value in (None, "x", 1):
+            running.add(value)
+        self.assertEqual(3, running.result())
+
+
+if __name__ == "__main__":
+    unittest.main()
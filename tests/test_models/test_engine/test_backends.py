@@ -0,0 +1,363 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/backends.py and
+models/engine/base_storage.py, and the conformance tests every storage
+engine registered in BACKENDS must pass.
+
+Unittest classes:
+    TestBackends_selection
+    TestBackends_defaults
+    TestConformance_<name>, one per registered storage engine
+"""
+import os
+import unittest
+from io import StringIO
+from unittest.mock import patch
+import models
+from console import HBNBCommand
+from models.base_model import BaseModel, registry
+from models.engine import backends
+from models.engine.backends import BACKENDS, create_storage
+from models.engine.backends import register_backend
+from models.engine.base_storage import BaseStorage
+from models.engine.file_storage import FileStorage
+from models.engine.query import matches
+from models.place import Place
+from models.state import State
+from models.user import User
+
+FILES = ("file.json", "file.json.log", "file.json.text", "file.db",
+         "file.db-wal", "file.db-shm")
+
+
+class TestBackends_selection(unittest.TestCase):
+    """Unittests for testing the selection of storage engines."""
+
+    def test_backends_implement_interface(self):
+        for cls in BACKENDS.values():
+            self.assertTrue(issubclass(cls, BaseStorage))
+
+    def test_create_storage(self):
+        self.assertIs(FileStorage, type(create_storage()))
+        self.assertIs(FileStorage, type(create_storage("file")))
+
+    def test_create_unknown_storage(self):
+        with self.assertRaises(ValueError):
+            create_storage("nosql")
+
+    def test_register_backend(self):
+        class MemoryStorage(FileStorage):
+            pass
+
+        try:
+            register_backend("memory", MemoryStorage)
+            self.assertIs(MemoryStorage, type(create_storage("memory")))
+        finally:
+            BACKENDS.pop("memory", None)
+
+    def test_register_non_storage(self):
+        with self.assertRaises(TypeError):
+            register_backend("dict", dict)
+        self.assertNotIn("dict", backends.BACKENDS)
+
+    def test_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            BaseStorage()
+
+
+class MemoryStorage(BaseStorage):
+    """A storage engine implementing only the abstract methods of
+    BaseStorage, keeping the saved objects in a dictionary."""
+
+    def __init__(self):
+        self.objects = {}
+        self.saved = {}
+
+    def all(self, cls=None):
+        name = cls if cls is None or isinstance(cls, str) else cls.__name__
+        return {key: obj for key, obj in self.objects.items()
+                if name is None or key.startswith(name + ".")}
+
+    def new(self, obj):
+        self.objects["{}.{}".format(type(obj).__name__, obj.id)] = obj
+
+    def save(self):
+        self.saved = {key: obj.to_dict()
+                      for key, obj in self.objects.items()}
+
+    def reload(self):
+        self.objects = {key: registry[record["__class__"]].from_dict(record)
+                        for key, record in self.saved.items()}
+
+    def delete(self, obj=None):
+        if obj is not None:
+            self.objects.pop("{}.{}".format(type(obj).__name__, obj.id),
+                             None)
+
+    def get(self, cls, obj_id):
+        return {obj.id: obj for obj in self.all(cls).values()}.get(obj_id)
+
+    def count(self, cls=None, **values):
+        return len([obj for obj in self.all(cls).values()
+                    if matches(obj, [(field, "==", value)
+                                     for field, value in values.items()])])
+
+    def query(self, cls, *predicates):
+        return {key: obj for key, obj in self.all(cls).items()
+                if matches(obj, predicates)}
+
+
+class TestBackends_defaults(unittest.TestCase):
+    """Unittests for testing a storage engine implementing only the
+    abstract methods of BaseStorage."""
+
+    def setUp(self):
+        self.storage = MemoryStorage()
+        patch.object(models, "storage", self.storage).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_models(self):
+        pl = Place()
+        pl.name = "Loft"
+        pl.save()
+        self.assertIs(pl, self.storage.get(Place, pl.id))
+        self.assertEqual("Loft", self.storage.saved["Place." + pl.id]["name"])
+        self.storage.reload()
+        self.assertEqual("Loft", self.storage.get(Place, pl.id).name)
+        self.storage.clear()
+        self.assertEqual({}, self.storage.all())
+        self.assertIn("Place." + pl.id, self.storage.saved)
+
+    def test_batch(self):
+        self.assertFalse(self.storage.in_batch())
+        with self.storage.batch():
+            st = State(name="Utah")
+            self.assertFalse(self.storage.in_batch())
+        self.assertIn("State." + st.id, self.storage.saved)
+        self.storage.begin()
+        self.storage.rollback()
+        self.storage.compact(wait=True)
+        self.storage.close()
+
+    def test_console(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create User")
+            user_id = output.getvalue().strip()
+            HBNBCommand().onecmd("begin")
+            HBNBCommand().onecmd("commit")
+            HBNBCommand().onecmd("compact")
+        self.assertIn("User." + user_id, self.storage.saved)
+        self.assertEqual(user_id + "\n** no batch open **\n",
+                         output.getvalue())
+
+    def test_scans(self):
+        for i in range(3):
+            Place(city_id="c{}".format(i % 2), price_by_night=50 * i)
+        self.assertEqual("scan Place (3 objects)", self.storage.explain(
+            Place, ("city_id", "==", "c0")))
+        self.assertIsNone(self.storage.create_index(Place, "city_id"))
+        self.assertEqual([100, 50], [pl.price_by_night for pl in
+                                     self.storage.order_by(
+                                         Place, "price_by_night", 2,
+                                         reverse=True)])
+        self.assertEqual({"c0": 2, "c1": 1}, self.storage.aggregate(
+            Place, "count", None, "city_id"))
+        self.assertEqual(50, self.storage.aggregate(Place, "avg",
+                                                    "price_by_night"))
+        with self.assertRaises(ValueError):
+            self.storage.search(Place, "loft")
+        with self.assertRaises(ValueError):
+            self.storage.nearest(Place, 0, 0)
+
+    def test_console_queries(self):
+        Place(name="Loft", price_by_night=80)
+        with patch("sys.stdout", new=StringIO()) as output:
+            for command in ('Place.explain(price_by_night < 100)',
+                            'Place.aggregate(count)',
+                            'index Place price_by_night sorted',
+                            'Place.order(price_by_night)',
+                            'Place.search("loft")',
+                            'Place.within(0, 0, 1, 1)',
+                            'Place.nearby(0, 0, 5)',
+                            'Place.nearest(0, 0)'):
+                self.assertFalse(HBNBCommand().onecmd(command))
+        lines = output.getvalue().splitlines()
+        self.assertEqual("scan Place (1 objects)", lines[0])
+        self.assertEqual("1", lines[1])
+        self.assertIn("Loft", lines[2])
+        self.assertEqual(["** class has no text index **"] +
+                         ["** class has no spatial index **"] * 3,
+                         lines[3:])
+
+
+class StorageConformance:
+    """Conformance tests for the storage engine registered under the name
+    in the backend attribute."""
+    backend = None
+
+    def setUp(self):
+        for path in FILES:
+            try:
+                os.rename(path, path + ".tmp")
+            except IOError:
+                pass
+        self.storage = create_storage(self.backend)
+        self.storage.clear()
+        patch.object(models, "storage", self.storage).start()
+        self.places = []
+        for i in range(5):
+            pl = Place()
+            pl.name = "Place {}".format(i)
+            pl.price_by_night = 50 * i
+            pl.city_id = "c{}".format(i % 2)
+            self.places.append(pl)
+        self.user = User()
+
+    def tearDown(self):
+        self.storage.close()
+        self.storage.clear()
+        patch.stopall()
+        for path in FILES:
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+            try:
+                os.rename(path + ".tmp", path)
+            except IOError:
+                pass
+
+    def keys(self, *indices):
+        return {"Place." + self.places[i].id for i in indices}
+
+    def round_trip(self):
+        self.storage.save()
+        self.storage.clear()
+        self.storage.reload()
+
+    def test_is_storage(self):
+        self.assertIsInstance(self.storage, BaseStorage)
+
+    def test_new_and_all(self):
+        st = State()
+        self.storage.new(st)
+        self.assertIs(st, self.storage.all()["State." + st.id])
+        self.assertEqual(self.keys(0, 1, 2, 3, 4),
+                         set(self.storage.all(Place)))
+        self.assertEqual({}, self.storage.all("MyModel"))
+
+    def test_get(self):
+        self.assertIs(self.places[2], self.storage.get(Place,
+                                                       self.places[2].id))
+        self.assertIs(self.user, self.storage.get("User", self.user.id))
+        self.assertIsNone(self.storage.get(Place, "missing"))
+
+    def test_count(self):
+        self.assertEqual(6, self.storage.count())
+        self.assertEqual(5, self.storage.count(Place))
+        self.assertEqual(3, self.storage.count(Place, city_id="c0"))
+        self.assertEqual(0, self.storage.count(BaseModel))
+
+    def test_query(self):
+        self.assertEqual(self.keys(1, 3), set(self.storage.query(
+            Place, ("city_id", "==", "c1"))))
+        self.assertEqual(self.keys(0, 2), set(self.storage.query(
+            Place, ("price_by_night", "<", 150), ("city_id", "==", "c0"))))
+        self.assertEqual(self.keys(1, 4), set(self.storage.query(
+            Place, ("name", "in", ["Place 1", "Place 4"]))))
+        self.assertEqual(set(), set(self.storage.query(
+            Place, ("price_by_night", ">", 1000))))
+
+    def test_query_follows_changes(self):
+        self.places[0].price_by_night = 500
+        self.assertEqual(self.keys(0), set(self.storage.query(
+            Place, ("price_by_night", ">=", 500))))
+
+    def test_delete(self):
+        self.storage.delete(self.places[1])
+        self.storage.delete(None)
+        self.assertNotIn("Place." + self.places[1].id, self.storage.all())
+        self.assertIsNone(self.storage.get(Place, self.places[1].id))
+        self.assertEqual(4, self.storage.count(Place))
+        self.assertEqual(self.keys(3), set(self.storage.query(
+            Place, ("city_id", "==", "c1"))))
+
+    def test_save_and_reload(self):
+        before = {key: obj.to_dict()
+                  for key, obj in self.storage.all().items()}
+        self.round_trip()
+        after = {key: obj.to_dict()
+                 for key, obj in self.storage.all().items()}
+        self.assertEqual(before, after)
+        self.assertEqual(3, self.storage.count(Place, city_id="c0"))
+
+    def test_save_changes_and_reload(self):
+        self.round_trip()
+        self.storage.get(Place, self.places[0].id).name = "Loft"
+        self.storage.delete(self.storage.get(User, self.user.id))
+        st = State(name="California")
+        self.round_trip()
+        self.assertEqual("Loft", self.storage.get(
+            Place, self.places[0].id).name)
+        self.assertIsNone(self.storage.get(User, self.user.id))
+        self.assertEqual("California", self.storage.get(
+            State, st.id).name)
+        self.assertEqual(6, self.storage.count())
+
+    def test_batch_commit(self):
+        with self.storage.batch():
+            st = State(name="California")
+            st.save()
+            self.places[0].name = "Loft"
+            self.places[0].save()
+        self.round_trip()
+        self.assertEqual("California", self.storage.get(State, st.id).name)
+        self.assertEqual("Loft", self.storage.get(
+            Place, self.places[0].id).name)
+
+    def test_batch_rollback(self):
+        self.storage.save()
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                State().save()
+                self.places[0].name = "Loft"
+                self.places[0].save()
+                self.storage.delete(self.user)
+                raise RuntimeError
+        self.assertEqual(6, self.storage.count())
+        self.assertEqual("Place 0", self.storage.get(
+            Place, self.places[0].id).name)
+        self.assertEqual(3, self.storage.count(Place, city_id="c0"))
+        self.round_trip()
+        self.assertEqual(6, self.storage.count())
+        self.assertEqual("Place 0", self.storage.get(
+            Place, self.places[0].id).name)
+
+    def test_reload_without_save(self):
+        self.storage.clear()
+        self.storage.reload()
+        self.assertEqual({}, self.storage.all())
+
+    def test_clear(self):
+        self.storage.save()
+        Place()
+        self.storage.clear()
+        self.assertEqual({}, self.storage.all())
+        self.assertEqual(0, self.storage.count(Place))
+        self.assertIsNone(self.storage.get(Place, self.places[0].id))
+        self.storage.reload()
+        self.assertEqual(6, self.storage.count())
+
+
+for name in BACKENDS:
+    globals()["TestConformance_" + name] = type(
+        "TestConformance_" + name, (StorageConformance, unittest.TestCase),
+        {"backend": name,
+         "__doc__": "Conformance tests for the {} storage engine.".format(
+             name)})
+del name
+
+
+if __name__ == "__main__":
+    unittest.main()
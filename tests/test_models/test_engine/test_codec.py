@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/codec.py.
+
+Unittest classes:
+    TestCodec_encode_timestamp
+    TestCodec_decode_timestamp
+"""
+import unittest
+from datetime import datetime
+from models.engine.codec import decode_timestamp, encode_timestamp
+
+
+class TestCodec_encode_timestamp(unittest.TestCase):
+    """Unittests for testing encode_timestamp."""
+
+    def setUp(self):
+        self.dt = datetime(2017, 9, 28, 21, 5, 54, 119427)
+
+    def test_iso(self):
+        self.assertEqual("2017-09-28T21:05:54.119427",
+                         encode_timestamp(self.dt))
+        self.assertEqual(self.dt.isoformat(),
+                         encode_timestamp(self.dt, "iso"))
+
+    def test_epoch(self):
+        self.assertEqual(0, encode_timestamp(datetime(1970, 1, 1), "epoch"))
+        self.assertEqual(1506632754119427,
+                         encode_timestamp(self.dt, "epoch"))
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            encode_timestamp(self.dt, "binary")
+
+
+class TestCodec_decode_timestamp(unittest.TestCase):
+    """Unittests for testing decode_timestamp."""
+
+    def test_round_trips(self):
+        for dt in (datetime(2017, 9, 28, 21, 5, 54, 119427),
+                   datetime(2017, 9, 28, 21, 5, 54),
+                   datetime(1901, 1, 1, 0, 0, 0, 1),
+                   datetime.now()):
+            for codec in ("iso", "epoch"):
+                self.assertEqual(dt, decode_timestamp(
+                    encode_timestamp(dt, codec)))
+
+    def test_legacy_strings(self):
+        self.assertEqual(datetime(2017, 9, 28, 21, 5, 54, 119427),
+                         decode_timestamp("2017-09-28T21:05:54.119427"))
+        self.assertEqual(datetime(2017, 9, 28, 21, 5, 54),
+                         decode_timestamp("2017-09-28T21:05:54"))
+
+    def test_datetime_unchanged(self):
+        dt = datetime.now()
+        self.assertIs(dt, decode_timestamp(dt))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            decode_timestamp("yesterday")
+        for value in (None, 1.5, True, []):
+            with self.assertRaises(TypeError):
+                decode_timestamp(value)
+
+
+if __name__ == "__main__":
+    unittest.main()
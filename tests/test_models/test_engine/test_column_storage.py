@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/column_storage.py.
+
+Unittest classes:
+    TestColumnStorage
+"""
+import os
+import unittest
+from unittest.mock import patch
+import models
+from models.base_model import registry
+from models.engine.column_storage import ColumnStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class TestColumnStorage(unittest.TestCase):
+    """Unittests for testing the ColumnStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = ColumnStorage()
+        patch.object(models, "storage", self.storage).start()
+        self.places = []
+        for i in range(6):
+            pl = Place()
+            pl.price_by_night = 50 * i
+            pl.max_guest = i
+            pl.city_id = "c{}".format(i % 2)
+            self.places.append(pl)
+        User()
+
+    def tearDown(self):
+        patch.stopall()
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def keys(self, *indices):
+        return {"Place." + self.places[i].id for i in indices}
+
+    def test_is_file_storage(self):
+        self.assertIsInstance(self.storage, FileStorage)
+
+    def test_column_tables(self):
+        for class_name in registry:
+            self.assertEqual("column", self.storage.index(
+                class_name, "columns").kind)
+
+    def test_own_indexes(self):
+        storage = FileStorage()
+        self.assertIsNone(storage.index(Place, "columns"))
+        self.assertIsNot(storage.index(Place, "city_id"),
+                         self.storage.index(Place, "city_id"))
+
+    def test_query(self):
+        objs = self.storage.query(Place, ("max_guest", ">=", 2),
+                                  ("price_by_night", "<", 200))
+        self.assertEqual(self.keys(2, 3), set(objs))
+
+    def test_query_with_other_attributes(self):
+        self.places[2].name = "loft"
+        objs = self.storage.query(Place, ("max_guest", ">=", 2),
+                                  ("name", "==", "loft"))
+        self.assertEqual(self.keys(2), set(objs))
+
+    def test_query_follows_changes(self):
+        self.places[0].max_guest = 10
+        self.storage.delete(self.places[5])
+        objs = self.storage.query(Place, ("max_guest", ">", 3))
+        self.assertEqual(self.keys(0, 4), set(objs))
+
+    def test_explain(self):
+        self.assertEqual(
+            "column filter Place on max_guest (6 objects)",
+            self.storage.explain(Place, ("max_guest", "<", 2)))
+        self.assertTrue(self.storage.explain(
+            Place, ("city_id", "==", "c1"),
+            ("max_guest", "<", 2)).startswith("hash index"))
+        self.assertTrue(self.storage.explain(
+            Place, ("name", "==", "")).startswith("scan"))
+
+    def test_aggregate(self):
+        self.assertEqual({"c0": 100.0, "c1": 150.0}, self.storage.aggregate(
+            Place, "avg", "price_by_night", "city_id"))
+        self.assertEqual(6, self.storage.aggregate("Place", "count"))
+        self.assertEqual(5, self.storage.aggregate(Place, "max",
+                                                   "max_guest"))
+
+    def test_aggregate_other_attributes(self):
+        self.places[1].rating = 4
+        self.places[2].rating = 2
+        self.assertEqual(3.0, self.storage.aggregate(Place, "avg",
+                                                     "rating"))
+        self.assertEqual({"c0": 100, "c1": 150}, self.storage.aggregate(
+            Place, "median", "price_by_night", "city_id"))
+
+    def test_aggregate_inexact_values(self):
+        self.places[1].city_id = 123
+        self.places[3].price_by_night = 2 ** 53 + 1
+        self.assertEqual({"c0": 3, "c1": 2, 123: 1}, self.storage.aggregate(
+            Place, "count", None, "city_id"))
+        self.assertEqual(2 ** 53 + 1, self.storage.aggregate(
+            Place, "max", "price_by_night"))
+
+    def test_reload(self):
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(250, self.storage.aggregate(Place, "max",
+                                                     "price_by_night"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/columns.py.
+
+Unittest classes:
+    TestColumnTable_columns
+    TestColumnTable_filter
+    TestColumnTable_aggregate
+"""
+import random
+import unittest
+from unittest.mock import patch
+from models.place import Place
+from models.engine import columns
+from models.engine.columns import ColumnTable
+from models.engine.query import matches
+
+
+def make_place(price, city_id, latitude=0.0):
+    pl = Place.from_dict({"__class__": "Place", "id": str(random.random()),
+                          "created_at": "2024-01-01T00:00:00",
+                          "updated_at": "2024-01-01T00:00:00"})
+    pl.price_by_night = price
+    pl.city_id = city_id
+    pl.latitude = latitude
+    return pl
+
+
+class TestColumnTable_columns(unittest.TestCase):
+    """Unittests for testing the columns of the ColumnTable class."""
+
+    def test_columns_of_place(self):
+        table = ColumnTable("Place")
+        self.assertIn("price_by_night", table.numeric)
+        self.assertIn("latitude", table.numeric)
+        self.assertEqual(("city_id", "user_id"), table.strings)
+        self.assertNotIn("name", table.fields)
+        self.assertNotIn("amenity_ids", table.fields)
+
+    def test_columns_of_unknown_class(self):
+        self.assertEqual((), ColumnTable("Nothing").fields)
+
+    def test_estimate(self):
+        self.assertIsNone(ColumnTable("Place").estimate("==", 1))
+
+    def test_remove_reuses_row(self):
+        table = ColumnTable("Place")
+        table.add("a", make_place(10, "c1"))
+        table.add("b", make_place(20, "c2"))
+        table.remove("a")
+        table.remove("missing")
+        table.add("c", make_place(30, "c1"))
+        self.assertEqual(2, table.aggregate("count"))
+        self.assertEqual(50, table.aggregate("sum", "price_by_night"))
+
+    def test_update(self):
+        table = ColumnTable("Place")
+        pl = make_place(10, "c1")
+        table.add("a", pl)
+        pl.price_by_night = 40
+        table.update("a", pl)
+        self.assertEqual(40, table.aggregate("max", "price_by_night"))
+
+    def test_clear(self):
+        table = ColumnTable("Place")
+        table.add("a", make_place(10, "c1"))
+        table.clear()
+        self.assertEqual(0, table.aggregate("count"))
+
+
+class TestColumnTable_filter(unittest.TestCase):
+    """Unittests for testing the filter method of the ColumnTable class."""
+
+    def setUp(self):
+        random.seed(7)
+        self.table = ColumnTable("Place")
+        self.objs = {}
+        for i in range(200):
+            pl = make_place(random.randint(0, 300), "c{}".format(i % 5),
+                            random.uniform(-90, 90))
+            if i % 40 == 0:
+                pl.price_by_night = "free"
+            if i % 45 == 0:
+                pl.city_id = 3
+            self.objs["Place.{}".format(i)] = pl
+            self.table.add("Place.{}".format(i), pl)
+        for i in range(0, 200, 9):
+            self.table.remove("Place.{}".format(i))
+            del self.objs["Place.{}".format(i)]
+
+    def check(self, *predicates):
+        expected = {key for key, obj in self.objs.items()
+                    if matches(obj, predicates)}
+        self.assertEqual(expected, set(self.table.filter(predicates)))
+        with patch.object(columns, "numpy", None):
+            self.assertEqual(expected, set(self.table.filter(predicates)))
+
+    def test_can_filter(self):
+        self.assertTrue(self.table.can_filter(("price_by_night", "<", 5)))
+        self.assertTrue(self.table.can_filter(("city_id", "in", ["c1"])))
+        self.assertFalse(self.table.can_filter(("city_id", "<", "c1")))
+        self.assertFalse(self.table.can_filter(("price_by_night", "==",
+                                                "free")))
+        self.assertFalse(self.table.can_filter(("name", "==", "x")))
+
+    def test_filter_numeric(self):
+        self.check(("price_by_night", "<", 100))
+        self.check(("price_by_night", ">=", 250), ("latitude", "<", 0))
+        self.check(("price_by_night", "!=", 100))
+        self.check(("price_by_night", "in", [1, 2, 3, 150]))
+
+    def test_filter_strings(self):
+        self.check(("city_id", "==", "c2"))
+        self.check(("city_id", "!=", "c2"))
+        self.check(("city_id", "in", ["c1", "c4", "c9"]))
+        self.check(("city_id", "==", "missing"))
+
+    def test_filter_mixed(self):
+        self.check(("city_id", "==", "c2"), ("price_by_night", "<", 150),
+                   ("name", "==", ""))
+        self.check(("price_by_night", "==", "free"))
+
+    def test_filter_inexact_values(self):
+        key = "Place.1"
+        self.objs[key].price_by_night = 2 ** 60 + 1
+        self.table.update(key, self.objs[key])
+        self.check(("price_by_night", "==", 2 ** 60 + 1))
+        self.check(("price_by_night", "==", 2 ** 60))
+        self.check(("city_id", "in", ["c1", 3]))
+
+    def test_filter_returns_objects(self):
+        objs = self.table.filter([("city_id", "==", "c1")])
+        for key, obj in objs.items():
+            self.assertIs(self.objs[key], obj)
+
+
+class TestColumnTable_aggregate(unittest.TestCase):
+    """Unittests for testing the aggregate method of the ColumnTable
+    class."""
+
+    def setUp(self):
+        self.table = ColumnTable("Place")
+        data = [(100, "c1"), (50, "c1"), (80, "c2"), ("free", "c2"),
+                (20, None), (10, "c3")]
+        for i, (price, city_id) in enumerate(data):
+            self.table.add(str(i), make_place(price, city_id, i / 2))
+        self.table.remove("5")
+
+    def check(self, expected, *args):
+        self.assertEqual(expected, self.table.aggregate(*args))
+        with patch.object(columns, "numpy", None):
+            self.assertEqual(expected, self.table.aggregate(*args))
+
+    def test_aggregate(self):
+        self.check(5, "count")
+        self.check(4, "count", "price_by_night")
+        self.check(250, "sum", "price_by_night")
+        self.check(62.5, "avg", "price_by_night")
+        self.check(20, "min", "price_by_night")
+        self.check(100, "max", "price_by_night")
+        self.check(2.0, "max", "latitude")
+
+    def test_aggregate_grouped(self):
+        self.check({"c1": 75.0, "c2": 80.0}, "avg", "price_by_night",
+                   "city_id")
+        self.check({"c1": 2, "c2": 2}, "count", None, "city_id")
+        self.check({20: 1, 50: 1, 80: 1, 100: 1}, "count", None,
+                   "price_by_night")
+        self.assertEqual(["c1", "c2"], list(self.table.aggregate(
+            "sum", "price_by_night", "city_id")))
+
+    def test_aggregate_no_objects(self):
+        self.table.clear()
+        self.check(0, "count")
+        self.check(0, "sum", "price_by_night")
+        self.check(None, "avg", "price_by_night")
+        self.check({}, "max", "price_by_night", "city_id")
+
+    def test_aggregate_errors(self):
+        with self.assertRaises(ValueError):
+            self.table.aggregate("median", "price_by_night")
+        with self.assertRaises(ValueError):
+            self.table.aggregate("sum")
+        with self.assertRaises(ValueError):
+            self.table.aggregate("sum", "city_id")
+        with self.assertRaises(ValueError):
+            self.table.aggregate("sum", "price_by_night", "name")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+
+Unittest classes:
+    TestDBStorage
+"""
+import json
+import os
+import sqlite3
+import unittest
+import models
+from models.base_model import BaseModel, registry
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+class TestDBStorage(unittest.TestCase):
+    """Unittests for testing the DBStorage class."""
+
+    def setUp(self):
+        self.remove_files()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = set()
+        self.storage = DBStorage()
+
+    def tearDown(self):
+        self.storage.close()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = False
+        self.remove_files()
+
+    def remove_files(self):
+        for path in ("file.db", "file.db-wal", "file.db-shm", "file.json"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def rows(self, sql):
+        connection = sqlite3.connect("file.db")
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test_is_file_storage(self):
+        self.assertIsInstance(self.storage, FileStorage)
+
+    def test_save_writes_tables(self):
+        st = State(name="California")
+        cy = City(state_id=st.id, name="San Francisco")
+        self.storage.save()
+        self.assertEqual([(cy.id, st.id)], self.rows(
+            'SELECT id, state_id FROM "City"'))
+        [(data,)] = self.rows('SELECT data FROM "State"')
+        self.assertEqual(st.to_dict(), json.loads(data))
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_reference_fields_are_indexed(self):
+        Review(place_id=Place().id)
+        self.storage.save()
+        names = {name for (name,) in self.rows(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("Place_city_id", names)
+        self.assertIn("Review_place_id", names)
+
+    def test_tables_created_on_first_save(self):
+        Place()
+        self.storage.save()
+        self.assertEqual([("Place",)], self.rows(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+    def test_class_defined_after_connecting(self):
+        self.storage.reload()
+
+        class Thing(BaseModel):
+            pass
+
+        try:
+            th = Thing()
+            th.name = "lamp"
+            self.storage.save()
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            self.assertEqual("lamp", self.storage.get(Thing, th.id).name)
+        finally:
+            registry.pop("Thing", None)
+
+    def test_wal_mode(self):
+        Place()
+        self.storage.save()
+        self.assertEqual([("wal",)], self.rows("PRAGMA journal_mode"))
+
+    def test_save_only_changes(self):
+        us = User(email="a@b.c")
+        pl = Place(name="Loft")
+        self.storage.save()
+        self.assertEqual({}, self.storage.changes())
+        pl.name = "Beach house"
+        self.storage.delete(us)
+        self.assertEqual({"Place." + pl.id: pl, "User." + us.id: None},
+                         self.storage.changes())
+        self.storage.save()
+        self.assertEqual([], self.rows('SELECT id FROM "User"'))
+        [(data,)] = self.rows('SELECT data FROM "Place"')
+        self.assertEqual("Beach house", json.loads(data)["name"])
+
+    def test_reload(self):
+        st = State(name="California")
+        pl = Place(name="Loft", amenity_ids=["a1"])
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertEqual({"State." + st.id, "Place." + pl.id}, set(objs))
+        self.assertEqual(pl.to_dict(), objs["Place." + pl.id].to_dict())
+        self.assertEqual({}, self.storage.changes())
+
+    def test_reload_lazy(self):
+        pl = Place(name="Loft")
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = True
+        self.storage.reload()
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(1, self.storage.count(Place))
+        self.assertEqual("Loft", self.storage.get(Place, pl.id).name)
+
+    def test_reload_empty_database(self):
+        self.storage.reload()
+        self.assertEqual({}, self.storage.all())
+
+    def test_compact(self):
+        Place()
+        self.storage.save()
+        self.storage.compact()
+        self.assertEqual(0, os.path.getsize("file.db-wal"))
+        self.assertEqual(1, len(self.rows('SELECT id FROM "Place"')))
+
+    def test_object_save(self):
+        models_storage = models.storage
+        models.storage = self.storage
+        try:
+            pl = Place()
+            pl.save()
+        finally:
+            models.storage = models_storage
+        self.assertEqual([(pl.id,)], self.rows('SELECT id FROM "Place"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
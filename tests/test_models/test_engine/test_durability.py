@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/durability.py.
+
+Unittest classes:
+    TestSyncPolicy
+"""
+import os
+import time
+import unittest
+from unittest.mock import patch
+from models.engine.durability import SYNC_POLICIES, SyncPolicy
+
+PATH = "test_durability.txt"
+
+
+class TestSyncPolicy(unittest.TestCase):
+    """Unittests for testing the SyncPolicy class."""
+
+    def setUp(self):
+        with open(PATH, "w") as f:
+            f.write("data")
+        self.fsync = patch("models.engine.durability.os.fsync").start()
+
+    def tearDown(self):
+        patch.stopall()
+        os.remove(PATH)
+
+    def write(self, policy):
+        with open(PATH, "a") as f:
+            f.write("more")
+            policy.sync_file(f)
+        policy.written(PATH)
+
+    def append(self, policy):
+        with open(PATH, "a") as f:
+            f.write("more")
+            policy.appended(f)
+        policy.written(PATH)
+
+    def test_policies(self):
+        self.assertEqual(("always", "batched", "os"), SYNC_POLICIES)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SyncPolicy("sometimes")
+        with self.assertRaises(ValueError):
+            SyncPolicy("batched", -1)
+
+    def test_always(self):
+        policy = SyncPolicy("always")
+        self.write(policy)
+        # The file, then its directory
+        self.assertEqual(2, self.fsync.call_count)
+        self.append(policy)
+        self.assertEqual(4, self.fsync.call_count)
+
+    def test_os(self):
+        policy = SyncPolicy("os")
+        self.append(policy)
+        policy.flush()
+        self.fsync.assert_not_called()
+        # Files to be renamed are synced whatever the policy
+        self.write(policy)
+        self.assertEqual(1, self.fsync.call_count)
+
+    def test_batched(self):
+        policy = SyncPolicy("batched", 60000)
+        self.append(policy)
+        self.assertEqual(2, self.fsync.call_count)
+        for i in range(10):
+            self.append(policy)
+        self.assertEqual(2, self.fsync.call_count)
+        policy.flush()
+        self.assertEqual(4, self.fsync.call_count)
+        policy.flush()
+        self.assertEqual(4, self.fsync.call_count)
+
+    def test_batched_syncs_renamed_files_now(self):
+        policy = SyncPolicy("batched", 60000)
+        self.write(policy)
+        self.assertEqual(2, self.fsync.call_count)
+        for i in range(10):
+            self.write(policy)
+        # Only the directory sync is deferred
+        self.assertEqual(12, self.fsync.call_count)
+        policy.flush()
+        self.assertEqual(13, self.fsync.call_count)
+
+    def test_batched_syncs_after_interval(self):
+        policy = SyncPolicy("batched", 20)
+        self.append(policy)
+        self.append(policy)
+        self.assertEqual(2, self.fsync.call_count)
+        for i in range(100):
+            if self.fsync.call_count == 4:
+                break
+            time.sleep(0.01)
+        self.assertEqual(4, self.fsync.call_count)
+
+    def test_batched_removed_file(self):
+        policy = SyncPolicy("batched", 60000)
+        self.append(policy)
+        self.append(policy)
+        os.remove(PATH)
+        policy.flush()
+        # Only the directory
+        self.assertEqual(3, self.fsync.call_count)
+        with open(PATH, "w") as f:
+            f.write("data")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,13 +4,34 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_compact
+    TestFileStorage_dirty_tracking
+    TestFileStorage_children
+    TestFileStorage_query
+    TestFileStorage_order_by
+    TestFileStorage_spatial
+    TestFileStorage_search
+    TestFileStorage_lazy
+    TestFileStorage_timestamps
+    TestFileStorage_aggregate
+    TestFileStorage_counts
+    TestFileStorage_binary
+    TestFileStorage_streaming
+    TestFileStorage_sync
+    TestFileStorage_write_behind
+    TestFileStorage_batch
 """
 import os
 import json
 import models
+import time
+import tracemalloc
 import unittest
 from datetime import datetime
-from models.base_model import BaseModel
+from unittest.mock import patch
+from models.base_model import BaseModel, registry
+from models.engine.durability import SyncPolicy
 from models.engine.file_storage import FileStorage
 from models.user import User
 from models.state import State
@@ -19,6 +40,21 @@ from models.city import City
 from models.amenity import Amenity
 from models.review import Review
 
+engine = None  # The engine HBNB_TYPE_STORAGE selected, while FileStorage runs
+
+
+def setUpModule():
+    """Runs the tests of this module against FileStorage, whichever engine
+    HBNB_TYPE_STORAGE selects for the other tests."""
+    global engine
+    engine = models.storage
+    models.storage = FileStorage()
+
+
+def tearDownModule():
+    """Puts back the engine HBNB_TYPE_STORAGE selected."""
+    models.storage = engine
+
 
 class TestFileStorage_instantiation(unittest.TestCase):
     """Unittests for testing instantiation of the FileStorage class."""
@@ -49,6 +85,7 @@ class TestFileStorage_methods(unittest.TestCase):
             os.rename("file.json", "tmp")
         except IOError:
             pass
+        FileStorage._FileStorage__objects = {}
 
     @classmethod
     def tearDown(self):
@@ -65,9 +102,47 @@ class TestFileStorage_methods(unittest.TestCase):
     def test_all(self):
         self.assertEqual(dict, type(models.storage.all()))
 
-    def test_all_with_arg(self):
+    def test_all_with_None(self):
+        self.assertIs(models.storage.all(), models.storage.all(None))
+
+    def test_all_with_cls(self):
+        bm = BaseModel()
+        us = User()
+        us2 = User()
+        self.assertEqual({"User." + us.id: us, "User." + us2.id: us2},
+                         models.storage.all(User))
+        self.assertEqual({"BaseModel." + bm.id: bm},
+                         models.storage.all("BaseModel"))
+        self.assertEqual({}, models.storage.all(Review))
+
+    def test_all_with_cls_is_a_copy(self):
+        us = User()
+        models.storage.all(User).clear()
+        self.assertIn("User." + us.id, models.storage.all(User))
+
+    def test_all_with_cls_after_delete(self):
+        us = User()
+        models.storage.delete(us)
+        self.assertNotIn("User." + us.id, models.storage.all(User))
+        self.assertNotIn("User." + us.id, models.storage.all())
+
+    def test_all_with_cls_after_objects_replaced(self):
+        User()
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual({}, models.storage.all(User))
+
+    def test_count(self):
+        BaseModel()
+        User()
+        User()
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(2, models.storage.count(User))
+        self.assertEqual(1, models.storage.count("BaseModel"))
+        self.assertEqual(0, models.storage.count("MyModel"))
+
+    def test_count_with_args(self):
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.count(User, 1)
 
     def test_new(self):
         bm = BaseModel()
@@ -160,10 +235,1529 @@ class TestFileStorage_methods(unittest.TestCase):
         self.assertIn("Amenity." + am.id, objs)
         self.assertIn("Review." + rv.id, objs)
 
+    def test_reload_adds_each_object_once(self):
+        for i in range(3):
+            BaseModel()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        with patch.object(FileStorage, "new", autospec=True,
+                          side_effect=FileStorage.new) as new, \
+                patch("models.base_model.uuid4") as uuid4:
+            models.storage.reload()
+        self.assertEqual(3, new.call_count)
+        uuid4.assert_not_called()
+        self.assertEqual(3, models.storage.count(BaseModel))
+
     def test_reload_with_arg(self):
         with self.assertRaises(TypeError):
             models.storage.reload(None)
 
 
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = True
+
+    def tearDown(self):
+        for path in ("file.json", "file.json.log", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = False
+
+    def read_journal(self):
+        records = []
+        with open("file.json.log", "r") as f:
+            for line in f:
+                record = json.loads(line)
+                records.extend(record["records"] if record["op"] == "batch"
+                               else [record])
+        return records
+
+    def test_save_appends_new_objects(self):
+        bm = BaseModel()
+        models.storage.save()
+        records = self.read_journal()
+        self.assertEqual(1, len(records))
+        self.assertEqual("put", records[0]["op"])
+        self.assertEqual("BaseModel." + bm.id, records[0]["key"])
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_save_appends_only_changed_objects(self):
+        bm = BaseModel()
+        us = User()
+        models.storage.save()
+        us.first_name = "Betty"
+        us.save()
+        records = self.read_journal()
+        self.assertEqual(3, len(records))
+        self.assertEqual("User." + us.id, records[2]["key"])
+        self.assertEqual("Betty", records[2]["value"]["first_name"])
+
+    def test_save_without_changes_appends_nothing(self):
+        BaseModel()
+        models.storage.save()
+        models.storage.save()
+        self.assertEqual(1, len(self.read_journal()))
+
+    def test_save_appends_one_line(self):
+        BaseModel()
+        User()
+        models.storage.save()
+        with open("file.json.log", "r") as f:
+            lines = f.readlines()
+        self.assertEqual(1, len(lines))
+        self.assertEqual(2, len(json.loads(lines[0])["records"]))
+
+    def test_torn_batch_is_dropped(self):
+        bm = BaseModel()
+        models.storage.save()
+        with models.storage.batch():
+            bm.name = "Holberton"
+            us = User()
+        with open("file.json.log", "rb+") as f:
+            f.truncate(os.path.getsize("file.json.log") - 20)
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["BaseModel." + bm.id], list(models.storage.all()))
+        self.assertNotIn("name", models.storage.get(BaseModel, bm.id)
+                         .to_dict())
+        self.assertEqual(1, len(self.read_journal()))
+
+    def test_delete_appends_delete_record(self):
+        bm = BaseModel()
+        models.storage.save()
+        models.storage.delete(bm)
+        models.storage.save()
+        records = self.read_journal()
+        self.assertEqual({"op": "delete", "key": "BaseModel." + bm.id},
+                         records[-1])
+
+    def test_save_appends_values_changed_in_place(self):
+        pl = Place()
+        pl.amenity_ids = []
+        BaseModel()
+        models.storage.save()
+        pl.amenity_ids.append("wifi")
+        models.storage.save()
+        records = self.read_journal()
+        self.assertEqual(3, len(records))
+        self.assertEqual("Place." + pl.id, records[2]["key"])
+        self.assertEqual(["wifi"], records[2]["value"]["amenity_ids"])
+
+    def test_reload_replays_snapshot_and_journal(self):
+        FileStorage._FileStorage__journal = False
+        bm = BaseModel()
+        st = State()
+        models.storage.save()
+        FileStorage._FileStorage__journal = True
+        st.name = "California"
+        st.save()
+        models.storage.delete(bm)
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertNotIn("BaseModel." + bm.id, objs)
+        self.assertIn("User." + us.id, objs)
+        self.assertEqual("California", objs["State." + st.id].name)
+
+    def test_reload_drops_torn_record(self):
+        bm = BaseModel()
+        models.storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('{"op": "put", "key": "User.1", "val')
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("BaseModel." + bm.id, models.storage.all())
+        self.assertEqual(1, len(self.read_journal()))
+
+    def test_snapshot_save_discards_journal(self):
+        BaseModel()
+        models.storage.save()
+        FileStorage._FileStorage__journal = False
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.log"))
+
+
+class TestFileStorage_compact(unittest.TestCase):
+    """Unittests for testing journal compaction of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = True
+
+    def tearDown(self):
+        for path in ("file.json", "file.json.log",
+                     "file.json.log.compacting", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = False
+        FileStorage._FileStorage__max_journal_records = 10000
+
+    def read_snapshot(self):
+        with open("file.json", "r") as f:
+            return json.load(f)
+
+    def test_compact_folds_journal_into_snapshot(self):
+        bm = BaseModel()
+        st = State()
+        models.storage.save()
+        st.name = "Nevada"
+        st.save()
+        models.storage.delete(bm)
+        models.storage.save()
+        models.storage.compact(wait=True)
+        snapshot = self.read_snapshot()
+        self.assertNotIn("BaseModel." + bm.id, snapshot)
+        self.assertEqual("Nevada", snapshot["State." + st.id]["name"])
+        self.assertFalse(os.path.exists("file.json.log"))
+        self.assertFalse(os.path.exists("file.json.log.compacting"))
+
+    def test_compact_without_journal(self):
+        models.storage.compact(wait=True)
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_reload_after_compact(self):
+        us = User()
+        models.storage.save()
+        models.storage.compact(wait=True)
+        us.email = "betty@holberton.com"
+        us.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertEqual("betty@holberton.com", objs["User." + us.id].email)
+
+    def test_reload_after_interrupted_compact(self):
+        us = User()
+        models.storage.save()
+        os.rename("file.json.log", "file.json.log.compacting")
+        pl = Place()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertIn("Place." + pl.id, models.storage.all())
+        models.storage.compact(wait=True)
+        snapshot = self.read_snapshot()
+        self.assertIn("User." + us.id, snapshot)
+        self.assertIn("Place." + pl.id, snapshot)
+
+    def test_compact_past_record_threshold(self):
+        FileStorage._FileStorage__max_journal_records = 3
+        for i in range(3):
+            BaseModel()
+            models.storage.save()
+        FileStorage._FileStorage__compactor.join()
+        self.assertEqual(3, len(self.read_snapshot()))
+        self.assertFalse(os.path.exists("file.json.log"))
+
+
+class TestFileStorage_dirty_tracking(unittest.TestCase):
+    """Unittests for testing that FileStorage only serializes changed
+    objects."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_setattr_marks_object_dirty(self):
+        us = User()
+        models.storage.save()
+        self.assertNotIn("User." + us.id, FileStorage._FileStorage__dirty)
+        us.first_name = "Betty"
+        self.assertIn("User." + us.id, FileStorage._FileStorage__dirty)
+
+    def test_setattr_ignores_objects_not_in_storage(self):
+        us = User()
+        models.storage.delete(us)
+        models.storage.save()
+        us.first_name = "Betty"
+        self.assertNotIn("User." + us.id, FileStorage._FileStorage__dirty)
+
+    def test_save_serializes_only_dirty_objects(self):
+        objs = [BaseModel() for i in range(5)]
+        models.storage.save()
+        with patch.object(BaseModel, "to_dict",
+                          autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            objs[2].name = "Holberton"
+            models.storage.save()
+        self.assertEqual(1, to_dict.call_count)
+        self.assertIs(objs[2], to_dict.call_args[0][0])
+
+    def test_save_reuses_encoded_objects(self):
+        us = User()
+        st = State()
+        models.storage.save()
+        st.name = "Utah"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(us.to_dict(), saved["User." + us.id])
+        self.assertEqual(st.to_dict(), saved["State." + st.id])
+
+    def test_save_after_delete(self):
+        us = User()
+        models.storage.save()
+        models.storage.delete(us)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertNotIn("User." + us.id, json.load(f))
+
+    def test_save_values_changed_in_place(self):
+        pl = Place()
+        pl.amenity_ids = []
+        models.storage.save()
+        pl.amenity_ids.append("wifi")
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)["Place." + pl.id]
+        self.assertEqual(["wifi"], saved["amenity_ids"])
+
+    def test_values_changed_in_place_after_reload(self):
+        pl = Place()
+        pl.amenity_ids = ["wifi"]
+        models.storage.save()
+        models.storage.reload()
+        pl = models.storage.get(Place, pl.id)
+        self.assertNotIn("Place." + pl.id, models.storage.changes())
+        pl.amenity_ids.append("pool")
+        self.assertIn("Place." + pl.id, models.storage.changes())
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)["Place." + pl.id]
+        self.assertEqual(["wifi", "pool"], saved["amenity_ids"])
+
+    def test_save_skips_unchanged_values(self):
+        places = [Place(amenity_ids=["wifi"]) for i in range(5)]
+        models.storage.save()
+        with patch.object(BaseModel, "to_dict",
+                          autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            places[2].amenity_ids.remove("wifi")
+            models.storage.save()
+        self.assertEqual(1, to_dict.call_count)
+        self.assertIs(places[2], to_dict.call_args[0][0])
+
+    def test_rollback_tracks_restored_values(self):
+        pl = Place(amenity_ids=["wifi"])
+        models.storage.save()
+        with self.assertRaises(RuntimeError):
+            with models.storage.batch():
+                pl.amenity_ids.append("pool")
+                raise RuntimeError
+        self.assertEqual(["wifi"], pl.amenity_ids)
+        pl.amenity_ids.append("sauna")
+        self.assertIn("Place." + pl.id, models.storage.changes())
+
+
+class TestFileStorage_children(unittest.TestCase):
+    """Unittests for testing reference lookups of the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.st = State()
+        self.cy1 = City()
+        self.cy1.state_id = self.st.id
+        self.cy2 = City()
+        self.cy2.state_id = self.st.id
+        self.cy3 = City()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_children(self):
+        cities = models.storage.children(State, self.st.id, City)
+        self.assertEqual({"City." + self.cy1.id: self.cy1,
+                          "City." + self.cy2.id: self.cy2}, cities)
+
+    def test_children_by_class_name(self):
+        cities = models.storage.children("State", self.st.id, "City")
+        self.assertEqual(2, len(cities))
+
+    def test_children_after_update(self):
+        self.cy3.state_id = self.st.id
+        self.cy1.state_id = "other"
+        cities = models.storage.children(State, self.st.id, City)
+        self.assertEqual({"City." + self.cy2.id: self.cy2,
+                          "City." + self.cy3.id: self.cy3}, cities)
+
+    def test_children_after_delete(self):
+        models.storage.delete(self.cy1)
+        cities = models.storage.children(State, self.st.id, City)
+        self.assertEqual({"City." + self.cy2.id: self.cy2}, cities)
+
+    def test_children_after_objects_replaced(self):
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual({}, models.storage.children(State, self.st.id, City))
+
+    def test_children_after_reload(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        try:
+            models.storage.save()
+            FileStorage._FileStorage__objects = {}
+            models.storage.reload()
+            cities = models.storage.children(State, self.st.id, City)
+            self.assertEqual(2, len(cities))
+        finally:
+            os.remove("file.json")
+            try:
+                os.rename("tmp", "file.json")
+            except IOError:
+                pass
+
+    def test_children_of_user(self):
+        us = User()
+        pl = Place()
+        pl.user_id = us.id
+        rv = Review()
+        rv.user_id = us.id
+        rv.place_id = pl.id
+        self.assertEqual({"Place." + pl.id: pl},
+                         models.storage.children(User, us.id, Place))
+        self.assertEqual({"Review." + rv.id: rv},
+                         models.storage.children(User, us.id, Review))
+        self.assertEqual({"Review." + rv.id: rv},
+                         models.storage.children(Place, pl.id, Review))
+
+    def test_children_without_reference(self):
+        with self.assertRaises(ValueError):
+            models.storage.children(City, self.cy1.id, State)
+
+
+class TestFileStorage_query(unittest.TestCase):
+    """Unittests for testing attribute queries of the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for i in range(6):
+            pl = Place()
+            pl.price_by_night = 50 * i
+            pl.max_guest = i
+            pl.city_id = "c{}".format(i % 2)
+            self.places.append(pl)
+        User()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__indexes["Place"].pop("max_guest", None)
+
+    def keys(self, *indices):
+        return {"Place." + self.places[i].id for i in indices}
+
+    def test_query_equality(self):
+        objs = models.storage.query(Place, ("max_guest", "==", 3))
+        self.assertEqual(self.keys(3), set(objs))
+
+    def test_query_range(self):
+        objs = models.storage.query("Place", ("price_by_night", "<", 100),
+                                    ("max_guest", ">=", 1))
+        self.assertEqual(self.keys(1), set(objs))
+
+    def test_query_in(self):
+        objs = models.storage.query(Place, ("max_guest", "in", [0, 5, 9]))
+        self.assertEqual(self.keys(0, 5), set(objs))
+
+    def test_query_without_predicates(self):
+        self.assertEqual(6, len(models.storage.query(Place)))
+
+    def test_query_invalid_predicate(self):
+        with self.assertRaises(ValueError):
+            models.storage.query(Place, ("max_guest", "~", 3))
+
+    def test_explain_scan(self):
+        self.assertEqual(
+            "scan Place (6 objects)",
+            models.storage.explain(Place, ("max_guest", ">", 3)))
+
+    def test_explain_reference_index(self):
+        self.assertEqual(
+            "hash index Place.city_id == 'c1' (3 of 6 objects)",
+            models.storage.explain(Place, ("max_guest", ">", 3),
+                                   ("city_id", "==", "c1")))
+
+    def test_explain_picks_most_selective_index(self):
+        models.storage.create_index(Place, "max_guest")
+        self.assertEqual(
+            "hash index Place.max_guest in [1, 2] (2 of 6 objects)",
+            models.storage.explain(Place, ("city_id", "==", "c1"),
+                                   ("max_guest", "in", [1, 2])))
+
+    def test_query_with_index(self):
+        models.storage.create_index(Place, "max_guest")
+        objs = models.storage.query(Place, ("city_id", "==", "c1"),
+                                    ("max_guest", "in", [1, 2]))
+        self.assertEqual(self.keys(1), set(objs))
+
+    def test_index_follows_updates(self):
+        models.storage.create_index(Place, "max_guest")
+        self.places[0].max_guest = 7
+        models.storage.delete(self.places[1])
+        pl = Place()
+        pl.max_guest = 7
+        objs = models.storage.query(Place, ("max_guest", "in", [1, 7]))
+        self.assertEqual(self.keys(0) | {"Place." + pl.id}, set(objs))
+
+    def test_explain_sorted_index(self):
+        models.storage.create_index(Place, "max_guest", "sorted")
+        self.assertEqual(
+            "sorted index Place.max_guest >= 4 (2 of 6 objects)",
+            models.storage.explain(Place, ("max_guest", ">=", 4),
+                                   ("city_id", "==", "c1")))
+
+    def test_query_with_sorted_index(self):
+        models.storage.create_index(Place, "max_guest", "sorted")
+        self.places[5].max_guest = "many"
+        objs = models.storage.query(Place, ("max_guest", ">=", 2),
+                                    ("max_guest", "<", 5))
+        self.assertEqual(self.keys(2, 3, 4), set(objs))
+
+    def test_create_index_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            models.storage.create_index(Place, "max_guest", "bitmap")
+
+
+class TestFileStorage_order_by(unittest.TestCase):
+    """Unittests for testing ordered retrieval of the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.prices = [90, 30, 60, 30, 150]
+        for price in self.prices:
+            pl = Place()
+            pl.price_by_night = price
+        Place().price_by_night = "free"
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__indexes["Place"].pop("price_by_night",
+                                                        None)
+
+    def order_by(self, *args):
+        return [pl.price_by_night for pl in
+                models.storage.order_by(Place, "price_by_night", *args)]
+
+    def check_orders(self):
+        self.assertEqual(sorted(self.prices), self.order_by())
+        self.assertEqual([30, 30], self.order_by(2))
+        self.assertEqual([150, 90, 60], self.order_by(3, True))
+
+    def test_order_by_scan(self):
+        self.check_orders()
+
+    def test_order_by_sorted_index(self):
+        models.storage.create_index(Place, "price_by_night", "sorted")
+        self.check_orders()
+
+    def test_sorted_index_follows_updates(self):
+        models.storage.create_index(Place, "price_by_night", "sorted")
+        cheapest = models.storage.order_by(Place, "price_by_night", 1)[0]
+        cheapest.price_by_night = 500
+        self.assertEqual([500], self.order_by(1, True))
+        models.storage.delete(cheapest)
+        self.assertEqual([30, 60], self.order_by(2))
+
+    def test_order_by_same_with_and_without_index(self):
+        scanned = models.storage.order_by(Place, "price_by_night")
+        models.storage.create_index(Place, "price_by_night", "sorted")
+        indexed = models.storage.order_by(Place, "price_by_night")
+        self.assertEqual(scanned, indexed)
+
+
+class TestFileStorage_spatial(unittest.TestCase):
+    """Unittests for testing spatial searches of the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.sf = Place(latitude=37.7749, longitude=-122.4194)
+        self.oak = Place(latitude=37.8044, longitude=-122.2712)
+        self.paris = Place(latitude=48.8566, longitude=2.3522)
+        self.unplaced = Place(latitude="unknown")
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_within_box(self):
+        box = models.storage.within_box(Place, 37, -123, 38, -122)
+        self.assertEqual({self.sf, self.oak}, set(box.values()))
+
+    def test_within_radius(self):
+        self.assertEqual([self.oak, self.sf], list(
+            models.storage.within_radius("Place", 37.8, -122.27, 20)
+            .values()))
+        self.assertEqual([self.sf], list(
+            models.storage.within_radius(Place, 37.77, -122.42, 5).values()))
+
+    def test_nearest(self):
+        self.assertEqual([self.paris, self.oak], list(
+            models.storage.nearest(Place, 51.5, -0.12, 2).values()))
+
+    def test_index_follows_changes(self):
+        self.paris.latitude = 37.78
+        self.paris.longitude = -122.41
+        self.unplaced.latitude = 0.0
+        self.assertNotIn(self.unplaced, models.storage.nearest(
+            Place, 0, 0, 5).values())
+        self.unplaced.longitude = 0.0
+        self.assertEqual(3, len(models.storage.within_radius(
+            Place, 37.77, -122.42, 20)))
+        models.storage.delete(self.sf)
+        self.assertEqual([self.paris], list(models.storage.nearest(
+            Place, 37.77, -122.42).values()))
+        self.assertIn(self.unplaced, models.storage.nearest(
+            Place, 0, 0).values())
+
+    def test_index_rebuilt_with_objects(self):
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual({}, models.storage.nearest(Place, 0, 0))
+
+    def test_no_spatial_index(self):
+        with self.assertRaises(ValueError):
+            models.storage.nearest(User, 0, 0)
+
+
+class TestFileStorage_search(unittest.TestCase):
+    """Unittests for testing full-text search of the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.house = Place(name="Beach house",
+                           description="Sunny house by the beach")
+        self.cabin = Place(name="Mountain cabin",
+                           description="Cozy cabin with a view")
+        self.review = Review(text="Lovely beach, cozy beds")
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = False
+        for path in ("file.json", "file.json.text", "file.json.log"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def search(self, cls, text, *args):
+        return list(models.storage.search(cls, text, *args).values())
+
+    def test_search(self):
+        self.assertEqual([self.house], self.search(Place, "beach"))
+        self.assertEqual([self.review], self.search("Review", "beach"))
+        self.assertEqual([self.house, self.cabin],
+                         self.search(Place, "cozy beach"))
+        self.assertEqual([self.house], self.search(Place, "cozy beach", 1))
+
+    def test_search_prefix(self):
+        self.assertEqual({self.house, self.cabin},
+                         set(self.search(Place, "mount* beach*")))
+
+    def test_index_follows_changes(self):
+        self.cabin.description = "Cabin near the beach"
+        self.assertEqual({self.house, self.cabin},
+                         set(self.search(Place, "beach")))
+        models.storage.delete(self.house)
+        self.assertEqual([self.cabin], self.search(Place, "beach"))
+
+    def test_no_text_index(self):
+        with self.assertRaises(ValueError):
+            models.storage.search(User, "beach")
+
+    def test_index_not_saved_with_snapshot(self):
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.text"))
+        models.storage.close()
+        self.assertTrue(os.path.exists("file.json.text"))
+        self.house.name = "Villa"
+        models.storage.close()
+        with open("file.json.text", "r") as f:
+            self.assertIn("beach", f.read())
+
+    def test_index_saved_on_close(self):
+        models.storage.save()
+        models.storage.close()
+        with open("file.json.text", "r") as f:
+            saved = json.load(f)
+        self.assertIn("Place.{}".format(self.house.id),
+                      saved["indexes"]["Place"]["docs"])
+        FileStorage._FileStorage__objects = {}
+        with patch("models.engine.text_index.tokenize") as tokenize:
+            models.storage.reload()
+            tokenize.assert_not_called()
+        self.assertEqual(["Mountain cabin"],
+                         [pl.name for pl in self.search(Place, "cozy")])
+
+    def test_stale_index_rebuilt(self):
+        models.storage.save()
+        with open("file.json", "r") as f:
+            obj_dict = json.load(f)
+        obj_dict["Place.{}".format(self.cabin.id)]["name"] = "Castle"
+        with open("file.json", "w") as f:
+            json.dump(obj_dict, f)
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["Castle"],
+                         [pl.name for pl in self.search(Place, "castle")])
+        self.assertEqual([], self.search(Place, "mountain"))
+
+    def test_journal_replayed_over_saved_index(self):
+        models.storage.save()
+        FileStorage._FileStorage__journal = True
+        self.house.description = "Villa by the sea"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["Beach house"],
+                         [pl.name for pl in self.search(Place, "villa")])
+        self.assertEqual([], self.search(Place, "sunny"))
+
+    def test_compaction_saves_index(self):
+        FileStorage._FileStorage__journal = True
+        models.storage.save()
+        models.storage.compact(wait=True)
+        FileStorage._FileStorage__objects = {}
+        with patch("models.engine.text_index.tokenize") as tokenize:
+            models.storage.reload()
+            tokenize.assert_not_called()
+        self.assertEqual(2, len(self.search(Place, "beach cozy")))
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing the lazy reload mode of the FileStorage
+    class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.user = User()
+        self.place = Place(name="Beach house", city_id="c1",
+                           price_by_night=80)
+        self.review = Review(place_id=self.place.id, text="Great beach")
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = False
+        FileStorage._FileStorage__journal = False
+        for path in ("file.json", "file.json.text", "file.json.log"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def built(self):
+        return set(FileStorage._FileStorage__objects)
+
+    def key(self, obj):
+        return "{}.{}".format(type(obj).__name__, obj.id)
+
+    def test_reload_builds_nothing(self):
+        self.assertEqual(set(), self.built())
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(1, models.storage.count(Place))
+        self.assertEqual(set(), self.built())
+
+    def test_aggregate_builds_nothing(self):
+        self.assertEqual({"c1": 80}, models.storage.aggregate(
+            Place, "sum", "price_by_night", "city_id"))
+        self.assertEqual({0: 1}, models.storage.aggregate(
+            Place, "count", None, "max_guest"))
+        self.assertEqual(set(), self.built())
+
+    def test_get_builds_one_object(self):
+        pl = models.storage.get(Place, self.place.id)
+        self.assertEqual("Beach house", pl.name)
+        self.assertEqual({self.key(self.place)}, self.built())
+        self.assertIs(pl, models.storage.get("Place", self.place.id))
+        self.assertIsNone(models.storage.get(Place, "missing"))
+        self.assertEqual(1, models.storage.count(Place))
+        self.assertEqual(set(), FileStorage._FileStorage__dirty)
+
+    def test_all_with_class_builds_class(self):
+        self.assertEqual([self.key(self.place)],
+                         list(models.storage.all(Place)))
+        self.assertEqual({self.key(self.place)}, self.built())
+        self.assertEqual(3, len(models.storage.all()))
+        self.assertEqual(3, len(self.built()))
+
+    def test_queries_build_class(self):
+        self.assertEqual(1, len(models.storage.query(
+            Place, ("price_by_night", "<", 100))))
+        self.assertEqual(1, len(models.storage.children(
+            Place, self.place.id, Review)))
+        self.assertEqual(1, len(models.storage.search(Review, "beach")))
+        self.assertNotIn(self.key(self.user), self.built())
+
+    def test_save_keeps_unbuilt_records(self):
+        pl = models.storage.get(Place, self.place.id)
+        pl.name = "Beach villa"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            obj_dict = json.load(f)
+        self.assertEqual(3, len(obj_dict))
+        self.assertEqual("Beach villa",
+                         obj_dict[self.key(self.place)]["name"])
+        self.assertEqual(self.user.id, obj_dict[self.key(self.user)]["id"])
+
+    def test_save_reuses_unbuilt_text(self):
+        pl = models.storage.get(Place, self.place.id)
+        pl.name = "Beach villa"
+        with patch("models.engine.file_storage.encode_record") as encode:
+            models.storage.save()
+            encode.assert_not_called()
+        with open("file.json", "r") as f:
+            obj_dict = json.load(f)
+        self.assertEqual(self.user.to_dict(), obj_dict[self.key(self.user)])
+        self.assertEqual(self.review.to_dict(),
+                         obj_dict[self.key(self.review)])
+
+    def test_delete_unbuilt_through_journal(self):
+        FileStorage._FileStorage__journal = True
+        models.storage.delete(models.storage.get(User, self.user.id))
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIsNone(models.storage.get(User, self.user.id))
+        self.assertEqual(2, models.storage.count())
+
+    def test_new_object_replaces_record(self):
+        User(id=self.user.id, email="new@example.com")
+        self.assertEqual("new@example.com",
+                         models.storage.get(User, self.user.id).email)
+        self.assertEqual(3, models.storage.count())
+
+
+class TestFileStorage_timestamps(unittest.TestCase):
+    """Unittests for testing the timestamp encodings of the FileStorage
+    class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__timestamps = "epoch"
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__timestamps = "iso"
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def test_save_epoch_timestamps(self):
+        bm = BaseModel()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            record = json.load(f)["BaseModel." + bm.id]
+        self.assertEqual(int, type(record["created_at"]))
+        self.assertEqual(int, type(record["updated_at"]))
+
+    def test_reload_epoch_timestamps(self):
+        bm = BaseModel()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        reloaded = models.storage.get(BaseModel, bm.id)
+        self.assertIsNot(bm, reloaded)
+        self.assertEqual(bm.created_at, reloaded.created_at)
+        self.assertEqual(bm.updated_at, reloaded.updated_at)
+
+    def test_reload_mixed_timestamps(self):
+        legacy = BaseModel()
+        FileStorage._FileStorage__timestamps = "iso"
+        models.storage.save()
+        FileStorage._FileStorage__timestamps = "epoch"
+        recent = BaseModel()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            obj_dict = json.load(f)
+        self.assertEqual(str, type(
+            obj_dict["BaseModel." + legacy.id]["created_at"]))
+        self.assertEqual(int, type(
+            obj_dict["BaseModel." + recent.id]["created_at"]))
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        for bm in (legacy, recent):
+            self.assertEqual(bm.created_at, models.storage.get(
+                BaseModel, bm.id).created_at)
+
+
+class TestFileStorage_aggregate(unittest.TestCase):
+    """Unittests for testing the aggregate method of the FileStorage
+    class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        for i, (price, city_id) in enumerate(
+                [(100, "c1"), (50, "c1"), (80, "c2"), ("free", "c2"),
+                 (20, None), (10, ["c3"])]):
+            pl = Place()
+            pl.price_by_night = price
+            pl.max_guest = i
+            pl.city_id = city_id
+        User()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_aggregate(self):
+        self.assertEqual(6, models.storage.aggregate(Place, "count"))
+        self.assertEqual(5, models.storage.aggregate(Place, "count",
+                                                     "price_by_night"))
+        self.assertEqual(260, models.storage.aggregate(Place, "sum",
+                                                       "price_by_night"))
+        self.assertEqual(52, models.storage.aggregate("Place", "avg",
+                                                      "price_by_night"))
+        self.assertEqual(10, models.storage.aggregate(Place, "min",
+                                                      "price_by_night"))
+        self.assertEqual(100, models.storage.aggregate(Place, "max",
+                                                       "price_by_night"))
+        self.assertEqual(50, models.storage.aggregate(Place, "median",
+                                                      "price_by_night"))
+        self.assertEqual(2.5, models.storage.aggregate(Place, "avg",
+                                                       "max_guest"))
+
+    def test_aggregate_grouped(self):
+        self.assertEqual({"c1": 75.0, "c2": 80.0}, models.storage.aggregate(
+            Place, "avg", "price_by_night", "city_id"))
+        self.assertEqual({"c1": 2, "c2": 2}, models.storage.aggregate(
+            Place, "count", None, "city_id"))
+        self.assertEqual({"c1": 90.0, "c2": 80}, models.storage.aggregate(
+            Place, "p80", "price_by_night", "city_id"))
+
+    def test_aggregate_defaults(self):
+        self.assertEqual({"": 1}, models.storage.aggregate(
+            User, "count", None, "first_name"))
+
+    def test_aggregate_no_objects(self):
+        self.assertEqual(0, models.storage.aggregate(Amenity, "count"))
+        self.assertIsNone(models.storage.aggregate(Amenity, "avg", "x"))
+        self.assertEqual({}, models.storage.aggregate(Amenity, "sum", "x",
+                                                      "name"))
+
+    def test_aggregate_errors(self):
+        with self.assertRaises(ValueError):
+            models.storage.aggregate(Place, "mode", "price_by_night")
+        with self.assertRaises(ValueError):
+            models.storage.aggregate(Place, "avg")
+
+
+class TestFileStorage_counts(unittest.TestCase):
+    """Unittests for testing the counts kept by the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for i in range(5):
+            pl = Place()
+            pl.city_id = "c{}".format(i % 2)
+            pl.max_guest = i % 3
+            self.places.append(pl)
+        User()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = False
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def test_count_by_value(self):
+        self.assertEqual(3, models.storage.count(Place, city_id="c0"))
+        self.assertEqual(2, models.storage.count("Place", max_guest=0))
+        self.assertEqual(1, models.storage.count(Place, city_id="c0",
+                                                 max_guest=1))
+        self.assertEqual(0, models.storage.count(Place, city_id=["c0"]))
+
+    def test_count_by_value_follows_changes(self):
+        self.places[1].city_id = "c0"
+        models.storage.delete(self.places[0])
+        self.assertEqual(3, models.storage.count(Place, city_id="c0"))
+        self.assertEqual(1, models.storage.count(Place, city_id="c1"))
+
+    def test_count_by_value_needs_class(self):
+        with self.assertRaises(ValueError):
+            models.storage.count(city_id="c0")
+
+    def test_count_by_value_lazy(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        models.storage.get(Place, self.places[0].id)
+        self.assertEqual(3, models.storage.count(Place, city_id="c0"))
+        self.assertEqual(1, len(FileStorage._FileStorage__objects))
+        self.assertEqual([], models.storage.check_counts())
+
+    def test_check_counts(self):
+        self.assertEqual([], models.storage.check_counts())
+
+    def test_check_counts_finds_and_repairs(self):
+        objs = models.storage.all()
+        del objs["Place." + self.places[0].id]
+        self.places[1].__dict__["city_id"] = "c9"
+        problems = models.storage.check_counts(repair=True)
+        self.assertIn("Place: 5 counted, 4 found", problems)
+        self.assertIn("Place.city_id == 'c9': 0 counted, 1 found", problems)
+        self.assertIn("Place.city_id == 'c0': 3 counted, 2 found", problems)
+        self.assertEqual([], models.storage.check_counts())
+        self.assertEqual(4, models.storage.count(Place))
+        self.assertEqual(1, models.storage.count(Place, city_id="c9"))
+
+
+class TestFileStorage_binary(unittest.TestCase):
+    """Unittests for testing the binary snapshot format of the FileStorage
+    class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__format = "binary"
+        self.user = User(email="a@b.c")
+        self.places = [Place(name="Place {}".format(i), city_id="c1",
+                             price_by_night=10 * i) for i in range(3)]
+        models.storage.save()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__journal = False
+        for path in ("file.json", "file.json.log", "file.bin",
+                     "file.bin.tmp", "export.json"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def reload(self):
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def test_save_writes_snapshot(self):
+        self.assertTrue(os.path.exists("file.bin"))
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_reload_builds_nothing(self):
+        self.reload()
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(4, models.storage.count())
+        self.assertEqual(3, models.storage.count(Place, city_id="c1"))
+        self.assertEqual(30, models.storage.aggregate(
+            Place, "sum", "price_by_night"))
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+
+    def test_get_decodes_object(self):
+        self.reload()
+        pl = models.storage.get(Place, self.places[1].id)
+        self.assertEqual(self.places[1].to_dict(), pl.to_dict())
+        self.assertEqual(1, len(FileStorage._FileStorage__objects))
+
+    def test_save_keeps_unbuilt_records(self):
+        self.reload()
+        models.storage.get(User, self.user.id).email = "d@e.f"
+        models.storage.save()
+        self.reload()
+        self.assertEqual("d@e.f", models.storage.get(User, self.user.id).email)
+        self.assertEqual({p.to_dict()["id"]: p.to_dict()
+                          for p in self.places},
+                         {p.id: p.to_dict()
+                          for p in models.storage.all(Place).values()})
+
+    def test_export(self):
+        self.reload()
+        models.storage.export("export.json")
+        with open("export.json", "r") as f:
+            exported = json.load(f)
+        self.assertEqual(self.user.to_dict(),
+                         exported["User." + self.user.id])
+        self.assertEqual(4, len(exported))
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+
+    def test_reads_json_without_snapshot(self):
+        os.remove("file.bin")
+        FileStorage._FileStorage__format = "json"
+        models.storage.save()
+        FileStorage._FileStorage__format = "binary"
+        self.reload()
+        self.assertEqual(4, models.storage.count())
+        models.storage.save()
+        self.assertTrue(os.path.exists("file.bin"))
+
+    def test_journal_and_compact(self):
+        FileStorage._FileStorage__journal = True
+        self.reload()
+        st = State(name="Nevada")
+        models.storage.delete(models.storage.get(User, self.user.id))
+        models.storage.save()
+        self.reload()
+        self.assertEqual("Nevada", models.storage.get(State, st.id).name)
+        self.assertIsNone(models.storage.get(User, self.user.id))
+        models.storage.compact(wait=True)
+        self.assertFalse(os.path.exists("file.json.log"))
+        self.assertFalse(os.path.exists("file.json"))
+        self.reload()
+        self.assertEqual(4, models.storage.count())
+        self.assertEqual("Nevada", models.storage.get(State, st.id).name)
+
+
+class TestFileStorage_streaming(unittest.TestCase):
+    """Unittests for testing that the FileStorage class reloads the JSON
+    file one record at a time."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        for i in range(2000):
+            Place(name="Place {}".format(i), description="x" * 100,
+                  price_by_night=i)
+        models.storage.save()
+        models.storage.close()
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def traced(self, func):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = set()
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    def test_reload_streams_records(self):
+        def load_whole_file():
+            with open("file.json", "r") as f:
+                for obj in json.load(f).values():
+                    models.storage.new(
+                        registry[obj["__class__"]].from_dict(obj))
+
+        size, peak = self.traced(models.storage.reload)
+        self.assertEqual(2000, models.storage.count(Place))
+        whole_peak = self.traced(load_whole_file)[1]
+        self.assertLess(peak, 1.2 * size)
+        self.assertLess(peak, 0.85 * whole_peak)
+
+    def test_reload_invalid_file(self):
+        with open("file.json", "w") as f:
+            f.write('{"Place.1": {"__class__": "Place", "id": "1"}, ')
+        FileStorage._FileStorage__objects = {}
+        with self.assertRaises(json.JSONDecodeError):
+            models.storage.reload()
+
+
+class TestFileStorage_sync(unittest.TestCase):
+    """Unittests for testing the atomic writes and the sync policies of the
+    FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.policy = FileStorage._FileStorage__sync
+        self.user = User(email="a@b.c")
+        models.storage.save()
+        self.fsync = patch("models.engine.durability.os.fsync").start()
+
+    def tearDown(self):
+        patch.stopall()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__sync = self.policy
+        FileStorage._FileStorage__journal = False
+        for path in ("file.json", "file.json.tmp", "file.json.log",
+                     "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def read(self):
+        with open("file.json", "r") as f:
+            return json.load(f)
+
+    def test_save_always_syncs(self):
+        FileStorage._FileStorage__sync = SyncPolicy("always")
+        State()
+        models.storage.save()
+        self.assertGreaterEqual(self.fsync.call_count, 2)
+
+    def test_snapshot_synced_before_rename(self):
+        replace = os.replace
+        for mode in ("always", "batched", "os"):
+            FileStorage._FileStorage__sync = SyncPolicy(mode, 60000)
+            calls = []
+            self.fsync.side_effect = lambda fd: calls.append("fsync")
+
+            def record(src, dst):
+                calls.append(dst)
+                replace(src, dst)
+
+            State()
+            with patch("os.replace", record):
+                models.storage.save()
+            self.assertIn("file.json", calls, mode)
+            for i, call in enumerate(calls):
+                if call != "fsync":
+                    self.assertEqual("fsync", calls[i - 1], mode)
+
+    def test_save_os_does_not_sync_journal(self):
+        FileStorage._FileStorage__sync = SyncPolicy("os")
+        FileStorage._FileStorage__journal = True
+        State()
+        models.storage.save()
+        models.storage.close()
+        self.fsync.assert_not_called()
+
+    def test_save_batched_syncs_once(self):
+        FileStorage._FileStorage__sync = SyncPolicy("batched", 60000)
+        FileStorage._FileStorage__journal = True
+        for i in range(10):
+            State()
+            models.storage.save()
+        count = self.fsync.call_count
+        self.assertLessEqual(count, 2)
+        models.storage.close()
+        self.assertEqual(count + 2, self.fsync.call_count)
+
+    def test_interrupted_save_keeps_file(self):
+        def items(storage):
+            yield "State.1", '{"__class__": "State", "id": "1"}'
+            raise KeyboardInterrupt
+
+        State()
+        with patch.object(FileStorage, "_FileStorage__items", items):
+            with self.assertRaises(KeyboardInterrupt):
+                models.storage.save()
+        self.assertEqual(["User." + self.user.id], list(self.read()))
+        self.assertFalse(os.path.exists("file.json.tmp"))
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual("a@b.c", models.storage.get(User, self.user.id).email)
+
+
+class TestFileStorage_write_behind(unittest.TestCase):
+    """Unittests for testing the write-behind mode of the FileStorage
+    class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__write_behind = True
+        FileStorage._FileStorage__flush_interval = 60000
+        FileStorage._FileStorage__flush_changes = 5
+
+    def tearDown(self):
+        models.storage.flush()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__write_behind = False
+        FileStorage._FileStorage__flush_interval = 1000
+        FileStorage._FileStorage__flush_changes = 1000
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def saved(self):
+        try:
+            with open("file.json", "r") as f:
+                return set(json.load(f))
+        except FileNotFoundError:
+            return set()
+
+    def test_save_is_deferred(self):
+        st = State()
+        st.save()
+        self.assertEqual(set(), self.saved())
+        self.assertEqual({"State." + st.id},
+                         FileStorage._FileStorage__dirty)
+
+    def test_save_after_enough_changes(self):
+        states = [State() for i in range(5)]
+        models.storage.save()
+        self.assertEqual({"State." + st.id for st in states}, self.saved())
+        self.assertEqual(set(), FileStorage._FileStorage__dirty)
+        self.assertIsNone(FileStorage._FileStorage__flusher)
+
+    def test_save_after_interval(self):
+        FileStorage._FileStorage__flush_interval = 20
+        st = State()
+        models.storage.save()
+        for i in range(100):
+            if self.saved():
+                break
+            time.sleep(0.01)
+        self.assertEqual({"State." + st.id}, self.saved())
+        self.assertIsNone(FileStorage._FileStorage__flusher)
+
+    def test_flush(self):
+        st = State()
+        models.storage.save()
+        models.storage.flush()
+        self.assertEqual({"State." + st.id}, self.saved())
+        os.remove("file.json")
+        models.storage.flush()
+        self.assertEqual(set(), self.saved())
+
+    def test_close_saves_changes(self):
+        st = State()
+        models.storage.save()
+        st.name = "Nevada"
+        models.storage.close()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual("Nevada", models.storage.get(State, st.id).name)
+
+    def test_flush_during_batch(self):
+        FileStorage._FileStorage__flush_interval = 20
+        st = State()
+        st.save()
+        models.storage.begin()
+        time.sleep(0.1)
+        self.assertEqual(set(), self.saved())
+        models.storage.rollback()
+        self.assertIsNotNone(FileStorage._FileStorage__flusher)
+        models.storage.close()
+        self.assertEqual({"State." + st.id}, self.saved())
+
+    def test_close_after_rollback(self):
+        st = State()
+        st.save()
+        models.storage.begin()
+        models.storage.flush()
+        models.storage.rollback()
+        models.storage.close()
+        self.assertEqual({"State." + st.id}, self.saved())
+
+    def test_changes_while_saving(self):
+        FileStorage._FileStorage__flush_interval = 1
+        states = []
+        for i in range(200):
+            states.append(State(name=str(i)))
+            models.storage.save()
+        models.storage.flush()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(200, models.storage.count(State))
+
+
+class TestFileStorage_batch(unittest.TestCase):
+    """Unittests for testing the batches of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.user = User(email="a@b.c")
+        self.place = Place(name="Loft", amenity_ids=["a1"])
+        models.storage.save()
+
+    def tearDown(self):
+        if models.storage.in_batch():
+            models.storage.rollback()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = False
+        for path in ("file.json", "file.json.text"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def saved(self):
+        with open("file.json", "r") as f:
+            return json.load(f)
+
+    def test_batch_saves_once(self):
+        with patch("models.engine.file_storage.write_records",
+                   wraps=models.engine.file_storage.write_records) as write:
+            with models.storage.batch():
+                self.assertTrue(models.storage.in_batch())
+                states = [State(name=str(i)) for i in range(10)]
+                for st in states:
+                    st.save()
+                self.user.email = "d@e.f"
+                self.user.save()
+                self.assertEqual(2, len(self.saved()))
+            self.assertEqual(1, write.call_count)
+        self.assertFalse(models.storage.in_batch())
+        saved = self.saved()
+        self.assertEqual(12, len(saved))
+        self.assertEqual("d@e.f", saved["User." + self.user.id]["email"])
+
+    def test_exception_rolls_back(self):
+        with self.assertRaises(KeyError):
+            with models.storage.batch():
+                st = State()
+                st.save()
+                self.user.email = "d@e.f"
+                models.storage.delete(self.place)
+                raise KeyError("failed")
+        self.assertFalse(models.storage.in_batch())
+        self.assertEqual({"User." + self.user.id, "Place." + self.place.id},
+                         set(models.storage.all()))
+        self.assertIsNone(models.storage.get(State, st.id))
+        self.assertEqual("a@b.c", models.storage.get(User,
+                                                     self.user.id).email)
+        self.assertEqual(self.place.to_dict(), models.storage.get(
+            Place, self.place.id).to_dict())
+        self.assertEqual(set(), FileStorage._FileStorage__dirty)
+        self.assertEqual(1, models.storage.count(Place, name="Loft"))
+        self.assertEqual(2, len(self.saved()))
+
+    def test_rollback_keeps_earlier_changes(self):
+        self.user.email = "d@e.f"
+        models.storage.begin()
+        self.user.email = "g@h.i"
+        models.storage.rollback()
+        self.assertEqual({"User." + self.user.id},
+                         FileStorage._FileStorage__dirty)
+        models.storage.save()
+        self.assertEqual("d@e.f",
+                         self.saved()["User." + self.user.id]["email"])
+
+    def test_rollback_lazy_records(self):
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        models.storage.begin()
+        us = models.storage.get(User, self.user.id)
+        us.email = "d@e.f"
+        models.storage.delete(models.storage.get(Place, self.place.id))
+        models.storage.rollback()
+        self.assertEqual(2, models.storage.count())
+        self.assertEqual(["User." + us.id],
+                         list(FileStorage._FileStorage__objects))
+        self.assertIs(us, models.storage.get(User, self.user.id))
+        self.assertEqual("a@b.c", us.email)
+        self.assertEqual("Loft", models.storage.get(Place,
+                                                    self.place.id).name)
+        self.assertEqual(set(), FileStorage._FileStorage__dirty)
+
+    def test_rollback_keeps_references(self):
+        st = State(name="Utah")
+        models.storage.begin()
+        self.user.email = "d@e.f"
+        self.user.first_name = "Betty"
+        self.place.amenity_ids.append("a2")
+        models.storage.delete(st)
+        models.storage.rollback()
+        self.assertIs(self.user, models.storage.get(User, self.user.id))
+        self.assertIs(self.place, models.storage.get(Place, self.place.id))
+        self.assertIs(st, models.storage.get(State, st.id))
+        self.assertEqual("a@b.c", self.user.email)
+        self.assertNotIn("first_name", self.user.to_dict())
+        self.assertEqual(["a1"], self.place.amenity_ids)
+        self.assertEqual([self.user], list(models.storage.query(
+            User, ("email", "==", "a@b.c")).values()))
+        self.assertEqual({"State." + st.id}, FileStorage._FileStorage__dirty)
+
+    def test_rollback_keeps_objects_changed_before(self):
+        pl = Place()
+        pl.name = "x"
+        models.storage.begin()
+        models.storage.rollback()
+        self.assertIs(pl, models.storage.get(Place, pl.id))
+        self.assertEqual("x", pl.name)
+        pl.name = "y"
+        models.storage.save()
+        self.assertEqual("y", self.saved()["Place." + pl.id]["name"])
+
+    def test_begin_twice(self):
+        models.storage.begin()
+        with self.assertRaises(ValueError):
+            models.storage.begin()
+
+    def test_no_batch(self):
+        with self.assertRaises(ValueError):
+            models.storage.commit()
+        with self.assertRaises(ValueError):
+            models.storage.rollback()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/indexes.py.
+
+Unittest classes:
+    TestHashIndex
+    TestSortedIndex
+"""
+import unittest
+from models.city import City
+from models.place import Place
+from models.engine.indexes import REFERENCES, HashIndex, SortedIndex
+
+
+class TestHashIndex(unittest.TestCase):
+    """Unittests for testing the HashIndex class."""
+
+    def setUp(self):
+        self.index = HashIndex("City", "state_id")
+        self.cy = City()
+        self.cy.state_id = "st1"
+
+    def test_references_point_to_models(self):
+        self.assertEqual("State", REFERENCES["City"]["state_id"])
+        self.assertEqual("Place", REFERENCES["Review"]["place_id"])
+
+    def test_add_and_lookup(self):
+        self.index.add("City.1", self.cy)
+        self.assertEqual({"City.1": self.cy}, self.index.lookup("st1"))
+        self.assertEqual({}, self.index.lookup("st2"))
+        self.assertEqual(1, self.index.count("st1"))
+
+    def test_lookup_is_a_copy(self):
+        self.index.add("City.1", self.cy)
+        self.index.lookup("st1").clear()
+        self.assertEqual(1, self.index.count("st1"))
+
+    def test_update_moves_object(self):
+        self.index.add("City.1", self.cy)
+        self.cy.state_id = "st2"
+        self.index.update("City.1", self.cy)
+        self.assertEqual({}, self.index.lookup("st1"))
+        self.assertEqual({"City.1": self.cy}, self.index.lookup("st2"))
+
+    def test_add_replaces_key(self):
+        self.index.add("City.1", self.cy)
+        other = City()
+        other.state_id = "st2"
+        self.index.add("City.1", other)
+        self.assertEqual(0, self.index.count("st1"))
+        self.assertEqual({"City.1": other}, self.index.lookup("st2"))
+
+    def test_remove(self):
+        self.index.add("City.1", self.cy)
+        self.index.remove("City.1")
+        self.index.remove("City.2")
+        self.assertEqual(0, self.index.count("st1"))
+
+    def test_unhashable_values_not_indexed(self):
+        self.cy.state_id = ["st1"]
+        self.index.add("City.1", self.cy)
+        self.assertEqual({}, self.index.lookup(["st1"]))
+        self.assertEqual(0, self.index.count(["st1"]))
+        self.index.remove("City.1")
+
+    def test_clear(self):
+        self.index.add("City.1", self.cy)
+        self.index.clear()
+        self.assertEqual(0, self.index.count("st1"))
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Unittests for testing the SortedIndex class."""
+
+    def setUp(self):
+        self.index = SortedIndex("Place", "price_by_night")
+        self.places = {}
+        for i, price in enumerate([120, 40, 80, 40, 200]):
+            pl = Place()
+            pl.price_by_night = price
+            self.places["Place.{}".format(i)] = pl
+            self.index.add("Place.{}".format(i), pl)
+
+    def prices(self, objs):
+        return [obj.price_by_night for obj in objs.values()]
+
+    def test_range(self):
+        self.assertEqual([40, 40, 80, 120],
+                         self.prices(self.index.range(40, 120)))
+        self.assertEqual([80],
+                         self.prices(self.index.range(40, 120, False, False)))
+        self.assertEqual([120, 200], self.prices(self.index.range(100)))
+        self.assertEqual([40, 40], self.prices(self.index.range(high=50)))
+
+    def test_ordered(self):
+        self.assertEqual(["Place.1", "Place.3"],
+                         [key for key, obj in self.index.ordered(limit=2)])
+        self.assertEqual([200, 120, 80],
+                         [obj.price_by_night for key, obj in
+                          self.index.ordered(reverse=True, limit=3)])
+        self.assertEqual(5, len(self.index.ordered()))
+        self.assertEqual([], self.index.ordered(limit=0))
+
+    def test_estimate_and_select(self):
+        self.assertEqual(2, self.index.estimate("==", 40))
+        self.assertEqual(3, self.index.estimate("<", 100))
+        self.assertEqual(2, self.index.estimate(">=", 120))
+        self.assertEqual(3, self.index.estimate("in", [80, 40, 40]))
+        self.assertEqual([120, 200], self.prices(self.index.select(">", 80)))
+        self.assertIsNone(self.index.estimate("!=", 40))
+        self.assertIsNone(self.index.estimate("<", "cheap"))
+
+    def test_update_and_remove(self):
+        pl = self.places["Place.4"]
+        pl.price_by_night = 10
+        self.index.update("Place.4", pl)
+        self.index.remove("Place.1")
+        self.index.remove("Place.9")
+        self.assertEqual([10, 40, 80, 120],
+                         self.prices(self.index.range()))
+
+    def test_non_numbers_not_indexed(self):
+        pl = self.places["Place.0"]
+        pl.price_by_night = "free"
+        self.index.update("Place.0", pl)
+        pl = Place()
+        pl.price_by_night = float("nan")
+        self.index.add("Place.5", pl)
+        self.assertEqual([40, 40, 80, 200], self.prices(self.index.range()))
+
+    def test_many_pending_objects(self):
+        for i in range(5, 200):
+            pl = Place()
+            pl.price_by_night = (i * 37) % 101
+            self.index.add("Place.{}".format(i), pl)
+        self.index.remove("Place.7")
+        prices = self.prices(self.index.range())
+        self.assertEqual(199, len(prices))
+        self.assertEqual(sorted(prices), prices)
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual({}, self.index.range())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/query.py.
+
+Unittest classes:
+    TestQuery_check_predicates
+    TestQuery_matches
+"""
+import unittest
+from models.place import Place
+from models.engine.query import check_predicates, matches
+
+
+class TestQuery_check_predicates(unittest.TestCase):
+    """Unittests for testing the check_predicates function."""
+
+    def test_valid_predicates(self):
+        check_predicates((("max_guest", ">=", 4), ("city_id", "in", ["c1"])))
+
+    def test_not_a_triple(self):
+        with self.assertRaises(ValueError):
+            check_predicates((("max_guest", ">="),))
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            check_predicates((("max_guest", "=~", 4),))
+
+    def test_in_needs_list(self):
+        with self.assertRaises(ValueError):
+            check_predicates((("max_guest", "in", 4),))
+
+
+class TestQuery_matches(unittest.TestCase):
+    """Unittests for testing the matches function."""
+
+    def setUp(self):
+        self.pl = Place()
+        self.pl.price_by_night = 80
+        self.pl.city_id = "c1"
+
+    def test_all_predicates_hold(self):
+        self.assertTrue(matches(self.pl, (("price_by_night", "<", 100),
+                                          ("city_id", "in", ["c1", "c2"]))))
+
+    def test_one_predicate_fails(self):
+        self.assertFalse(matches(self.pl, (("price_by_night", "<", 100),
+                                           ("city_id", "==", "c2"))))
+
+    def test_class_attribute_default(self):
+        self.assertTrue(matches(self.pl, (("max_guest", "==", 0),)))
+
+    def test_missing_attribute(self):
+        self.assertFalse(matches(self.pl, (("color", "!=", "red"),)))
+
+    def test_incomparable_values(self):
+        self.assertFalse(matches(self.pl, (("price_by_night", "<", "cheap"),)))
+
+    def test_no_predicates(self):
+        self.assertTrue(matches(self.pl, ()))
+
+
+if __name__ == "__main__":
+    unittest.main()
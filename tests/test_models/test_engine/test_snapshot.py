@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/snapshot.py.
+
+Unittest classes:
+    TestSnapshot
+    TestSnapshotRecord
+"""
+import json
+import os
+import unittest
+from models.engine.snapshot import Snapshot, SnapshotRecord
+from models.engine.snapshot import encode_record, write_snapshot
+
+PATH = "test_snapshot.bin"
+RECORDS = {
+    "User.1": {"__class__": "User", "id": "1", "email": "a@b.c"},
+    "Place.2": {"__class__": "Place", "id": "2", "name": "Café",
+                "price_by_night": 80},
+    "State.3": {"__class__": "State", "id": "3"},
+}
+
+
+def write(records):
+    write_snapshot(PATH, ((key, json.dumps(record))
+                          for key, record in records.items()))
+
+
+class TestSnapshot(unittest.TestCase):
+    """Unittests for testing the Snapshot class."""
+
+    def tearDown(self):
+        for path in (PATH, PATH + ".tmp"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def test_round_trip(self):
+        write(RECORDS)
+        snapshot = Snapshot(PATH)
+        records = snapshot.records()
+        self.assertEqual(list(RECORDS), list(records))
+        self.assertEqual(RECORDS, {key: dict(record)
+                                   for key, record in records.items()})
+        snapshot.close()
+        self.assertFalse(os.path.exists(PATH + ".tmp"))
+
+    def test_empty(self):
+        write({})
+        self.assertEqual({}, Snapshot(PATH).records())
+
+    def test_replaces_snapshot(self):
+        write(RECORDS)
+        snapshot = Snapshot(PATH)
+        write({"State.3": RECORDS["State.3"]})
+        self.assertEqual(3, len(snapshot.records()))
+        self.assertEqual(["State.3"], list(Snapshot(PATH).records()))
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            Snapshot(PATH)
+
+    def test_invalid_file(self):
+        for data in (b"", b"{}", b"{" + b" " * 40 + b"}"):
+            with open(PATH, "wb") as file:
+                file.write(data)
+            with self.assertRaises(ValueError):
+                Snapshot(PATH)
+
+
+class TestSnapshotRecord(unittest.TestCase):
+    """Unittests for testing the SnapshotRecord class."""
+
+    def setUp(self):
+        write(RECORDS)
+        self.snapshot = Snapshot(PATH)
+        self.record = self.snapshot.records()["Place.2"]
+
+    def tearDown(self):
+        self.snapshot.close()
+        os.remove(PATH)
+
+    def test_decoded_on_first_use(self):
+        self.assertIsNone(self.record._SnapshotRecord__fields)
+        self.assertEqual("Café", self.record["name"])
+        self.assertEqual(RECORDS["Place.2"],
+                         self.record._SnapshotRecord__fields)
+
+    def test_mapping(self):
+        self.assertEqual(80, self.record.get("price_by_night"))
+        self.assertIsNone(self.record.get("city_id"))
+        self.assertEqual(4, len(self.record))
+        self.assertIn("name", self.record)
+        with self.assertRaises(KeyError):
+            self.record["city_id"]
+        with self.assertRaises(TypeError):
+            self.record["name"] = "Loft"
+
+    def test_text(self):
+        self.assertEqual(json.dumps(RECORDS["Place.2"]), self.record.text)
+        self.assertIsNone(self.record._SnapshotRecord__fields)
+
+    def test_encode_record(self):
+        self.assertIsInstance(self.record, SnapshotRecord)
+        self.assertEqual(self.record.text, encode_record(self.record))
+        self.assertEqual(json.dumps(RECORDS["User.1"]),
+                         encode_record(RECORDS["User.1"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
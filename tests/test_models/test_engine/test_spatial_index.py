@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/spatial_index.py.
+
+Unittest classes:
+    TestDistance
+    TestGridIndex
+"""
+import random
+import unittest
+from unittest.mock import patch
+from models.place import Place
+from models.engine import spatial_index
+from models.engine.spatial_index import GridIndex, distance, distances
+
+
+class TestDistance(unittest.TestCase):
+    """Unittests for testing the distance functions."""
+
+    def test_distance(self):
+        self.assertEqual(0, distance(10, 20, 10, 20))
+        self.assertAlmostEqual(111.195, distance(0, 0, 1, 0), places=2)
+        self.assertAlmostEqual(343.5, distance(51.5074, -0.1278,
+                                               48.8566, 2.3522), delta=1)
+
+    def test_distance_across_antimeridian(self):
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5),
+                               distance(0, 0, 0, 1))
+
+    def test_distances_matches_distance(self):
+        points = [(random.uniform(-90, 90), random.uniform(-180, 180))
+                  for i in range(100)]
+        expected = [distance(10, 20, lat, lon) for lat, lon in points]
+        for dist, correct in zip(distances(10, 20, points), expected):
+            self.assertAlmostEqual(correct, dist, places=6)
+
+    def test_distances_without_numpy(self):
+        with patch.object(spatial_index, "numpy", None):
+            self.assertEqual([distance(0, 0, 1, 1)] * 100,
+                             distances(0, 0, [(1, 1)] * 100))
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        self.index = GridIndex("Place")
+        self.places = {}
+        rng = random.Random(8)
+        for i in range(500):
+            pl = Place()
+            pl.latitude = rng.uniform(-90, 90)
+            pl.longitude = rng.uniform(-180, 180)
+            self.add("Place.{}".format(i), pl)
+
+    def add(self, key, pl):
+        self.places[key] = pl
+        self.index.add(key, pl)
+
+    def ranked(self, lat, lon):
+        return sorted((distance(lat, lon, pl.latitude, pl.longitude), key)
+                      for key, pl in self.places.items())
+
+    def test_attributes(self):
+        self.assertEqual("spatial", self.index.kind)
+        self.assertEqual(("latitude", "longitude"), self.index.fields)
+        self.assertIsNone(self.index.estimate("==", 0))
+
+    def test_unset_coordinates(self):
+        self.add("Place.unset", Place())
+        pl = Place()
+        pl.latitude = 0.0
+        self.add("Place.lat", pl)
+        self.assertNotIn("Place.unset", self.index.within_radius(0, 0, 10))
+        self.assertNotIn("Place.unset", self.index.nearest(0.1, 0.1, 600))
+        self.assertNotIn("Place.lat", self.index.within_box(-1, -1, 1, 1))
+
+    def test_within_box(self):
+        box = self.index.within_box(-10, -20, 30, 40)
+        self.assertEqual({key for key, pl in self.places.items()
+                          if -10 <= pl.latitude <= 30 and
+                          -20 <= pl.longitude <= 40}, set(box))
+
+    def test_within_box_across_antimeridian(self):
+        self.add("Place.east", Place(latitude=1.0, longitude=179.9))
+        self.add("Place.west", Place(latitude=1.0, longitude=-179.9))
+        box = self.index.within_box(0, 170, 2, -170)
+        self.assertIn("Place.east", box)
+        self.assertIn("Place.west", box)
+        self.assertEqual({key for key, pl in self.places.items()
+                          if 0 <= pl.latitude <= 2 and
+                          abs(pl.longitude) >= 170}, set(box))
+
+    def test_within_radius(self):
+        for lat, lon, km in ((0, 0, 2000), (45, 179, 3000), (-89, 0, 1500)):
+            self.assertEqual([key for dist, key in self.ranked(lat, lon)
+                              if dist <= km],
+                             list(self.index.within_radius(lat, lon, km)))
+
+    def test_nearest(self):
+        for lat, lon, k in ((0, 0, 1), (60, -179.9, 5), (89.9, 10, 20)):
+            self.assertEqual([key for dist, key in self.ranked(lat, lon)[:k]],
+                             list(self.index.nearest(lat, lon, k)))
+
+    def test_nearest_more_than_indexed(self):
+        self.assertEqual(500, len(self.index.nearest(0, 0, 1000)))
+        self.assertEqual({}, self.index.nearest(0, 0, 0))
+        self.assertEqual({}, GridIndex("Place").nearest(0, 0, 3))
+
+    def test_update_moves_object(self):
+        pl = Place(latitude=10.0, longitude=10.0)
+        self.index.add("Place.x", pl)
+        pl.latitude = -10.0
+        self.index.update("Place.x", pl)
+        self.assertNotIn("Place.x", self.index.within_box(9, 9, 11, 11))
+        self.assertIn("Place.x", self.index.within_box(-11, 9, -9, 11))
+
+    def test_remove_and_clear(self):
+        self.index.remove("Place.0")
+        self.index.remove("Place.missing")
+        self.assertEqual(499, len(self.index.nearest(0, 0, 1000)))
+        self.index.clear()
+        self.assertEqual({}, self.index.within_box(-90, -180, 90, 180))
+
+    def test_invalid_coordinates_not_indexed(self):
+        index = GridIndex("Place")
+        for i, (lat, lon) in enumerate(((91.0, 0.0), (0.0, "east"),
+                                        (None, 0.0), (0.0, -180.5))):
+            index.add("Place.{}".format(i), Place(latitude=lat,
+                                                  longitude=lon))
+        self.assertEqual({}, index.within_box(-90, -180, 90, 180))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/stream.py.
+
+Unittest classes:
+    TestStream_read_records
+    TestStream_write_records
+"""
+import io
+import json
+import os
+import unittest
+from models.engine.stream import read_records, write_records
+
+RECORDS = {
+    "User.1": {"__class__": "User", "id": "1", "email": "a@b.c"},
+    "Place.2": {"__class__": "Place", "id": "2", "name": "Café \"Le\" {",
+                "price_by_night": 80, "latitude": -12.5e3,
+                "amenity_ids": ["a", "b"], "extra": None},
+    "State.3": {"__class__": "State", "id": "3", "flag": True},
+}
+
+
+def read(text, chunk_size=7):
+    return list(read_records(io.StringIO(text), chunk_size))
+
+
+class TestStream_read_records(unittest.TestCase):
+    """Unittests for testing the read_records function."""
+
+    def test_read_records(self):
+        for text in (json.dumps(RECORDS), json.dumps(RECORDS, indent=4),
+                     json.dumps(RECORDS, ensure_ascii=False)):
+            for chunk_size in (1, 7, 1 << 16):
+                self.assertEqual(list(RECORDS.items()),
+                                 read(text, chunk_size))
+
+    def test_empty_object(self):
+        self.assertEqual([], read("{}"))
+        self.assertEqual([], read(" \n{ \n} \n"))
+
+    def test_numbers_across_chunks(self):
+        self.assertEqual([("a", 1234567), ("b", -0.125)],
+                         read('{"a": 1234567, "b": -0.125}', 3))
+
+    def test_texts(self):
+        text = json.dumps(RECORDS, indent=4)
+        for chunk_size in (1, 7, 1 << 16):
+            for key, value, raw in read_records(io.StringIO(text),
+                                                chunk_size, texts=True):
+                self.assertEqual(RECORDS[key], value)
+                self.assertEqual(value, json.loads(raw))
+
+    def test_lazy(self):
+        records = read_records(io.StringIO('{"a": {}, "b": '))
+        self.assertEqual(("a", {}), next(records))
+        with self.assertRaises(json.JSONDecodeError):
+            next(records)
+
+    def test_invalid(self):
+        for text in ("", "[]", "{", '{"a"}', '{"a": 1,}', '{"a": 1 "b": 2}',
+                     "{a: 1}", '{"a": 1} {}', '{"a": tru}', '{"a": "b'):
+            with self.assertRaises(json.JSONDecodeError, msg=text):
+                read(text)
+
+
+class TestStream_write_records(unittest.TestCase):
+    """Unittests for testing the write_records function."""
+    path = "test_stream.json"
+
+    def tearDown(self):
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+
+    def write(self, records, **kwargs):
+        write_records(self.path, ((key, json.dumps(value))
+                                  for key, value in records.items()),
+                      **kwargs)
+
+    def test_write_records(self):
+        for buffering in (1, 16, 1 << 20):
+            self.write(RECORDS, buffering=buffering)
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.assertEqual(RECORDS, json.load(f))
+            self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_round_trip(self):
+        self.write(RECORDS)
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(list(RECORDS.items()), list(read_records(f)))
+
+    def test_empty(self):
+        self.write({})
+        with open(self.path, "r") as f:
+            self.assertEqual("{}", f.read())
+
+    def test_failure_keeps_file(self):
+        self.write(RECORDS)
+
+        def items():
+            yield "State.4", "{}"
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            write_records(self.path, items())
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(RECORDS, json.load(f))
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
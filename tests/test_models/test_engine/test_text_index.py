@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/text_index.py.
+
+Unittest classes:
+    TestTokenize
+    TestTextIndex
+"""
+import json
+import unittest
+from models.place import Place
+from models.engine.text_index import TextIndex, tokenize
+
+
+class TestTokenize(unittest.TestCase):
+    """Unittests for testing the tokenize function."""
+
+    def test_tokenize(self):
+        self.assertEqual(["cozy", "loft", "near", "the", "beach", "2br"],
+                         tokenize("Cozy loft, near the BEACH! (2br)"))
+
+    def test_tokenize_not_text(self):
+        self.assertEqual([], tokenize(None))
+        self.assertEqual([], tokenize(42))
+
+
+class TestTextIndex(unittest.TestCase):
+    """Unittests for testing the TextIndex class."""
+
+    def setUp(self):
+        self.index = TextIndex("Place", ("name", "description"))
+        self.texts = {
+            "Place.1": ("Beach house", "Sunny house by the beach"),
+            "Place.2": ("Downtown loft", "Quiet loft near the beach"),
+            "Place.3": ("Mountain cabin", "Cozy cabin with a view"),
+            "Place.4": ("Beachfront studio", "Studio with an ocean view"),
+        }
+        self.places = {}
+        for key, (name, description) in self.texts.items():
+            self.places[key] = Place(name=name, description=description)
+            self.index.add(key, self.places[key])
+
+    def search(self, text, limit=None):
+        return [key for key, score in self.index.search(text, limit)]
+
+    def test_attributes(self):
+        self.assertEqual("text", self.index.kind)
+        self.assertEqual(("name", "description"), self.index.fields)
+        self.assertIsNone(self.index.estimate("==", "beach"))
+
+    def test_search_ranks_by_frequency(self):
+        self.assertEqual(["Place.1", "Place.2"], self.search("beach"))
+        self.assertEqual(["Place.3"], self.search("CABIN"))
+        self.assertEqual([], self.search("castle"))
+        self.assertEqual([], self.search(""))
+
+    def test_search_rare_words_weigh_more(self):
+        ranked = self.search("beach cozy")
+        self.assertEqual("Place.3", ranked[0])
+        self.assertEqual({"Place.1", "Place.2", "Place.3"}, set(ranked))
+
+    def test_search_prefix(self):
+        self.assertEqual({"Place.1", "Place.2", "Place.4"},
+                         set(self.search("beach*")))
+        self.assertEqual(["Place.4"], self.search("ocea*"))
+        self.assertEqual([], self.search("zz*"))
+
+    def test_search_limit(self):
+        self.assertEqual(self.search("view beach")[:2],
+                         self.search("view beach", 2))
+
+    def test_scores_decrease(self):
+        scores = [score for key, score in self.index.search("beach* view")]
+        self.assertEqual(sorted(scores, reverse=True), scores)
+        self.assertTrue(all(score > 0 for score in scores))
+
+    def test_update_reindexes_words(self):
+        place = self.places["Place.3"]
+        place.description = "Cabin on the beach"
+        self.index.update("Place.3", place)
+        self.assertIn("Place.3", self.search("beach"))
+        self.assertEqual([], self.search("cozy"))
+
+    def test_remove_and_clear(self):
+        self.index.remove("Place.1")
+        self.index.remove("Place.9")
+        self.assertEqual(["Place.2"], self.search("beach"))
+        self.assertEqual([], self.search("sunny"))
+        self.index.clear()
+        self.assertEqual(set(), self.index.keys())
+        self.assertEqual([], self.search("beach*"))
+
+    def test_objects_without_text_not_indexed(self):
+        self.index.add("Place.5", Place())
+        self.assertNotIn("Place.5", self.index.keys())
+
+    def test_dumps_and_loads(self):
+        other = TextIndex("Place", ("name", "description"))
+        other.loads(json.loads(self.index.dumps()))
+        self.assertEqual(self.index.keys(), other.keys())
+        for text in ("beach", "view cozy", "beach* loft"):
+            self.assertEqual(self.index.search(text), other.search(text))
+        other.remove("Place.1")
+        self.assertEqual(["Place.2"],
+                         [key for key, score in other.search("beach")])
+
+    def test_loads_other_fields(self):
+        other = TextIndex("Place", ("name",))
+        with self.assertRaises(ValueError):
+            other.loads(json.loads(self.index.dumps()))
+
+
+if __name__ == "__main__":
+    unittest.main()
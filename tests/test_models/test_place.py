@@ -191,8 +191,9 @@ class TestPlace_save(unittest.TestCase):
         pl = Place()
         pl.save()
         plid = "Place." + pl.id
-        with open("file.json", "r") as f:
-            self.assertIn(plid, f.read())
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn(plid, models.storage.all())
 
 
 class TestPlace_to_dict(unittest.TestCase):
@@ -143,8 +143,9 @@ class TestReview_save(unittest.TestCase):
         rv = Review()
         rv.save()
         rvid = "Review." + rv.id
-        with open("file.json", "r") as f:
-            self.assertIn(rvid, f.read())
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn(rvid, models.storage.all())
 
 
 class TestReview_to_dict(unittest.TestCase):
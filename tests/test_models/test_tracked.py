@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+"""Defines unittests for models/tracked.py.
+
+Unittest classes:
+    TestTracked_track
+    TestTracked_changes
+"""
+import copy
+import pickle
+import unittest
+from unittest.mock import patch
+import models
+from models.base_model import BaseModel
+from models.place import Place
+from models.tracked import (Tracked, TrackedDict, TrackedList, TrackedSet,
+                            adopt, track)
+
+
+class TestTracked_track(unittest.TestCase):
+    """Unittests for testing the track function."""
+
+    def setUp(self):
+        self.pl = Place()
+
+    def tearDown(self):
+        models.storage.delete(self.pl)
+
+    def test_containers(self):
+        for value, kind in (([1], TrackedList), ({"a": 1}, TrackedDict),
+                            ({1}, TrackedSet)):
+            tracked = track(self.pl, "value", value)
+            self.assertIs(kind, type(tracked))
+            self.assertEqual(value, tracked)
+            self.assertIsNot(value, tracked)
+
+    def test_other_values(self):
+        for value in (None, 1, "a", (1, 2)):
+            self.assertIs(value, track(self.pl, "value", value))
+
+    def test_tracked_value(self):
+        tracked = track(self.pl, "amenity_ids", ["wifi"])
+        self.assertIs(tracked, track(self.pl, "amenity_ids", tracked))
+        other = track(self.pl, "other_ids", tracked)
+        self.assertIsNot(tracked, other)
+        self.assertEqual("other_ids", other._name)
+
+    def test_setattr(self):
+        ids = ["wifi"]
+        self.pl.amenity_ids = ids
+        self.assertIsInstance(self.pl.amenity_ids, Tracked)
+        self.assertIsInstance(self.pl.amenity_ids, list)
+        self.assertEqual(ids, self.pl.amenity_ids)
+
+    def test_from_dict(self):
+        pl = Place.from_dict({"id": "1", "amenity_ids": ["wifi"]})
+        self.assertIsInstance(pl.amenity_ids, TrackedList)
+        self.assertIs(pl, pl.amenity_ids._owner)
+
+    def test_adopt(self):
+        pl = Place.from_dict({"id": "1", "amenity_ids": ["wifi"]})
+        adopt(self.pl, {"amenity_ids": pl.amenity_ids})
+        self.assertIs(self.pl, pl.amenity_ids._owner)
+
+    def test_copies_are_plain(self):
+        self.pl.amenity_ids = ["wifi"]
+        for other in (copy.copy(self.pl.amenity_ids),
+                      copy.deepcopy(self.pl.amenity_ids),
+                      pickle.loads(pickle.dumps(self.pl.amenity_ids)),
+                      self.pl.amenity_ids[:]):
+            self.assertIs(list, type(other))
+            self.assertEqual(["wifi"], other)
+
+
+class TestTracked_changes(unittest.TestCase):
+    """Unittests for testing that tracked containers flag their owner as
+    changed."""
+
+    def setUp(self):
+        self.pl = Place(amenity_ids=["a"], rules={"pets": False},
+                        tags={"quiet"})
+        self.touch = patch.object(models.storage, "touch").start()
+        self.key = "Place." + self.pl.id
+
+    def tearDown(self):
+        patch.stopall()
+        models.storage.delete(self.pl)
+
+    def assertTouched(self, name, count):
+        self.assertEqual(count, self.touch.call_count)
+        self.touch.assert_called_with(self.key, self.pl, name)
+
+    def test_list(self):
+        ids = self.pl.amenity_ids
+        ids.append("b")
+        ids.extend(["c"])
+        ids.insert(0, "d")
+        ids += ["e"]
+        ids[0] = "f"
+        del ids[0]
+        ids.remove("e")
+        ids.pop()
+        ids.sort()
+        ids.reverse()
+        ids *= 2
+        ids.clear()
+        self.assertTouched("amenity_ids", 12)
+
+    def test_dict(self):
+        rules = self.pl.rules
+        rules["smoking"] = False
+        rules.update(parties=False)
+        rules.setdefault("quiet_hours", "22:00")
+        rules |= {"pets": True}
+        del rules["smoking"]
+        rules.pop("parties")
+        rules.popitem()
+        rules.clear()
+        self.assertTouched("rules", 8)
+
+    def test_set(self):
+        tags = self.pl.tags
+        tags.add("sunny")
+        tags.discard("sunny")
+        tags.update({"cozy"})
+        tags |= {"central"}
+        tags -= {"central"}
+        tags.remove("cozy")
+        tags.pop()
+        tags.clear()
+        self.assertTouched("tags", 8)
+
+    def test_reads_do_not_touch(self):
+        ids = self.pl.amenity_ids
+        ids.index("a")
+        ids.count("a")
+        _ = ids + ["b"], ids[0], len(ids), "a" in ids
+        _ = self.pl.rules.get("pets"), list(self.pl.rules.items())
+        _ = self.pl.tags | {"sunny"}
+        self.touch.assert_not_called()
+
+    def test_base_model(self):
+        bm = BaseModel()
+        bm.values = []
+        bm.values.append(1)
+        self.touch.assert_called_with("BaseModel." + bm.id, bm, "values")
+        models.storage.delete(bm)
+
+
+if __name__ == "__main__":
+    unittest.main()